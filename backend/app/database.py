@@ -1,24 +1,180 @@
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.pool import Pool, StaticPool
+from typing import Any, Dict, Optional
 import os
+import threading
+import time
 from dotenv import load_dotenv
 
+from app.metrics import Gauge, Histogram, metrics
+
 load_dotenv()
 
 # Get database URL from environment or use SQLite default
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./toolkit.db")
 
+# Engine profile: "prod" (default), "dev" or "test"
+DEV = "dev"
+PROD = "prod"
+TEST = "test"
+DB_PROFILE = os.getenv("DB_PROFILE", PROD)
+
+TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
+
+# Seconds spent waiting for a pooled connection
+POOL_WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+# Connection record info keys used to leave connection setup out of pool waits
+_CONNECT_STARTED = "pool_stats_connect_started"
+_SETUP_SECONDS = "pool_stats_setup_seconds"
+
+
+def engine_options(profile: str, url: str) -> Dict[str, Any]:
+    """Keyword arguments for ``create_async_engine`` under a profile.
+
+    Args:
+        profile: "dev" (statement echo, default pool), "prod" (no echo, sized
+            pool with pre-ping and a larger compiled-statement cache) or
+            "test" (shared in-memory SQLite connection)
+        url: Database URL; SQLite file databases get no pool sizing
+
+    Returns:
+        Engine keyword arguments
+    """
+    if profile == DEV:
+        return {"echo": True}
+    if profile == TEST:
+        return {
+            "poolclass": StaticPool,
+            "connect_args": {"check_same_thread": False},
+        }
+    if profile == PROD:
+        options: Dict[str, Any] = {
+            "echo": False,
+            "pool_pre_ping": True,
+            "query_cache_size": int(os.getenv("DB_STATEMENT_CACHE_SIZE", "1200")),
+        }
+        if not url.startswith("sqlite"):
+            options.update(
+                pool_size=int(os.getenv("DB_POOL_SIZE", "10")),
+                max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "20")),
+                pool_timeout=float(os.getenv("DB_POOL_TIMEOUT", "10")),
+                pool_recycle=int(os.getenv("DB_POOL_RECYCLE", "1800")),
+            )
+        return options
+    raise ValueError(f"Unknown database profile: {profile}")
+
+
+class PoolStats:
+    """Checkout counters and wait times for an engine's connection pool.
+
+    Every checkout from the pool is timed, whether it comes from a request
+    session, the archive writer or a bare ``engine.connect()``. The time spent
+    opening a brand-new DBAPI connection is subtracted, so the histogram only
+    holds time spent waiting on the pool.
+    """
+
+    def __init__(self, engine: AsyncEngine):
+        self.engine = engine.sync_engine
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.wait = Histogram("db_pool_wait_seconds", "Time spent waiting for a pooled connection",
+                              buckets=POOL_WAIT_BUCKETS)
+        self._lock = threading.Lock()
+        event.listen(self.engine, "do_connect", self._on_do_connect)
+        event.listen(self.engine, "connect", self._on_connect)
+        event.listen(self.engine, "checkout", self._on_checkout)
+        event.listen(self.engine, "checkin", self._on_checkin)
+        # dispose() replaces the pool; time checkouts from the new one too
+        event.listen(self.engine, "engine_disposed", lambda engine: self._time_checkouts(engine.pool))
+        self._time_checkouts(self.engine.pool)
+
+    @property
+    def pool(self) -> Pool:
+        return self.engine.pool
+
+    def _time_checkouts(self, pool: Pool) -> None:
+        """Wrap ``pool.connect``, which every engine and session checkout goes through."""
+        connect = pool.connect
+
+        def timed_connect():
+            start = time.perf_counter()
+            connection = connect()
+            setup = connection.info.pop(_SETUP_SECONDS, 0.0)
+            self.observe_wait(max(time.perf_counter() - start - setup, 0.0))
+            return connection
+
+        pool.connect = timed_connect
+
+    def _on_do_connect(self, dialect, connection_record, cargs, cparams) -> None:
+        connection_record.info[_CONNECT_STARTED] = time.perf_counter()
+
+    def _on_connect(self, dbapi_connection, connection_record) -> None:
+        started = connection_record.info.pop(_CONNECT_STARTED, None)
+        if started is not None:
+            connection_record.info[_SETUP_SECONDS] = time.perf_counter() - started
+        with self._lock:
+            self.connects += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy) -> None:
+        with self._lock:
+            self.checkouts += 1
+
+    def _on_checkin(self, dbapi_connection, connection_record) -> None:
+        with self._lock:
+            self.checkins += 1
+
+    def observe_wait(self, seconds: float) -> None:
+        self.wait.observe(seconds)
+
+    def _pool_value(self, name: str) -> Optional[int]:
+        # Only QueuePool-style pools report size and overflow
+        method = getattr(self.pool, name, None)
+        return method() if callable(method) else None
+
+    def stats(self) -> Dict[str, Any]:
+        counts, total = self.wait.snapshot().get((), ([], 0.0))
+        waits = sum(counts)
+        overflow = self._pool_value("overflow")
+        with self._lock:
+            return {
+                "pool": type(self.pool).__name__,
+                "size": self._pool_value("size"),
+                "checked_out": self.checkouts - self.checkins,
+                "overflow": max(overflow, 0) if overflow is not None else None,
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "mean_wait_ms": round(total / waits * 1000, 3) if waits else None,
+            }
+
+
+def create_engine_for_profile(profile: str = DB_PROFILE, url: Optional[str] = None) -> AsyncEngine:
+    """Async engine configured for ``profile`` (the test profile defaults to in-memory SQLite)."""
+    url = url or (TEST_DATABASE_URL if profile == TEST else DATABASE_URL)
+    return create_async_engine(url, future=True, **engine_options(profile, url))
+
+
 # Create async engine
-engine = create_async_engine(
-    DATABASE_URL, 
-    echo=True,
-    future=True,
-)
+engine = create_engine_for_profile()
+pool_stats = PoolStats(engine)
+
+
+def _pool_gauge(field: str):
+    return lambda: [({"profile": DB_PROFILE}, pool_stats.stats()[field] or 0)]
+
+
+metrics.register(pool_stats.wait)
+metrics.register(Gauge("db_pool_checked_out", "Connections currently checked out", _pool_gauge("checked_out")))
+metrics.register(Gauge("db_pool_overflow", "Connections open beyond the pool size", _pool_gauge("overflow")))
+metrics.register(Gauge("db_pool_checkouts_total", "Connection checkouts", _pool_gauge("checkouts"), kind="counter"))
 
 # Create async session factory
 async_session_maker = sessionmaker(
-    engine, 
-    class_=AsyncSession, 
+    engine,
+    class_=AsyncSession,
     expire_on_commit=False,
 )
 
@@ -35,4 +191,4 @@ async def get_db():
             await session.rollback()
             raise
         finally:
-            await session.close() 
\ No newline at end of file
+            await session.close()
@@ -0,0 +1,97 @@
+"""ETag / If-None-Match handling for cached write-up endpoints.
+
+A write-up's ETag is its content-addressed request key (see
+``app.services.writeup_cache``), so a client that re-submits an identical
+request with ``If-None-Match`` gets a 304 without the write-up being rebuilt.
+"""
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+from typing import Any, Callable
+from app.registry import registry
+from app.services.generation_pool import GenerationPool, PoolSaturatedError
+from app.services.reference_data import ReferenceData, ReferencePayload
+from app.services.writeup_cache import UNCACHED_MODULES, WriteupCache
+
+# Clients must revalidate every time, but may keep the body for a 304
+REVALIDATE = "no-cache"
+
+# Reference data only changes with a deploy; clients revalidate after a day
+REFERENCE_CACHE_CONTROL = "public, max-age=86400"
+
+
+def get_writeup_cache() -> WriteupCache:
+    """Dependency returning the shared write-up cache."""
+    return registry.get("writeup_cache")
+
+
+def get_generation_pool() -> GenerationPool:
+    """The shared generation pool."""
+    return registry.get("generation_pool")
+
+
+def get_reference_data() -> ReferenceData:
+    """Dependency returning the precomputed reference payloads."""
+    return registry.get("reference_data")
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates
+
+
+async def cached_writeup(module: str, request: Any, http_request: Request, response: Response,
+                         generate: Callable[[Any], Any], cache: WriteupCache) -> Any:
+    """Serve a write-up from the cache, generating it on a miss.
+
+    Misses are generated through the shared generation pool, so heavy modules
+    run off the event loop, and queued for the write-up archive.
+
+    Args:
+        module: Module name used in the cache key
+        request: Validated request model
+        http_request: Incoming request (for If-None-Match)
+        response: Outgoing response (ETag and cache headers are set on it)
+        generate: Service method producing the write-up
+        cache: Shared write-up cache
+
+    Returns:
+        The write-up, an empty 304 response when the client's ETag matches, or
+        a 503 with Retry-After when the generation pool is saturated
+    """
+    uncached = module in UNCACHED_MODULES
+    key = cache.key(module, request)
+    etag = f'"{key}"'
+    # Uncached modules get no ETag either, so clients can't revalidate against one
+    headers = {"Cache-Control": "no-store"} if uncached else {"ETag": etag, "Cache-Control": REVALIDATE}
+    if not uncached and _etag_matches(http_request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers=headers)
+
+    result = None if uncached else cache.get(key)
+    hit = result is not None
+    if not hit:
+        try:
+            result = await get_generation_pool().run(module, request, generate)
+        except PoolSaturatedError as e:
+            # Returned rather than raised: the routers map any exception to 400/500
+            return JSONResponse(
+                status_code=503,
+                content={"detail": str(e), "type": "server_busy"},
+                headers={"Retry-After": str(e.retry_after)},
+            )
+        if not uncached:
+            cache.put(key, result)
+        # Buffered; written to the archive in the background
+        registry.get("archive_writer").submit(module, request, result)
+    response.headers.update(headers)
+    response.headers["X-Cache"] = "HIT" if hit else "MISS"
+    return result
+
+
+def reference_response(http_request: Request, payload: ReferencePayload) -> Response:
+    """Serve precomputed reference bytes, or a 304 when the client's ETag matches."""
+    headers = {"ETag": payload.etag, "Cache-Control": REFERENCE_CACHE_CONTROL}
+    if _etag_matches(http_request.headers.get("if-none-match", ""), payload.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=payload.body, media_type="application/json", headers=headers)
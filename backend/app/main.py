@@ -1,19 +1,29 @@
+# Imported first so the cold-start clock includes FastAPI and the routers
+from app.startup import LAZY, ROUTERS, LazyRouterMiddleware, StartupReport, include_router
+startup_report = StartupReport()
+
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.exceptions import RequestValidationError
-from app.routers import fusion, dibh, sbrt, pacemaker, prior_dose, srs, tbi, hdr, neurostimulator
-from app.database import engine, Base
-from app.middleware import add_error_handling, ErrorHandlerMiddleware
+from app.database import engine, pool_stats, Base
+from app import models  # noqa: F401  (registers the tables created at startup)
+from app.middleware import RequestMiddleware
+from app.metrics import PROMETHEUS_CONTENT_TYPE, metrics
+from app.registry import registry
+from app.responses import FastJSONResponse
 import logging
 import os
+import time
 
 logger = logging.getLogger(__name__)
 
 app = FastAPI(
     title="Medical Physics Toolkit API",
     description="Backend API for the Medical Physics Residency Toolkit",
-    version="1.0.0"
+    version="1.0.0",
+    # orjson-backed rendering for every JSON response (stdlib fallback without orjson)
+    default_response_class=FastJSONResponse
 )
 
 # Get allowed origins from environment or use default list
@@ -33,36 +43,31 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Add error handling middleware
-app.add_middleware(ErrorHandlerMiddleware)
-add_error_handling(app)
+# In lazy mode routers are imported on the first request to their prefix
+if startup_report.mode == LAZY:
+    app.add_middleware(LazyRouterMiddleware, fastapi_app=app, report=startup_report)
+
+# Error mapping, timing, logging and latency metrics in a single ASGI layer
+app.add_middleware(RequestMiddleware)
 
 # Custom validation error handler to log detailed errors
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
     errors = exc.errors()
     logger.error(f"Validation error on {request.url.path}: {errors}")
-    # Log the body for debugging
-    try:
-        body = await request.body()
-        logger.error(f"Request body: {body.decode()[:1000]}")  # First 1000 chars
-    except Exception:
-        pass
+    # Log the body for debugging. FastAPI attaches the parsed body to the
+    # exception; reading request.body() again here blocks under the middleware.
+    if exc.body is not None:
+        logger.error(f"Request body: {str(exc.body)[:1000]}")  # First 1000 chars
     return JSONResponse(
         status_code=422,
         content={"detail": errors}
     )
 
 # Include routers
-app.include_router(fusion.router, prefix="/api/fusion", tags=["Fusion"])
-app.include_router(dibh.router, prefix="/api/dibh", tags=["DIBH"])
-app.include_router(sbrt.router, prefix="/api/sbrt", tags=["SBRT"])
-app.include_router(srs.router, prefix="/api/srs", tags=["SRS"])
-app.include_router(pacemaker.router, prefix="/api/pacemaker", tags=["Pacemaker"])
-app.include_router(prior_dose.router, prefix="/api/prior-dose", tags=["Prior Dose"])
-app.include_router(tbi.router, prefix="/api/tbi", tags=["TBI"])
-app.include_router(hdr.router, prefix="/api/hdr", tags=["HDR"])
-app.include_router(neurostimulator.router, prefix="/api/neurostimulator", tags=["Neurostimulator"])
+if startup_report.mode != LAZY:
+    for module_path, prefix, tags in ROUTERS:
+        include_router(app, module_path, prefix, tags, startup_report)
 
 @app.get("/")
 async def root():
@@ -72,15 +77,73 @@ async def root():
 async def health_check():
     return {"status": "healthy"}
 
+@app.get("/health/services", tags=["Health"])
+async def service_report():
+    """Report how long each shared service took to construct."""
+    return registry.report()
+
+@app.get("/health/cache", tags=["Health"])
+async def cache_report():
+    """Write-up cache size and hit/miss counters."""
+    return registry.get("writeup_cache").stats()
+
+@app.get("/health/pool", tags=["Health"])
+async def pool_report():
+    """Generation pool capacity, occupancy and rejections."""
+    return registry.get("generation_pool").stats()
+
+@app.get("/health/db", tags=["Health"])
+async def database_report():
+    """Connection pool size, checkouts, overflow and mean checkout wait."""
+    return pool_stats.stats()
+
+@app.get("/health/archive", tags=["Health"])
+async def archive_report():
+    """Write-behind archive buffer: buffered, written, dropped and spilled rows."""
+    return registry.get("archive_writer").stats()
+
+@app.get("/health/startup", tags=["Health"])
+async def startup_diagnostics():
+    """Cold-start timings: per-router import cost, DDL and time to ready."""
+    return startup_report.as_dict()
+
+@app.get("/metrics", tags=["Health"], response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Request latency histograms in the Prometheus text format."""
+    return PlainTextResponse(metrics.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
 @app.on_event("startup")
 async def startup():
-    # Create database tables
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
-    logger.info("Database tables created")
+    started = time.perf_counter()
+
+    # Create database tables; skip the connection entirely when no models exist
+    if Base.metadata.tables:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        startup_report.ddl = "created"
+        logger.info("Database tables created")
+    else:
+        startup_report.ddl = "skipped"
+
+    # Build every service once so the first request doesn't pay for it;
+    # lazy mode builds each one on first use instead
+    if startup_report.mode != LAZY:
+        report = registry.build_all()
+        logger.info(f"Services built in {report['total_build_ms']:.1f} ms")
+
+    # Background flushing of generated write-ups to the archive
+    registry.get("archive_writer").start()
+
+    startup_report.ready((time.perf_counter() - started) * 1000)
 
 @app.on_event("shutdown")
 async def shutdown():
+    # Write out archive rows still buffered, while the database is still open
+    await registry.get("archive_writer").stop()
+
+    # Release service resources such as the generation worker pool
+    registry.close()
+
     # Close database connection
     await engine.dispose()
     logger.info("Database connection closed") 
\ No newline at end of file
@@ -1,11 +1,13 @@
-from fastapi import Request, status
+from fastapi import status
 from fastapi.responses import JSONResponse
 from sqlalchemy.exc import SQLAlchemyError
-from typing import Callable
+from typing import Dict
 import logging
 import traceback
 import time
 
+from app.metrics import REQUEST_LATENCY
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -13,72 +15,88 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-class ErrorHandlerMiddleware:
+# Route label for requests that didn't match any route, so scans of random
+# paths can't create unbounded metric series
+UNMATCHED_ROUTE = "unmatched"
+
+
+class RequestMiddleware:
+    """Pure ASGI middleware: error mapping, timing, logging and latency metrics in one pass.
+
+    Adds an ``X-Process-Time`` header (seconds until the response started),
+    turns unhandled exceptions into JSON 500s, and records every request in
+    the per-route latency histogram served at ``/metrics``.
+    """
+
     def __init__(self, app):
         self.app = app
+        self._route_paths: Dict = {}
+
+    def _route_template(self, scope) -> str:
+        """Path template of the matched route (e.g. /api/sbrt/dose-constraints/{site})."""
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return UNMATCHED_ROUTE
+        path = self._route_paths.get(endpoint)
+        if path is None:
+            app = scope.get("app")
+            for route in getattr(app, "routes", ()):
+                if getattr(route, "endpoint", None) is endpoint:
+                    path = route.path
+                    break
+            else:
+                path = UNMATCHED_ROUTE
+            self._route_paths[endpoint] = path
+        return path
 
     async def __call__(self, scope, receive, send):
         if scope["type"] != "http":
             await self.app(scope, receive, send)
             return
 
-        request = Request(scope, receive=receive)
-        start_time = time.time()
-        
-        async def logging_send(message):
+        start_time = time.perf_counter()
+        response_status = None
+
+        async def timed_send(message):
+            nonlocal response_status
             if message["type"] == "http.response.start":
-                status_code = message["status"]
-                if status_code >= 400:
-                    # Log error responses
-                    logger.error(f"Request failed: {request.method} {request.url.path} - Status: {status_code}")
+                response_status = message["status"]
+                process_time = time.perf_counter() - start_time
+                headers = list(message.get("headers", []))
+                headers.append((b"x-process-time", f"{process_time:.6f}".encode()))
+                message = {**message, "headers": headers}
             await send(message)
-        
+
         try:
-            await self.app(scope, receive, logging_send)
-            # Log successful request
-            process_time = time.time() - start_time
-            logger.info(f"Request processed: {request.method} {request.url.path} - Time: {process_time:.4f}s")
+            await self.app(scope, receive, timed_send)
         except SQLAlchemyError as e:
             # Database errors
-            logger.error(f"Database error: {str(e)}")
-            error_response = JSONResponse(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                content={"detail": "Database error occurred", "type": "database_error"}
-            )
-            await error_response(scope, receive, send)
+            logger.error("Database error: %s", e)
+            await self._error_response(scope, receive, timed_send, response_status,
+                                       {"detail": "Database error occurred", "type": "database_error"})
         except Exception as e:
             # Unexpected errors
-            logger.error(f"Unexpected error: {str(e)}")
+            logger.error("Unexpected error: %s", e)
             logger.error(traceback.format_exc())
-            error_response = JSONResponse(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                content={"detail": "An unexpected error occurred", "type": "server_error"}
+            await self._error_response(scope, receive, timed_send, response_status,
+                                       {"detail": "An unexpected error occurred", "type": "server_error"})
+        finally:
+            elapsed = time.perf_counter() - start_time
+            status_code = response_status or status.HTTP_500_INTERNAL_SERVER_ERROR
+            REQUEST_LATENCY.observe(
+                elapsed, method=scope["method"], route=self._route_template(scope), status=str(status_code)
             )
-            await error_response(scope, receive, send)
 
-def add_error_handling(app):
-    """Add all middleware to the app"""
-    app.middleware("http")(request_handler)
-    return app
+        if status_code >= 400:
+            logger.error("Request failed: %s %s - Status: %s", scope["method"], scope["path"], status_code)
+        else:
+            logger.info("Request processed: %s %s - Time: %.4fs", scope["method"], scope["path"], elapsed)
 
-async def request_handler(request: Request, call_next: Callable):
-    """Middleware for handling request/response cycle with error handling"""
-    start_time = time.time()
-    try:
-        response = await call_next(request)
-        process_time = time.time() - start_time
-        response.headers["X-Process-Time"] = str(process_time)
-        return response
-    except SQLAlchemyError as e:
-        logger.error(f"Database error: {str(e)}")
-        return JSONResponse(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            content={"detail": "Database error occurred", "type": "database_error"}
-        )
-    except Exception as e:
-        logger.error(f"Unexpected error: {str(e)}")
-        logger.error(traceback.format_exc())
-        return JSONResponse(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            content={"detail": "An unexpected error occurred", "type": "server_error"}
-        ) 
\ No newline at end of file
+    @staticmethod
+    async def _error_response(scope, receive, send, response_status, content) -> None:
+        """Send a JSON 500 unless the response has already started."""
+        if response_status is not None:
+            # Headers are already on the wire; nothing sensible left to send
+            return
+        error_response = JSONResponse(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, content=content)
+        await error_response(scope, receive, send)
@@ -0,0 +1,58 @@
+"""Database models.
+
+Importing this module registers the tables on :data:`app.database.Base`, so
+startup creates them.
+"""
+from datetime import datetime, timezone
+from sqlalchemy import DDL, JSON, Column, DateTime, Index, Integer, String, Text, event
+
+from app.database import Base
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class Writeup(Base):
+    """A generated write-up, kept so consults can be looked up later."""
+    __tablename__ = "writeups"
+
+    id = Column(Integer, primary_key=True)
+    module = Column(String(32), nullable=False)
+    request_json = Column(JSON, nullable=False)
+    output = Column(Text, nullable=False)
+    physician = Column(String(255), nullable=False, default="")
+    physicist = Column(String(255), nullable=False, default="")
+    created_at = Column(DateTime(timezone=True), nullable=False, default=_utcnow)
+    updated_at = Column(DateTime(timezone=True), nullable=False, default=_utcnow, onupdate=_utcnow)
+
+    # Both list views page newest-first within a module or a physician; id
+    # breaks ties between rows created in the same instant
+    __table_args__ = (
+        Index("ix_writeups_module_created", "module", "created_at", "id"),
+        Index("ix_writeups_physician_created", "physician", "created_at", "id"),
+    )
+
+
+# Full-text search over the write-up text: an FTS5 index kept in sync by
+# triggers on SQLite, a GIN index over to_tsvector on PostgreSQL
+_SQLITE_FTS = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS writeups_fts "
+    "USING fts5(output, content='writeups', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS writeups_fts_insert AFTER INSERT ON writeups BEGIN "
+    "INSERT INTO writeups_fts(rowid, output) VALUES (new.id, new.output); END",
+    "CREATE TRIGGER IF NOT EXISTS writeups_fts_delete AFTER DELETE ON writeups BEGIN "
+    "INSERT INTO writeups_fts(writeups_fts, rowid, output) VALUES ('delete', old.id, old.output); END",
+    "CREATE TRIGGER IF NOT EXISTS writeups_fts_update AFTER UPDATE OF output ON writeups BEGIN "
+    "INSERT INTO writeups_fts(writeups_fts, rowid, output) VALUES ('delete', old.id, old.output); "
+    "INSERT INTO writeups_fts(rowid, output) VALUES (new.id, new.output); END",
+)
+
+for statement in _SQLITE_FTS:
+    event.listen(Writeup.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+event.listen(Writeup.__table__, "before_drop",
+             DDL("DROP TABLE IF EXISTS writeups_fts").execute_if(dialect="sqlite"))
+event.listen(Writeup.__table__, "after_create", DDL(
+    "CREATE INDEX IF NOT EXISTS ix_writeups_output_fts ON writeups "
+    "USING gin (to_tsvector('english', output))"
+).execute_if(dialect="postgresql"))
@@ -0,0 +1,168 @@
+"""Process-wide registry of shared services.
+
+Most entries are write-up services that only hold static reference tables
+(constraint sets, device lists, fractionation schemes) once ``__init__``
+returns. A single instance per process is shared across requests instead
+of rebuilding those tables on every call, so these services must not keep
+per-request state on ``self``. The routers hand instances out through their
+``get_*_service`` dependencies, which delegate to :data:`registry`.
+
+A few entries are stateful infrastructure with a lifecycle of their own.
+Each keeps its state thread-safe:
+
+* ``writeup_cache``: a locked LRU of generated write-ups. ``clear()`` empties it.
+* ``generation_pool``: owns worker threads or processes. ``close()``, called
+  by :meth:`ServiceRegistry.close` at shutdown, stops them.
+* ``archive_writer``: owns a background flush task. The startup hook calls
+  ``start()``, and the shutdown hook must ``await stop()`` before
+  :meth:`ServiceRegistry.close` so buffered rows reach the database.
+
+:meth:`ServiceRegistry.close` calls ``close()`` on every built instance that
+has one and drops it. :meth:`ServiceRegistry.reset` drops instances without
+closing them. Either way, the next ``get`` builds a fresh instance. Tests
+swap instances with :meth:`ServiceRegistry.override`.
+"""
+from contextlib import contextmanager
+from importlib import import_module
+from typing import Any, Dict, Iterator, Optional
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Service name -> "module:ClassName". The module is only imported when the
+# service is first built.
+SERVICE_FACTORIES: Dict[str, str] = {
+    "fusion": "app.services.fusion:FusionService",
+    "dibh": "app.services.dibh:DIBHService",
+    "sbrt": "app.services.sbrt_service:SBRTService",
+    "srs": "app.services.srs_service:SRSService",
+    "pacemaker": "app.services.pacemaker_service:PacemakerService",
+    "prior_dose": "app.services.prior_dose:PriorDoseService",
+    "tbi": "app.services.tbi_service:TBIService",
+    "hdr": "app.services.hdr_service:HDRService",
+    "neurostimulator": "app.services.neurostimulator_service:NeurostimulatorService",
+    "batch": "app.services.batch_service:BatchService",
+    "writeup_cache": "app.services.writeup_cache:WriteupCache",
+    "generation_pool": "app.services.generation_pool:GenerationPool",
+    "writeup_archive": "app.services.writeup_archive:WriteupArchive",
+    "archive_writer": "app.services.archive_writer:ArchiveWriter",
+    # Built last: serializes reference data from the services above
+    "reference_data": "app.services.reference_data:ReferenceData",
+}
+
+
+def import_string(path: str) -> Any:
+    """Resolve a "module:attribute" path, importing the module if needed."""
+    module_path, attribute = path.split(":")
+    return getattr(import_module(module_path), attribute)
+
+
+class ServiceRegistry:
+    """Builds each service once and hands out the shared instance.
+
+    Instances are shared between concurrent requests. They may not keep
+    per-request state on ``self``, and any state they do keep must be
+    thread-safe (see the module docstring for the stateful services).
+    """
+
+    def __init__(self, factories: Dict[str, str]):
+        self._factories = dict(factories)
+        self._instances: Dict[str, Any] = {}
+        self._overrides: Dict[str, Any] = {}
+        self._build_ms: Dict[str, float] = {}
+        # Reentrant: a service may resolve other services while it is being built
+        self._lock = threading.RLock()
+
+    def get(self, name: str) -> Any:
+        """Return the shared instance for ``name``, building it on first use."""
+        override = self._overrides.get(name)
+        if override is not None:
+            return override
+        instance = self._instances.get(name)
+        if instance is None:
+            instance = self._build(name)
+        return instance
+
+    def build_all(self) -> Dict[str, Any]:
+        """Build every registered service and return the startup report."""
+        for name in self._factories:
+            self.get(name)
+        return self.report()
+
+    def report(self) -> Dict[str, Any]:
+        """Construction cost per service in milliseconds."""
+        services = {
+            name: {
+                "built": name in self._instances,
+                "build_ms": round(self._build_ms[name], 3) if name in self._build_ms else None,
+                "overridden": name in self._overrides,
+            }
+            for name in self._factories
+        }
+        return {
+            "services": services,
+            "total_build_ms": round(sum(self._build_ms.values()), 3),
+        }
+
+    @contextmanager
+    def override(self, name: str, instance: Any) -> Iterator[Any]:
+        """Temporarily replace a service instance (intended for tests)."""
+        if name not in self._factories:
+            raise KeyError(f"Unknown service: {name}")
+        previous = self._overrides.get(name)
+        self._overrides[name] = instance
+        try:
+            yield instance
+        finally:
+            if previous is None:
+                self._overrides.pop(name, None)
+            else:
+                self._overrides[name] = previous
+
+    def reset(self, name: Optional[str] = None) -> None:
+        """Drop built instances so they are rebuilt on next use."""
+        with self._lock:
+            if name is None:
+                self._instances.clear()
+                self._build_ms.clear()
+            else:
+                self._instances.pop(name, None)
+                self._build_ms.pop(name, None)
+
+    def close(self) -> None:
+        """Release resources held by built services and drop the instances.
+
+        Services that own resources (worker pools, open files) expose a
+        ``close()`` method; the next ``get`` builds a fresh instance.
+        """
+        with self._lock:
+            instances = list(self._instances.items())
+            self._instances.clear()
+            self._build_ms.clear()
+        for name, instance in instances:
+            close = getattr(instance, "close", None)
+            if callable(close):
+                try:
+                    close()
+                except Exception:
+                    logger.exception("Failed to close %s service", name)
+
+    def _build(self, name: str) -> Any:
+        if name not in self._factories:
+            raise KeyError(f"Unknown service: {name}")
+        with self._lock:
+            # Another thread may have built it while we waited for the lock
+            instance = self._instances.get(name)
+            if instance is not None:
+                return instance
+            start = time.perf_counter()
+            instance = import_string(self._factories[name])()
+            self._build_ms[name] = (time.perf_counter() - start) * 1000
+            self._instances[name] = instance
+            logger.debug("Built %s service in %.2f ms", name, self._build_ms[name])
+            return instance
+
+
+registry = ServiceRegistry(SERVICE_FACTORIES)
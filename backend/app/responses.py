@@ -0,0 +1,33 @@
+"""Fast JSON response class used app-wide.
+
+``FastJSONResponse`` renders with orjson when it is installed and falls back
+to compact stdlib JSON otherwise, so the app still runs without the optional
+dependency. Pydantic models passed in directly are serialized by
+pydantic-core (``model_dump_json``) straight to bytes, skipping the
+intermediate dict that FastAPI's default path builds and re-encodes.
+"""
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from typing import Any
+import json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - exercised only without orjson
+    orjson = None
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize to JSON bytes with the fastest available encoder."""
+    if isinstance(content, BaseModel):
+        return content.model_dump_json().encode("utf-8")
+    if orjson is not None:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson (or pydantic-core for models)."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,49 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from app.database import get_db
+from app.registry import registry
+from app.schemas.archive import ArchivedWriteup, ArchivePage
+from app.services.writeup_archive import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, WriteupArchive
+
+router = APIRouter()
+
+# Dependency returning the shared archive service from the process-wide registry
+def get_writeup_archive():
+    return registry.get("writeup_archive")
+
+@router.get("/", response_model=ArchivePage)
+async def list_writeups(module: Optional[str] = Query(None, description="Only write-ups from this module"),
+                        physician: Optional[str] = Query(None, description="Only write-ups for this physician"),
+                        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                        cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+                        session: AsyncSession = Depends(get_db),
+                        archive: WriteupArchive = Depends(get_writeup_archive)):
+    """List archived write-ups, newest first."""
+    try:
+        return await archive.list(session, module=module, physician=physician, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/search", response_model=ArchivePage)
+async def search_writeups(q: str = Query(..., min_length=1, description="Words the write-up text must contain"),
+                          module: Optional[str] = Query(None, description="Only write-ups from this module"),
+                          limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                          cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+                          session: AsyncSession = Depends(get_db),
+                          archive: WriteupArchive = Depends(get_writeup_archive)):
+    """Full-text search over archived write-ups, newest first."""
+    try:
+        return await archive.search(session, q, module=module, limit=limit, cursor=cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/{writeup_id}", response_model=ArchivedWriteup)
+async def get_writeup(writeup_id: int,
+                      session: AsyncSession = Depends(get_db),
+                      archive: WriteupArchive = Depends(get_writeup_archive)):
+    """Get one archived write-up with the request that produced it."""
+    row = await archive.get(session, writeup_id)
+    if row is None:
+        raise HTTPException(status_code=404, detail=f"Write-up {writeup_id} not found")
+    return row
@@ -0,0 +1,51 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+from app.schemas.batch import BatchRequest, BatchResponse
+from app.services.batch_service import BatchService, BATCH_MODULES
+from app.registry import registry
+from app.responses import FastJSONResponse
+
+router = APIRouter()
+
+# Dependency returning the shared batch service from the process-wide registry
+def get_batch_service():
+    return registry.get("batch")
+
+@router.get("/")
+async def get_batch_info():
+    """Get information about the batch module."""
+    return {
+        "name": "Batch Module",
+        "description": "Generate write-ups for several modules in one request",
+        "modules": sorted(BATCH_MODULES),
+        "endpoints": [
+            "/api/batch/generate",
+            "/api/batch/stream"
+        ]
+    }
+
+@router.post("/generate", response_model=BatchResponse)
+async def generate_batch(request: BatchRequest,
+                         batch_service: BatchService = Depends(get_batch_service)):
+    """Generate a batch of write-ups.
+
+    Items are validated up front and generated concurrently. Each item gets
+    its own result; an invalid or failing item does not abort the batch.
+    """
+    # Batch results can be large; serialize the model straight to bytes
+    # instead of re-validating it against the response model
+    return FastJSONResponse(await batch_service.generate_batch(request.items))
+
+@router.post("/stream")
+async def stream_batch(request: BatchRequest,
+                       batch_service: BatchService = Depends(get_batch_service)):
+    """Generate a batch of write-ups, streaming results as NDJSON.
+
+    Each line is one BatchItemResult, written as soon as that item finishes,
+    so clients can render or persist results without buffering the batch.
+    """
+    async def records():
+        async for result in batch_service.stream_batch(request.items):
+            yield result.model_dump_json() + "\n"
+
+    return StreamingResponse(records(), media_type="application/x-ndjson")
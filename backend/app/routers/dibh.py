@@ -1,12 +1,16 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
 from app.schemas.dibh import DIBHRequest, DIBHResponse
 from app.services.dibh import DIBHService
+from app.registry import registry
+from app.services.reference_data import ReferenceData
+from app.http_cache import cached_writeup, get_writeup_cache, get_reference_data, reference_response
+from app.services.writeup_cache import WriteupCache
 
 router = APIRouter()
 
-# Create a simple dependency to get the DIBH service
+# Dependency returning the shared DIBH service from the process-wide registry
 def get_dibh_service():
-    return DIBHService()
+    return registry.get("dibh")
 
 @router.get("/")
 async def get_dibh_info():
@@ -24,24 +28,27 @@ async def get_dibh_info():
 
 @router.post("/generate", response_model=DIBHResponse)
 async def generate_dibh_writeup(request: DIBHRequest, 
-                                dibh_service: DIBHService = Depends(get_dibh_service)):
+                                http_request: Request,
+                                response: Response,
+                                dibh_service: DIBHService = Depends(get_dibh_service),
+                                cache: WriteupCache = Depends(get_writeup_cache)):
     """Generate a DIBH write-up based on the provided data."""
     try:
-        return dibh_service.generate_dibh_writeup(request)
+        return await cached_writeup("dibh", request, http_request, response, dibh_service.generate_dibh_writeup, cache)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/treatment-sites")
-async def get_treatment_sites(dibh_service: DIBHService = Depends(get_dibh_service)):
+async def get_treatment_sites(http_request: Request, reference: ReferenceData = Depends(get_reference_data)):
     """Get available treatment sites for DIBH."""
-    return dibh_service.treatment_sites
+    return reference_response(http_request, reference.get("dibh/treatment-sites"))
 
 @router.get("/immobilization-devices")
-async def get_immobilization_devices(dibh_service: DIBHService = Depends(get_dibh_service)):
+async def get_immobilization_devices(http_request: Request, reference: ReferenceData = Depends(get_reference_data)):
     """Get available immobilization devices."""
-    return dibh_service.immobilization_devices
+    return reference_response(http_request, reference.get("dibh/immobilization-devices"))
 
 @router.get("/fractionation-schemes")
-async def get_fractionation_schemes(dibh_service: DIBHService = Depends(get_dibh_service)):
+async def get_fractionation_schemes(http_request: Request, reference: ReferenceData = Depends(get_reference_data)):
     """Get default fractionation schemes by treatment site."""
-    return dibh_service.fractionation_schemes 
\ No newline at end of file
+    return reference_response(http_request, reference.get("dibh/fractionation-schemes"))
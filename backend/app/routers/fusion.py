@@ -1,12 +1,16 @@
-from fastapi import APIRouter, HTTPException, Depends, Response
+from fastapi import APIRouter, HTTPException, Depends, Response, Request
 from app.schemas.fusion import FusionRequest, FusionResponse, Registration
 from app.services.fusion import FusionService
+from app.registry import registry
+from app.services.reference_data import ReferenceData
+from app.http_cache import cached_writeup, get_writeup_cache, get_reference_data, reference_response
+from app.services.writeup_cache import WriteupCache
 
 router = APIRouter()
 
-# Create a simple dependency to get the fusion service
+# Dependency returning the shared fusion service from the process-wide registry
 def get_fusion_service():
-    return FusionService()
+    return registry.get("fusion")
 
 @router.get("/")
 async def get_fusion_info():
@@ -25,15 +29,16 @@ async def get_fusion_info():
 @router.post("/generate", response_model=FusionResponse)
 async def generate_fusion_writeup(request: FusionRequest, 
                                  response: Response,
-                                 fusion_service: FusionService = Depends(get_fusion_service)):
+                                 http_request: Request,
+                                 fusion_service: FusionService = Depends(get_fusion_service),
+                                 cache: WriteupCache = Depends(get_writeup_cache)):
     """Generate a fusion write-up based on the provided data."""
     try:
         # Add no-cache headers to prevent frontend caching issues
-        response.headers["Cache-Control"] = "no-cache, no-store, must-revalidate"
         response.headers["Pragma"] = "no-cache"
         response.headers["Expires"] = "0"
         
-        return fusion_service.generate_fusion_writeup(request)
+        return await cached_writeup("fusion", request, http_request, response, fusion_service.generate_fusion_writeup, cache)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -43,11 +48,11 @@ async def get_lesion_regions(fusion_service: FusionService = Depends(get_fusion_
     return fusion_service.lesion_to_region
 
 @router.get("/modalities")
-async def get_modalities():
+async def get_modalities(http_request: Request, reference: ReferenceData = Depends(get_reference_data)):
     """Get the available modalities for registrations."""
-    return ["MRI", "PET/CT", "CT", "CBCT"]
+    return reference_response(http_request, reference.get("fusion/modalities"))
 
 @router.get("/registration-methods")
-async def get_registration_methods():
+async def get_registration_methods(http_request: Request, reference: ReferenceData = Depends(get_reference_data)):
     """Get the available registration methods."""
-    return ["Rigid", "Deformable"] 
\ No newline at end of file
+    return reference_response(http_request, reference.get("fusion/registration-methods"))
@@ -1,36 +1,48 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from typing import List, Dict, Any
 
 from app.schemas.hdr_schemas import HDRGenerateRequest, HDRGenerateResponse
 from app.services.hdr_service import HDRService
+from app.registry import registry
+from app.services.reference_data import ReferenceData
+from app.http_cache import cached_writeup, get_writeup_cache, get_reference_data, reference_response
+from app.services.writeup_cache import WriteupCache
 
 router = APIRouter()
 
-# Dependency to get HDR service
+# Dependency returning the shared HDR service from the process-wide registry
 def get_hdr_service():
-    return HDRService()
+    return registry.get("hdr")
 
 @router.get("/applicators", response_model=List[str])
-async def get_applicators(hdr_service: HDRService = Depends(get_hdr_service)):
+async def get_applicators(http_request: Request, reference: ReferenceData = Depends(get_reference_data)):
     """Get available HDR applicator types."""
-    return hdr_service.get_applicators()
+    return reference_response(http_request, reference.get("hdr/applicators"))
 
 @router.get("/applicator-info/{applicator_type}", response_model=Dict[str, Any])
 async def get_applicator_info(
     applicator_type: str,
+    http_request: Request,
+    reference: ReferenceData = Depends(get_reference_data),
     hdr_service: HDRService = Depends(get_hdr_service)
 ):
     """Get default information for a specific applicator type."""
+    payload = reference.get(f"hdr/applicator-info/{applicator_type}")
+    if payload is not None:
+        return reference_response(http_request, payload)
     return hdr_service.get_applicator_info(applicator_type)
 
 @router.post("/generate", response_model=HDRGenerateResponse)
 async def generate_hdr_writeup(
     request: HDRGenerateRequest,
-    hdr_service: HDRService = Depends(get_hdr_service)
+    http_request: Request,
+    response: Response,
+    hdr_service: HDRService = Depends(get_hdr_service),
+    cache: WriteupCache = Depends(get_writeup_cache)
 ):
     """Generate an HDR brachytherapy write-up based on the provided data."""
     try:
-        return hdr_service.generate_hdr_writeup(request)
+        return await cached_writeup("hdr", request, http_request, response, hdr_service.generate_hdr_writeup, cache)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from typing import List, Dict, Any
 
 from app.schemas.neurostimulator_schemas import (
@@ -7,32 +7,36 @@ from app.schemas.neurostimulator_schemas import (
     NeurostimulatorDeviceInfo, NeurostimulatorTreatmentSiteInfo
 )
 from app.services.neurostimulator_service import NeurostimulatorService
+from app.registry import registry
+from app.services.reference_data import ReferenceData
+from app.http_cache import cached_writeup, get_writeup_cache, get_reference_data, reference_response
+from app.services.writeup_cache import WriteupCache
 
 router = APIRouter()
 
-# Dependency to get neurostimulator service
+# Dependency returning the shared neurostimulator service from the process-wide registry
 def get_neurostimulator_service():
-    return NeurostimulatorService()
+    return registry.get("neurostimulator")
 
 @router.get("/treatment-sites", response_model=List[str])
-async def get_neurostimulator_treatment_sites(service: NeurostimulatorService = Depends(get_neurostimulator_service)):
+async def get_neurostimulator_treatment_sites(http_request: Request, reference: ReferenceData = Depends(get_reference_data)):
     """Get available treatment sites for neurostimulator cases."""
-    return service.get_treatment_sites()
+    return reference_response(http_request, reference.get("neurostimulator/treatment-sites"))
 
 @router.get("/device-types", response_model=List[str])
-async def get_device_types(service: NeurostimulatorService = Depends(get_neurostimulator_service)):
+async def get_device_types(http_request: Request, reference: ReferenceData = Depends(get_reference_data)):
     """Get available neurostimulator device types."""
-    return service.get_device_types()
+    return reference_response(http_request, reference.get("neurostimulator/device-types"))
 
 @router.get("/device-info", response_model=NeurostimulatorDeviceInfo)
-async def get_device_info(service: NeurostimulatorService = Depends(get_neurostimulator_service)):
+async def get_device_info(http_request: Request, reference: ReferenceData = Depends(get_reference_data)):
     """Get device vendor and model information."""
-    return service.get_device_info()
+    return reference_response(http_request, reference.get("neurostimulator/device-info"))
 
 @router.get("/treatment-site-info", response_model=NeurostimulatorTreatmentSiteInfo)
-async def get_treatment_site_info(service: NeurostimulatorService = Depends(get_neurostimulator_service)):
+async def get_treatment_site_info(http_request: Request, reference: ReferenceData = Depends(get_reference_data)):
     """Get treatment site and distance option information."""
-    return service.get_treatment_site_info()
+    return reference_response(http_request, reference.get("neurostimulator/treatment-site-info"))
 
 @router.post("/risk-assessment", response_model=NeurostimulatorRiskAssessmentResponse)
 async def calculate_risk_assessment(
@@ -50,11 +54,14 @@ async def calculate_risk_assessment(
 @router.post("/generate", response_model=NeurostimulatorGenerateResponse)
 async def generate_neurostimulator_writeup(
     request: NeurostimulatorGenerateRequest,
-    service: NeurostimulatorService = Depends(get_neurostimulator_service)
+    http_request: Request,
+    response: Response,
+    service: NeurostimulatorService = Depends(get_neurostimulator_service),
+    cache: WriteupCache = Depends(get_writeup_cache)
 ):
     """Generate a neurostimulator write-up based on the provided data."""
     try:
-        return service.generate_neurostimulator_writeup(request)
+        return await cached_writeup("neurostimulator", request, http_request, response, service.generate_neurostimulator_writeup, cache)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
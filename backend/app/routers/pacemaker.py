@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from typing import List, Dict, Any
 
 from app.schemas.pacemaker_schemas import (
@@ -7,27 +7,31 @@ from app.schemas.pacemaker_schemas import (
     DeviceInfo, TreatmentSiteInfo
 )
 from app.services.pacemaker_service import PacemakerService
+from app.registry import registry
+from app.services.reference_data import ReferenceData
+from app.services.writeup_cache import WriteupCache
+from app.http_cache import cached_writeup, get_reference_data, get_writeup_cache, reference_response
 
 router = APIRouter()
 
-# Dependency to get pacemaker service
+# Dependency returning the shared pacemaker service from the process-wide registry
 def get_pacemaker_service():
-    return PacemakerService()
+    return registry.get("pacemaker")
 
 @router.get("/treatment-sites", response_model=List[str])
-async def get_pacemaker_treatment_sites(pacemaker_service: PacemakerService = Depends(get_pacemaker_service)):
+async def get_pacemaker_treatment_sites(http_request: Request, reference: ReferenceData = Depends(get_reference_data)):
     """Get available treatment sites for pacemaker cases."""
-    return pacemaker_service.get_treatment_sites()
+    return reference_response(http_request, reference.get("pacemaker/treatment-sites"))
 
 @router.get("/device-info", response_model=DeviceInfo)
-async def get_device_info(pacemaker_service: PacemakerService = Depends(get_pacemaker_service)):
+async def get_device_info(http_request: Request, reference: ReferenceData = Depends(get_reference_data)):
     """Get device vendor and model information."""
-    return pacemaker_service.get_device_info()
+    return reference_response(http_request, reference.get("pacemaker/device-info"))
 
 @router.get("/treatment-site-info", response_model=TreatmentSiteInfo)
-async def get_treatment_site_info(pacemaker_service: PacemakerService = Depends(get_pacemaker_service)):
+async def get_treatment_site_info(http_request: Request, reference: ReferenceData = Depends(get_reference_data)):
     """Get treatment site and distance option information."""
-    return pacemaker_service.get_treatment_site_info()
+    return reference_response(http_request, reference.get("pacemaker/treatment-site-info"))
 
 @router.post("/risk-assessment", response_model=PacemakerRiskAssessmentResponse)
 async def calculate_risk_assessment(
@@ -45,12 +49,20 @@ async def calculate_risk_assessment(
 @router.post("/generate", response_model=PacemakerGenerateResponse)
 async def generate_pacemaker_writeup(
     request: PacemakerGenerateRequest,
-    pacemaker_service: PacemakerService = Depends(get_pacemaker_service)
+    response: Response,
+    http_request: Request,
+    pacemaker_service: PacemakerService = Depends(get_pacemaker_service),
+    cache: WriteupCache = Depends(get_writeup_cache)
 ):
-    """Generate a pacemaker write-up based on the provided data."""
+    """Generate a pacemaker write-up based on the provided data.
+
+    Goes through the generation pool and the archive like every other module;
+    pacemaker write-ups are never served from the cache (UNCACHED_MODULES).
+    """
     try:
-        return pacemaker_service.generate_pacemaker_writeup(request)
+        return await cached_writeup("pacemaker", request, http_request, response,
+                                    pacemaker_service.generate_pacemaker_writeup, cache)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
@@ -1,12 +1,23 @@
-from fastapi import APIRouter, HTTPException, Depends, Response
-from app.schemas.prior_dose import PriorDoseRequest, PriorDoseResponse, PriorTreatment
-from app.services.prior_dose import PriorDoseService
+from fastapi import APIRouter, HTTPException, Depends, Response, Request
+from app.schemas.prior_dose import (
+    PriorDoseRequest, PriorDoseResponse, PriorTreatment, EffectivePriorDoseRequest, EffectivePriorDoseResponse,
+    StructureEffectiveDose, PriorContributionResult, RecoveryModelSpec, DoseConversionRequest, DoseConversionResponse,
+    DoseBudgetRequest, DoseBudgetResponse, FractionationRegimesRequest, FractionationRegimesResponse,
+)
+from app.services.reirradiation import RecoveryModel
+from app.services.prior_dose import PriorDoseService, REGIME_INFO
+from app.registry import registry
+from app.services.reference_data import ReferenceData
+from app.http_cache import cached_writeup, get_writeup_cache, get_reference_data, reference_response
+from app.services.writeup_cache import WriteupCache
+from app.responses import FastJSONResponse
+import numpy as np
 
 router = APIRouter()
 
-# Create a simple dependency to get the prior dose service
+# Dependency returning the shared prior dose service from the process-wide registry
 def get_prior_dose_service():
-    return PriorDoseService()
+    return registry.get("prior_dose")
 
 @router.get("/")
 async def get_prior_dose_info():
@@ -17,34 +28,40 @@ async def get_prior_dose_info():
         "endpoints": [
             "/api/prior-dose/generate",
             "/api/prior-dose/treatment-sites",
-            "/api/prior-dose/dose-calc-methods"
+            "/api/prior-dose/dose-calc-methods",
+            "/api/prior-dose/effective-prior-dose",
+            "/api/prior-dose/eqd2",
+            "/api/prior-dose/dose-budget",
+            "/api/prior-dose/fractionation-regimes",
+            "/api/prior-dose/fractionation-regime-table"
         ]
     }
 
 @router.post("/generate", response_model=PriorDoseResponse)
 async def generate_prior_dose_writeup(request: PriorDoseRequest, 
                                      response: Response,
-                                     prior_dose_service: PriorDoseService = Depends(get_prior_dose_service)):
+                                     http_request: Request,
+                                     prior_dose_service: PriorDoseService = Depends(get_prior_dose_service),
+                                     cache: WriteupCache = Depends(get_writeup_cache)):
     """Generate a prior dose write-up based on the provided data."""
     try:
         # Add no-cache headers to prevent frontend caching issues
-        response.headers["Cache-Control"] = "no-cache, no-store, must-revalidate"
         response.headers["Pragma"] = "no-cache"
         response.headers["Expires"] = "0"
         
-        return prior_dose_service.generate_prior_dose_writeup(request)
+        return await cached_writeup("prior_dose", request, http_request, response, prior_dose_service.generate_prior_dose_writeup, cache)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.get("/treatment-sites")
-async def get_treatment_sites(prior_dose_service: PriorDoseService = Depends(get_prior_dose_service)):
+async def get_treatment_sites(http_request: Request, reference: ReferenceData = Depends(get_reference_data)):
     """Get the available treatment sites."""
-    return prior_dose_service.treatment_sites
+    return reference_response(http_request, reference.get("prior-dose/treatment-sites"))
 
 @router.get("/dose-calc-methods")
-async def get_dose_calc_methods():
+async def get_dose_calc_methods(http_request: Request, reference: ReferenceData = Depends(get_reference_data)):
     """Get the available dose calculation methods."""
-    return ["Raw Dose", "EQD2 (Equivalent Dose in 2 Gy fractions)"]
+    return reference_response(http_request, reference.get("prior-dose/dose-calc-methods"))
 
 @router.get("/suggested-constraints")
 async def get_suggested_constraints(
@@ -105,47 +122,168 @@ async def get_fractionation_regime(
     """
     regime = prior_dose_service.detect_fractionation_regime(dose, fractions)
     
-    regime_info = {
-        "SRS": {
-            "name": "SRS (Single Fraction)",
-            "description": "Single-fraction stereotactic radiosurgery",
-            "constraint_source": "TG-101/HyTEC SRS limits"
-        },
-        "SBRT_3fx": {
-            "name": "SBRT (3 fractions)",
-            "description": "Stereotactic body radiation therapy, 3-fraction regimen",
-            "constraint_source": "Timmerman/TG-101 3fx limits"
-        },
-        "SBRT_5fx": {
-            "name": "SBRT (5 fractions)",
-            "description": "Stereotactic body radiation therapy, 5-fraction regimen",
-            "constraint_source": "Timmerman/TG-101 5fx limits"
-        },
-        "MODERATE_HYPOFX": {
-            "name": "Moderate Hypofractionation",
-            "description": "Moderately hypofractionated treatment (2.5-5 Gy/fraction)",
-            "constraint_source": "QUANTEC limits"
-        },
-        "CONVENTIONAL": {
-            "name": "Conventional Fractionation",
-            "description": "Standard fractionation (<2.5 Gy/fraction)",
-            "constraint_source": "QUANTEC limits"
-        }
-    }
-    
     return {
         "regime": regime,
         "dose_per_fraction": dose / fractions if fractions > 0 else 0,
-        **regime_info.get(regime, regime_info["CONVENTIONAL"])
+        **REGIME_INFO.get(regime, REGIME_INFO["CONVENTIONAL"])
     }
 
-@router.get("/alpha-beta")
-async def get_alpha_beta_ratios(
+@router.post("/fractionation-regimes", response_model=FractionationRegimesResponse)
+async def get_fractionation_regimes(
+    request: FractionationRegimesRequest,
     prior_dose_service: PriorDoseService = Depends(get_prior_dose_service)
 ):
+    """Detect the fractionation regime of many (dose, fractions) pairs at once.
+    
+    Columns are parallel arrays; a column of length 1 applies to every row.
+    """
+    try:
+        regimes = prior_dose_service.detect_fractionation_regimes(
+            np.asarray(request.doses), np.asarray(request.fractions)
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="doses and fractions must have the same length (or length 1)")
+    return FastJSONResponse({"regimes": regimes.tolist()})
+
+@router.get("/fractionation-regime-table")
+async def get_fractionation_regime_table(http_request: Request, reference: ReferenceData = Depends(get_reference_data)):
+    """Precomputed regime of every (fractions, total dose) pair for client-side lookup.
+    
+    Covers 1-40 fractions and 0-100 Gy in 0.1 Gy steps:
+    ``regimes[table[fractions - 1][round(dose / dose_step)]]``. Served with
+    an ETag, so clients download it once and revalidate for free. Too large
+    for the /api/reference/all bundle, so it is only served here.
+    """
+    return reference_response(http_request, reference.get("prior-dose/fractionation-regime-table"))
+
+@router.get("/alpha-beta")
+async def get_alpha_beta_ratios(http_request: Request, reference: ReferenceData = Depends(get_reference_data)):
     """Get the α/β ratio reference values for all structures.
     
     Returns:
         Dictionary of structure names to α/β ratios in Gy
     """
-    return prior_dose_service.alpha_beta_ratios
\ No newline at end of file
+    return reference_response(http_request, reference.get("prior-dose/alpha-beta"))
+
+@router.post("/eqd2", response_model=DoseConversionResponse)
+async def convert_doses(
+    request: DoseConversionRequest,
+    prior_dose_service: PriorDoseService = Depends(get_prior_dose_service)
+):
+    """Convert arrays of (dose, fractions, structure or α/β) to EQD2 and BED.
+    
+    Columns are parallel arrays; a column of length 1 applies to every row
+    (e.g. one structure for many doses). Rows without an α/β use the
+    structure's value from /alpha-beta. With target_fractions, each row's
+    isoeffective physical dose in that many fractions is returned too,
+    e.g. to restate an EQD2 limit for a hypofractionated course.
+    
+    Returns:
+        Parallel arrays of α/β, EQD2, BED (and equivalent dose), rounded to 0.0001 Gy
+    """
+    try:
+        result = prior_dose_service.convert_doses(
+            request.doses,
+            request.fractions,
+            structures=request.structures,
+            alpha_betas=request.alpha_betas,
+            target_fractions=request.target_fractions,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    # Up to 10^5 rows per column; skip response-model validation and encode the lists directly
+    return FastJSONResponse({name: np.round(values, 4).tolist() for name, values in result.items()})
+
+@router.post("/effective-prior-dose", response_model=EffectivePriorDoseResponse)
+async def get_effective_prior_dose(
+    request: EffectivePriorDoseRequest,
+    prior_dose_service: PriorDoseService = Depends(get_prior_dose_service)
+):
+    """Sum prior treatments per structure with time-decayed tissue recovery.
+    
+    Each prior course is converted to EQD2 with the structure's α/β and
+    discounted by the fraction recovered between that course and the current
+    one. Structures without a recovery model (by default everything except
+    spinal cord and brainstem) keep their prior dose fully additive.
+    
+    Returns:
+        Nominal and effective prior EQD2 per structure, with each prior's contribution
+    """
+    try:
+        models = None
+        if request.recovery_models is not None:
+            models = {
+                name: RecoveryModel(spec.onset_months, spec.full_months, spec.max_recovery)
+                for name, spec in request.recovery_models.items()
+            }
+        results, unquantified = prior_dose_service.effective_prior_eqd2(
+            request.prior_treatments,
+            request.structures,
+            request.current_month,
+            request.current_year,
+            recovery_models=models,
+            overlapping_only=request.overlapping_only,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return EffectivePriorDoseResponse(
+        structures=[
+            StructureEffectiveDose(
+                structure=result.structure,
+                alpha_beta=result.alpha_beta,
+                recovery_model=RecoveryModelSpec(
+                    onset_months=result.model.onset_months,
+                    full_months=result.model.full_months,
+                    max_recovery=result.model.max_recovery,
+                ),
+                nominal_eqd2=round(result.nominal_eqd2, 2),
+                effective_eqd2=round(result.effective_eqd2, 2),
+                priors=[
+                    PriorContributionResult(
+                        prior_index=prior.index,
+                        interval_months=prior.interval_months,
+                        nominal_eqd2=round(prior.nominal_eqd2, 2),
+                        recovered_fraction=round(prior.recovered_fraction, 4),
+                        effective_eqd2=round(prior.effective_eqd2, 2),
+                    )
+                    for prior in result.priors
+                ],
+            )
+            for result in results
+        ],
+        unquantified_priors=unquantified,
+    )
+
+@router.post("/dose-budget", response_model=DoseBudgetResponse)
+async def get_dose_budget(
+    request: DoseBudgetRequest,
+    prior_dose_service: PriorDoseService = Depends(get_prior_dose_service)
+):
+    """Remaining dose budget per OAR for each candidate fractionation.
+    
+    Each QUANTEC (EQD2) dose limit for the current sites, minus the prior
+    EQD2 the structure has already received (prescription dose of every
+    prior course, a worst case), is converted back to the maximum physical
+    dose for each fraction option.
+    
+    Returns:
+        A (constraints × fraction options) matrix of maximum total dose and dose per fraction
+    """
+    try:
+        budget = prior_dose_service.remaining_dose_budget(
+            request.sites,
+            request.prior_treatments,
+            request.current_month,
+            request.current_year,
+            request.fraction_options,
+            apply_recovery=request.apply_recovery,
+            overlapping_only=request.overlapping_only,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    for row in budget["budgets"]:
+        for key in ("limit_eqd2", "prior_eqd2", "remaining_eqd2"):
+            row[key] = round(row[key], 2)
+        row["max_total_dose"] = [round(dose, 2) for dose in row["max_total_dose"]]
+        row["max_dose_per_fraction"] = [round(dose, 2) for dose in row["max_dose_per_fraction"]]
+    return budget
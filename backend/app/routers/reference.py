@@ -0,0 +1,33 @@
+from fastapi import APIRouter, Depends, HTTPException, Request
+from app.http_cache import get_reference_data, reference_response
+from app.services.reference_data import ReferenceData
+
+router = APIRouter()
+
+@router.get("/")
+async def get_reference_info(reference: ReferenceData = Depends(get_reference_data)):
+    """List the precomputed reference payloads."""
+    return {
+        "name": "Reference Data",
+        "description": "Static option lists and reference tables for every module, precomputed at startup",
+        "payloads": reference.names(),
+        "standalone_payloads": reference.standalone_names(),
+        "endpoints": [
+            "/api/reference/all",
+            "/api/reference/{name}"
+        ]
+    }
+
+@router.get("/all")
+async def get_all_reference_data(http_request: Request, reference: ReferenceData = Depends(get_reference_data)):
+    """Every reference payload in one response, keyed by name (e.g. "prior-dose/alpha-beta")."""
+    return reference_response(http_request, reference.bundle)
+
+@router.get("/{name:path}")
+async def get_reference_payload(name: str, http_request: Request,
+                                reference: ReferenceData = Depends(get_reference_data)):
+    """A single reference payload by name."""
+    payload = reference.get(name)
+    if payload is None:
+        raise HTTPException(status_code=404, detail=f"Unknown reference data: {name}")
+    return reference_response(http_request, payload)
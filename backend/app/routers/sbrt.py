@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, Path
+from fastapi import APIRouter, Depends, HTTPException, Path, Request, Response
 from typing import List, Dict, Any
 
 from app.schemas.sbrt_schemas import (
@@ -6,24 +6,33 @@ from app.schemas.sbrt_schemas import (
     SBRTValidateRequest, SBRTValidateResponse
 )
 from app.services.sbrt_service import SBRTService
+from app.registry import registry
+from app.services.reference_data import ReferenceData
+from app.http_cache import cached_writeup, get_writeup_cache, get_reference_data, reference_response
+from app.services.writeup_cache import WriteupCache
 
 router = APIRouter()
 
-# Dependency to get SBRT service
+# Dependency returning the shared SBRT service from the process-wide registry
 def get_sbrt_service():
-    return SBRTService()
+    return registry.get("sbrt")
 
 @router.get("/treatment-sites", response_model=List[str])
-async def get_sbrt_treatment_sites(sbrt_service: SBRTService = Depends(get_sbrt_service)):
+async def get_sbrt_treatment_sites(http_request: Request, reference: ReferenceData = Depends(get_reference_data)):
     """Get available treatment sites for SBRT."""
-    return sbrt_service.get_treatment_sites()
+    return reference_response(http_request, reference.get("sbrt/treatment-sites"))
 
 @router.get("/dose-constraints/{site}", response_model=Dict[str, Any])
 async def get_sbrt_dose_constraints(
+    http_request: Request,
     site: str = Path(..., title="Treatment Site", description="The specific treatment site, e.g., Spine"),
+    reference: ReferenceData = Depends(get_reference_data),
     sbrt_service: SBRTService = Depends(get_sbrt_service)
 ):
     """Get dose constraints for a specific SBRT treatment site."""
+    payload = reference.get(f"sbrt/dose-constraints/{site.lower()}")
+    if payload is not None:
+        return reference_response(http_request, payload)
     constraints = sbrt_service.get_dose_constraints(site)
     if "error" in constraints:
         raise HTTPException(status_code=404, detail=constraints["error"])
@@ -31,10 +40,15 @@ async def get_sbrt_dose_constraints(
 
 @router.get("/fractionation-schemes/{site}", response_model=List[Dict[str, Any]])
 async def get_sbrt_fractionation_schemes(
+    http_request: Request,
     site: str = Path(..., title="Treatment Site", description="The specific treatment site, e.g., Lung"),
+    reference: ReferenceData = Depends(get_reference_data),
     sbrt_service: SBRTService = Depends(get_sbrt_service)
 ):
     """Get available fractionation schemes for a specific SBRT treatment site."""
+    payload = reference.get(f"sbrt/fractionation-schemes/{site}")
+    if payload is not None:
+        return reference_response(http_request, payload)
     schemes = sbrt_service.get_fractionation_schemes(site)
     if schemes and isinstance(schemes[0], dict) and "error" in schemes[0]:
         raise HTTPException(status_code=404, detail=schemes[0]["error"])
@@ -43,11 +57,14 @@ async def get_sbrt_fractionation_schemes(
 @router.post("/generate", response_model=SBRTGenerateResponse)
 async def generate_sbrt_writeup(
     request: SBRTGenerateRequest,
-    sbrt_service: SBRTService = Depends(get_sbrt_service)
+    http_request: Request,
+    response: Response,
+    sbrt_service: SBRTService = Depends(get_sbrt_service),
+    cache: WriteupCache = Depends(get_writeup_cache)
 ):
     """Generate an SBRT write-up based on the provided data."""
     try:
-        return sbrt_service.generate_sbrt_writeup(request)
+        return await cached_writeup("sbrt", request, http_request, response, sbrt_service.generate_sbrt_writeup, cache)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e: # Catch other potential errors from service
@@ -1,31 +1,38 @@
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from typing import List
 import logging
 
 from app.schemas.srs_schemas import SRSGenerateRequest, SRSGenerateResponse
 from app.services.srs_service import SRSService
+from app.registry import registry
+from app.services.reference_data import ReferenceData
+from app.http_cache import cached_writeup, get_writeup_cache, get_reference_data, reference_response
+from app.services.writeup_cache import WriteupCache
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
-# Dependency to get SRS service
+# Dependency returning the shared SRS service from the process-wide registry
 def get_srs_service():
-    return SRSService()
+    return registry.get("srs")
 
 @router.get("/brain-regions", response_model=List[str])
-async def get_brain_regions(srs_service: SRSService = Depends(get_srs_service)):
+async def get_brain_regions(http_request: Request, reference: ReferenceData = Depends(get_reference_data)):
     """Get available brain regions for SRS/SRT."""
-    return srs_service.get_brain_regions()
+    return reference_response(http_request, reference.get("srs/brain-regions"))
 
 @router.post("/generate", response_model=SRSGenerateResponse)
 async def generate_srs_writeup(
     request: SRSGenerateRequest,
-    srs_service: SRSService = Depends(get_srs_service)
+    http_request: Request,
+    response: Response,
+    srs_service: SRSService = Depends(get_srs_service),
+    cache: WriteupCache = Depends(get_writeup_cache)
 ):
     """Generate an SRS/SRT write-up based on the provided data."""
     try:
         logger.info(f"Received SRS request with {len(request.srs_data.lesions)} lesions")
-        return srs_service.generate_srs_writeup(request)
+        return await cached_writeup("srs", request, http_request, response, srs_service.generate_srs_writeup, cache)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -1,33 +1,40 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from typing import List, Dict
 
 from app.schemas.tbi_schemas import TBIGenerateRequest, TBIGenerateResponse
 from app.services.tbi_service import TBIService
+from app.registry import registry
+from app.services.reference_data import ReferenceData
+from app.http_cache import cached_writeup, get_writeup_cache, get_reference_data, reference_response
+from app.services.writeup_cache import WriteupCache
 
 router = APIRouter()
 
-# Dependency to get TBI service
+# Dependency returning the shared TBI service from the process-wide registry
 def get_tbi_service():
-    return TBIService()
+    return registry.get("tbi")
 
 @router.get("/fractionation-schemes", response_model=List[Dict])
-async def get_fractionation_schemes(tbi_service: TBIService = Depends(get_tbi_service)):
+async def get_fractionation_schemes(http_request: Request, reference: ReferenceData = Depends(get_reference_data)):
     """Get available TBI fractionation schemes."""
-    return tbi_service.get_fractionation_schemes()
+    return reference_response(http_request, reference.get("tbi/fractionation-schemes"))
 
 @router.get("/setup-options", response_model=List[str])
-async def get_setup_options(tbi_service: TBIService = Depends(get_tbi_service)):
+async def get_setup_options(http_request: Request, reference: ReferenceData = Depends(get_reference_data)):
     """Get available setup options."""
-    return tbi_service.get_setup_options()
+    return reference_response(http_request, reference.get("tbi/setup-options"))
 
 @router.post("/generate", response_model=TBIGenerateResponse)
 async def generate_tbi_writeup(
     request: TBIGenerateRequest,
-    tbi_service: TBIService = Depends(get_tbi_service)
+    http_request: Request,
+    response: Response,
+    tbi_service: TBIService = Depends(get_tbi_service),
+    cache: WriteupCache = Depends(get_writeup_cache)
 ):
     """Generate a TBI write-up based on the provided data."""
     try:
-        return tbi_service.generate_tbi_writeup(request)
+        return await cached_writeup("tbi", request, http_request, response, tbi_service.generate_tbi_writeup, cache)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
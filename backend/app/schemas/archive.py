@@ -0,0 +1,24 @@
+from datetime import datetime
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Any, Dict, List, Optional
+
+class ArchivedWriteupSummary(BaseModel):
+    """Schema for an archived write-up in a list."""
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int = Field(..., description="Archive identifier")
+    module: str = Field(..., description="Module that generated the write-up")
+    physician: str = Field(..., description="Physician named in the request")
+    physicist: str = Field(..., description="Physicist named in the request")
+    output: str = Field(..., description="Generated write-up text")
+    created_at: datetime = Field(..., description="When the write-up was generated")
+
+class ArchivedWriteup(ArchivedWriteupSummary):
+    """Schema for an archived write-up including the request that produced it."""
+    request_json: Dict[str, Any] = Field(..., description="Request body the write-up was generated from")
+    updated_at: datetime = Field(..., description="When the record last changed")
+
+class ArchivePage(BaseModel):
+    """Schema for one keyset-paginated page of archived write-ups."""
+    items: List[ArchivedWriteupSummary] = Field(..., description="Write-ups, newest first")
+    next_cursor: Optional[str] = Field(None, description="Cursor for the next page; absent on the last page")
@@ -0,0 +1,27 @@
+from pydantic import BaseModel, Field
+from typing import List, Dict, Any, Optional
+
+class BatchItem(BaseModel):
+    """Schema for one module-tagged write-up request in a batch."""
+    module: str = Field(..., description="Module name (fusion, dibh, sbrt, srs, pacemaker, prior_dose, tbi, hdr, neurostimulator)")
+    id: Optional[str] = Field(None, description="Client-supplied identifier echoed back in the result")
+    request: Dict[str, Any] = Field(..., description="Request body for the module's /generate endpoint")
+
+class BatchRequest(BaseModel):
+    """Schema for a batch write-up generation request."""
+    items: List[BatchItem] = Field(..., min_length=1, max_length=200, description="Write-up requests to generate")
+
+class BatchItemResult(BaseModel):
+    """Schema for the outcome of one batch item."""
+    index: int = Field(..., description="Position of the item in the request")
+    id: Optional[str] = Field(None, description="Client-supplied identifier")
+    module: str = Field(..., description="Module name")
+    status: str = Field(..., description="'ok', 'invalid' (failed validation), 'error' (failed generation), or 'busy' (generation pool at capacity, retry the item)")
+    result: Optional[Dict[str, Any]] = Field(None, description="Module response when status is 'ok'")
+    error: Optional[Any] = Field(None, description="Error message or validation errors")
+
+class BatchResponse(BaseModel):
+    """Schema for a batch write-up generation response."""
+    results: List[BatchItemResult] = Field(..., description="Per-item results in request order")
+    succeeded: int = Field(..., description="Number of items generated successfully")
+    failed: int = Field(..., description="Number of items that failed validation or generation")
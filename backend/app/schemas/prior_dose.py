@@ -1,7 +1,14 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Dict, List, Literal, Optional
 from .common import CommonInfo
 
+# Write-up sections, in document order
+INTRODUCTION = "introduction"
+PATIENT_INFORMATION = "patient_information"
+ANALYSIS = "analysis"
+ASSESSMENT = "assessment"
+WRITEUP_SECTIONS = (INTRODUCTION, PATIENT_INFORMATION, ANALYSIS, ASSESSMENT)
+
 class PriorTreatment(BaseModel):
     """Schema for a prior radiation treatment."""
     site: str = Field(default="", description="Treatment site (e.g., brain, prostate, thorax)")
@@ -42,7 +49,101 @@ class PriorDoseRequest(BaseModel):
     """Schema for prior dose write-up request."""
     common_info: CommonInfo
     prior_dose_data: PriorDoseData
+    sections: Optional[List[Literal[WRITEUP_SECTIONS]]] = Field(None, min_length=1, description="Write-up sections to render, in document order regardless of list order (all when omitted)")
     
 class PriorDoseResponse(BaseModel):
     """Schema for prior dose write-up response."""
-    writeup: str = Field(..., description="Generated prior dose write-up text")
\ No newline at end of file
+    writeup: str = Field(..., description="Generated prior dose write-up text")
+
+
+class RecoveryModelSpec(BaseModel):
+    """Schema for a tissue recovery model."""
+    onset_months: float = Field(default=0.0, ge=0, description="Months after a prior course before any recovery")
+    full_months: float = Field(default=0.0, ge=0, description="Months after which recovery reaches max_recovery")
+    max_recovery: float = Field(default=0.0, ge=0, le=1, description="Largest fraction of a prior course's EQD2 recovered")
+
+class EffectivePriorDoseRequest(BaseModel):
+    """Schema for a recovery-aware prior dose summation request."""
+    current_month: str = Field(..., description="Current treatment month")
+    current_year: int = Field(..., description="Current treatment year")
+    prior_treatments: List[PriorTreatment] = Field(..., description="List of prior treatments")
+    structures: List[str] = Field(..., min_length=1, description="Structures to evaluate")
+    recovery_models: Optional[Dict[str, RecoveryModelSpec]] = Field(None, description="Structure name -> recovery model, replacing the defaults")
+    overlapping_only: bool = Field(default=False, description="Only sum prior treatments that overlap the current treatment")
+
+class PriorContributionResult(BaseModel):
+    """Schema for one prior treatment's contribution to a structure."""
+    prior_index: int = Field(..., description="Index of the prior treatment in the request")
+    interval_months: float = Field(..., description="Months from the prior treatment to the current treatment")
+    nominal_eqd2: float = Field(..., description="EQD2 of the prior treatment in Gy, without recovery")
+    recovered_fraction: float = Field(..., description="Fraction of the prior EQD2 assumed recovered")
+    effective_eqd2: float = Field(..., description="EQD2 still counted in Gy")
+
+class StructureEffectiveDose(BaseModel):
+    """Schema for the recovery-aware prior dose of one structure."""
+    structure: str = Field(..., description="Anatomical structure name")
+    alpha_beta: float = Field(..., description="α/β ratio used, in Gy")
+    recovery_model: RecoveryModelSpec = Field(..., description="Recovery model applied")
+    nominal_eqd2: float = Field(..., description="Sum of prior EQD2 in Gy, fully additive")
+    effective_eqd2: float = Field(..., description="Sum of prior EQD2 in Gy after recovery")
+    priors: List[PriorContributionResult] = Field(default=[], description="Per-prior contributions")
+
+class EffectivePriorDoseResponse(BaseModel):
+    """Schema for a recovery-aware prior dose summation response."""
+    structures: List[StructureEffectiveDose] = Field(..., description="Effective prior dose per structure")
+    unquantified_priors: List[int] = Field(default=[], description="Indices of prior treatments without dose or fractions, left out of the sums")
+
+MAX_DOSE_CONVERSION_ROWS = 100_000
+
+class DoseConversionRequest(BaseModel):
+    """Schema for a bulk EQD2/BED conversion request (columnar; length-1 columns broadcast)."""
+    doses: List[float] = Field(..., min_length=1, max_length=MAX_DOSE_CONVERSION_ROWS, description="Total physical doses in Gy")
+    fractions: List[int] = Field(..., min_length=1, max_length=MAX_DOSE_CONVERSION_ROWS, description="Numbers of fractions")
+    structures: Optional[List[Optional[str]]] = Field(None, max_length=MAX_DOSE_CONVERSION_ROWS, description="Structure names used to look up α/β where no α/β is given")
+    alpha_betas: Optional[List[Optional[float]]] = Field(None, max_length=MAX_DOSE_CONVERSION_ROWS, description="α/β ratios in Gy; null entries fall back to the structure")
+    target_fractions: Optional[int] = Field(None, ge=1, description="Also return the isoeffective physical dose in this many fractions")
+
+class DoseConversionResponse(BaseModel):
+    """Schema for a bulk EQD2/BED conversion response (one entry per row)."""
+    alpha_beta: List[float] = Field(..., description="α/β ratio used for each row, in Gy")
+    eqd2: List[float] = Field(..., description="EQD2 in Gy")
+    bed: List[float] = Field(..., description="BED in Gy")
+    equivalent_dose: Optional[List[float]] = Field(None, description="Isoeffective physical dose in target_fractions fractions, in Gy")
+
+class DoseBudgetRequest(BaseModel):
+    """Schema for a remaining dose budget request."""
+    sites: List[str] = Field(..., min_length=1, description="Current treatment sites whose constraints apply")
+    current_month: str = Field(..., description="Current treatment month")
+    current_year: int = Field(..., description="Current treatment year")
+    prior_treatments: List[PriorTreatment] = Field(default=[], description="List of prior treatments")
+    fraction_options: List[int] = Field(..., min_length=1, max_length=100, description="Candidate numbers of fractions for the current course")
+    apply_recovery: bool = Field(default=False, description="Discount prior treatments by time-decayed tissue recovery")
+    overlapping_only: bool = Field(default=False, description="Only count prior treatments that overlap the current treatment")
+
+class StructureDoseBudget(BaseModel):
+    """Schema for the remaining dose budget of one constraint."""
+    structure: str = Field(..., description="Anatomical structure name")
+    constraint: str = Field(..., description="Constraint type (e.g., Dmax)")
+    limit: str = Field(..., description="Constraint limit (EQD2)")
+    alpha_beta: float = Field(..., description="α/β ratio used, in Gy")
+    limit_eqd2: float = Field(..., description="Limit in Gy EQD2")
+    prior_eqd2: float = Field(..., description="Prior dose already received in Gy EQD2")
+    remaining_eqd2: float = Field(..., description="Remaining budget in Gy EQD2 (0 when the limit is already reached)")
+    max_total_dose: List[float] = Field(..., description="Maximum current-course physical dose in Gy, per fraction option")
+    max_dose_per_fraction: List[float] = Field(..., description="Maximum dose per fraction in Gy, per fraction option")
+
+class DoseBudgetResponse(BaseModel):
+    """Schema for a remaining dose budget response."""
+    fraction_options: List[int] = Field(..., description="Fraction options, in column order")
+    budgets: List[StructureDoseBudget] = Field(..., description="One row per invertible dose constraint")
+    skipped: List[dict] = Field(default=[], description="Constraints that can't be inverted (volume or minimum-dose limits)")
+    unquantified_priors: List[int] = Field(default=[], description="Indices of prior treatments without dose or fractions, left out of the budget")
+
+class FractionationRegimesRequest(BaseModel):
+    """Schema for a batched fractionation regime request (length-1 columns broadcast)."""
+    doses: List[float] = Field(..., min_length=1, max_length=MAX_DOSE_CONVERSION_ROWS, description="Total doses in Gy")
+    fractions: List[int] = Field(..., min_length=1, max_length=MAX_DOSE_CONVERSION_ROWS, description="Numbers of fractions")
+
+class FractionationRegimesResponse(BaseModel):
+    """Schema for a batched fractionation regime response (one entry per row)."""
+    regimes: List[str] = Field(..., description="Regime of each row (SRS, SBRT_3fx, SBRT_5fx, MODERATE_HYPOFX, CONVENTIONAL)")
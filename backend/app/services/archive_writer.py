@@ -0,0 +1,233 @@
+"""Write-behind persistence of generated write-ups to the archive.
+
+Generate endpoints hand each new write-up to :meth:`ArchiveWriter.submit`,
+which only appends to an in-memory buffer, so a slow or unavailable
+database never adds to generation latency. A background task flushes the
+buffer in ``executemany`` batches when it reaches ``batch_size`` rows or
+every ``flush_interval`` seconds, and the shutdown hook flushes what is
+left.
+
+The buffer is bounded. When it is full, or a flush fails, rows are either
+dropped (and counted) or spilled to a JSON-lines file that is replayed on the
+next successful flush.
+
+Configuration (environment):
+    ARCHIVE_WRITEUPS: "1" (default) to archive generated write-ups, "0" to disable
+    ARCHIVE_QUEUE_SIZE: Rows buffered in memory (default 1000)
+    ARCHIVE_BATCH_SIZE: Rows per insert batch (default 100)
+    ARCHIVE_FLUSH_INTERVAL: Seconds between timed flushes (default 2)
+    ARCHIVE_OVERFLOW: "drop" (default) or "spill"
+    ARCHIVE_SPILL_PATH: Spill file used by the "spill" policy (default ./archive_spill.jsonl)
+"""
+from collections import deque
+from datetime import datetime, timezone
+from itertools import islice
+from sqlalchemy import insert
+from typing import IO, Any, Callable, Deque, Dict, Iterator, List, Optional
+import asyncio
+import json
+import logging
+import os
+import threading
+
+from app.models import Writeup
+from app.services.writeup_archive import WriteupArchive
+
+logger = logging.getLogger(__name__)
+
+DROP = "drop"
+SPILL = "spill"
+
+ARCHIVE_WRITEUPS = os.getenv("ARCHIVE_WRITEUPS", "1") == "1"
+ARCHIVE_QUEUE_SIZE = int(os.getenv("ARCHIVE_QUEUE_SIZE", "1000"))
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "100"))
+ARCHIVE_FLUSH_INTERVAL = float(os.getenv("ARCHIVE_FLUSH_INTERVAL", "2"))
+ARCHIVE_OVERFLOW = os.getenv("ARCHIVE_OVERFLOW", DROP)
+ARCHIVE_SPILL_PATH = os.getenv("ARCHIVE_SPILL_PATH", "./archive_spill.jsonl")
+
+
+def _default_session_maker():
+    from app.database import async_session_maker
+    return async_session_maker
+
+
+class ArchiveWriter:
+    """Bounded write-behind buffer in front of the write-up archive."""
+
+    def __init__(self, enabled: bool = ARCHIVE_WRITEUPS, queue_size: int = ARCHIVE_QUEUE_SIZE,
+                 batch_size: int = ARCHIVE_BATCH_SIZE, flush_interval: float = ARCHIVE_FLUSH_INTERVAL,
+                 overflow: str = ARCHIVE_OVERFLOW, spill_path: str = ARCHIVE_SPILL_PATH,
+                 session_maker: Optional[Callable] = None):
+        if overflow not in (DROP, SPILL):
+            raise ValueError(f"Unsupported archive overflow policy: {overflow}")
+        self.enabled = enabled
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self.spill_path = spill_path
+        self.session_maker = session_maker or _default_session_maker()
+        self._buffer: Deque[Dict[str, Any]] = deque()
+        self._lock = threading.Lock()
+        self._flush_lock = asyncio.Lock()
+        self._wake: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self.written = 0
+        self.dropped = 0
+        self.spilled = 0
+        self.failed_flushes = 0
+
+    def submit(self, module: str, request: Any, result: Any) -> None:
+        """Buffer one generated write-up. Never blocks on the database; safe from any thread."""
+        if not self.enabled:
+            return
+        row = WriteupArchive.to_row(module, request, result)
+        row["created_at"] = datetime.now(timezone.utc)
+        with self._lock:
+            if len(self._buffer) >= self.queue_size:
+                self._overflow([row])
+                return
+            self._buffer.append(row)
+            full = len(self._buffer) >= self.batch_size
+        if full and self._loop is not None and self._wake is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    def _overflow(self, rows: List[Dict[str, Any]]) -> None:
+        """Drop or spill rows that can't be buffered or written."""
+        if self.overflow == SPILL:
+            try:
+                with open(self.spill_path, "a", encoding="utf-8") as spill:
+                    for row in rows:
+                        spill.write(json.dumps({**row, "created_at": row["created_at"].isoformat()}) + "\n")
+                self.spilled += len(rows)
+                return
+            except OSError as e:
+                logger.error("Could not spill %d archive rows: %s", len(rows), e)
+        self.dropped += len(rows)
+
+    def _take(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [self._buffer.popleft() for _ in range(min(self.batch_size, len(self._buffer)))]
+
+    def _claim_spill(self) -> Optional[str]:
+        """Move the spill file aside for replay, so new spills start a fresh file."""
+        if self.overflow != SPILL:
+            return None
+        replay_path = self.spill_path + ".replay"
+        # A replay file left by an interrupted replay is finished first
+        if not os.path.exists(replay_path):
+            if not os.path.exists(self.spill_path):
+                return None
+            os.replace(self.spill_path, replay_path)
+        return replay_path
+
+    def _spilled_batches(self, spill: IO[str]) -> Iterator[List[Dict[str, Any]]]:
+        """Read spilled rows back ``batch_size`` lines at a time."""
+        while True:
+            lines = list(islice(spill, self.batch_size))
+            if not lines:
+                return
+            rows = [json.loads(line) for line in lines if line.strip()]
+            for row in rows:
+                row["created_at"] = datetime.fromisoformat(row["created_at"])
+            if rows:
+                yield rows
+
+    async def _insert(self, rows: List[Dict[str, Any]]) -> None:
+        async with self.session_maker() as session:
+            async with session.begin():
+                # A list of parameter sets runs as one executemany
+                await session.execute(insert(Writeup), rows)
+
+    async def flush(self) -> int:
+        """Write every buffered (and previously spilled) row; returns the number written."""
+        written = 0
+        async with self._flush_lock:
+            rows = self._take()
+            while rows:
+                try:
+                    await self._insert(rows)
+                except Exception as e:
+                    # Keep the database's problems out of the request path
+                    logger.error("Archive flush of %d rows failed: %s", len(rows), e)
+                    self.failed_flushes += 1
+                    with self._lock:
+                        self._overflow(rows)
+                    break
+                written += len(rows)
+                rows = self._take()
+            if not rows:
+                written += await self._replay_spilled()
+        self.written += written
+        return written
+
+    async def _replay_spilled(self) -> int:
+        """Insert previously spilled rows batch by batch; returns the number written."""
+        replay_path = self._claim_spill()
+        if replay_path is None:
+            return 0
+        written = 0
+        with open(replay_path, encoding="utf-8") as spill:
+            batches = self._spilled_batches(spill)
+            for batch in batches:
+                try:
+                    await self._insert(batch)
+                except Exception as e:
+                    logger.error("Archive replay of %d spilled rows failed: %s", len(batch), e)
+                    # Re-spill this batch and the rest of the file for the next flush
+                    with self._lock:
+                        self._overflow(batch)
+                        for rest in batches:
+                            self._overflow(rest)
+                    break
+                written += len(batch)
+        os.remove(replay_path)
+        return written
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+
+    def start(self) -> None:
+        """Start the background flush task on the running event loop."""
+        if not self.enabled or self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        self._task = self._loop.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the flush task and write out everything still buffered.
+
+        The task is asked to stop and left to finish its current flush, rather
+        than cancelled, so rows already taken off the buffer are never lost.
+        """
+        if self._task is not None:
+            self._stopping = True
+            self._wake.set()
+            await self._task
+            self._task = None
+            self._loop = None
+            self._stopping = False
+        await self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            buffered = len(self._buffer)
+        return {
+            "enabled": self.enabled,
+            "buffered": buffered,
+            "queue_size": self.queue_size,
+            "written": self.written,
+            "dropped": self.dropped,
+            "spilled": self.spilled,
+            "failed_flushes": self.failed_flushes,
+            "overflow": self.overflow,
+        }
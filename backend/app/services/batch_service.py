@@ -0,0 +1,146 @@
+from app.schemas.batch import BatchItem, BatchItemResult, BatchResponse
+from app.registry import import_string, registry
+from app.services.generation_pool import PoolSaturatedError
+from app.services.writeup_cache import UNCACHED_MODULES
+from pydantic import ValidationError
+from typing import Any, AsyncIterator, Dict, List, Tuple
+import asyncio
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Module name -> (registry service name, request schema, generate method)
+BATCH_MODULES: Dict[str, Tuple[str, str, str]] = {
+    "fusion": ("fusion", "app.schemas.fusion:FusionRequest", "generate_fusion_writeup"),
+    "dibh": ("dibh", "app.schemas.dibh:DIBHRequest", "generate_dibh_writeup"),
+    "sbrt": ("sbrt", "app.schemas.sbrt_schemas:SBRTGenerateRequest", "generate_sbrt_writeup"),
+    "srs": ("srs", "app.schemas.srs_schemas:SRSGenerateRequest", "generate_srs_writeup"),
+    "pacemaker": ("pacemaker", "app.schemas.pacemaker_schemas:PacemakerGenerateRequest", "generate_pacemaker_writeup"),
+    "prior_dose": ("prior_dose", "app.schemas.prior_dose:PriorDoseRequest", "generate_prior_dose_writeup"),
+    "tbi": ("tbi", "app.schemas.tbi_schemas:TBIGenerateRequest", "generate_tbi_writeup"),
+    "hdr": ("hdr", "app.schemas.hdr_schemas:HDRGenerateRequest", "generate_hdr_writeup"),
+    "neurostimulator": ("neurostimulator", "app.schemas.neurostimulator_schemas:NeurostimulatorGenerateRequest", "generate_neurostimulator_writeup"),
+}
+
+# Items of one batch generated concurrently; the generation pool still
+# decides what runs inline and bounds admission across all requests
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY", "4"))
+
+
+def normalize_module(module: str) -> str:
+    """Accept router prefixes such as "prior-dose" as module names."""
+    return module.strip().lower().replace("-", "_")
+
+
+class BatchService:
+    """Service for generating many write-ups from different modules in one call."""
+
+    def __init__(self, concurrency: int = BATCH_CONCURRENCY):
+        """Initialize the batch service."""
+        self.modules = BATCH_MODULES
+        self.concurrency = concurrency
+
+    def validate_item(self, item: BatchItem) -> Any:
+        """Validate an item's request body against its module's schema.
+
+        Raises:
+            ValueError: If the module is unknown
+            ValidationError: If the request body doesn't match the schema
+        """
+        module = normalize_module(item.module)
+        if module not in self.modules:
+            raise ValueError(f"Unknown module: {item.module}")
+        _, schema_path, _ = self.modules[module]
+        return import_string(schema_path).model_validate(item.request)
+
+    async def generate_item(self, module: str, request: Any) -> Dict[str, Any]:
+        """Generate one write-up with the module's shared service, through the write-up cache.
+
+        Misses run through the shared generation pool, like the /generate
+        endpoints, and newly generated write-ups are queued for the archive.
+
+        Raises:
+            PoolSaturatedError: If the generation pool is at capacity
+        """
+        module = normalize_module(module)
+        service_name, _, method_name = self.modules[module]
+        cache = registry.get("writeup_cache")
+        key = cache.key(module, request)
+        result = None if module in UNCACHED_MODULES else cache.get(key)
+        if result is None:
+            generate = getattr(registry.get(service_name), method_name)
+            result = await registry.get("generation_pool").run(module, request, generate)
+            if module not in UNCACHED_MODULES:
+                cache.put(key, result)
+            registry.get("archive_writer").submit(module, request, result)
+        return result.model_dump()
+
+    def _validate_all(self, items: List[BatchItem]) -> Tuple[List[BatchItemResult], List[Tuple[int, Any]]]:
+        """Validate every item up front; returns failures and (index, request) pairs to run."""
+        results: List[BatchItemResult] = [None] * len(items)
+        valid = []
+        for index, item in enumerate(items):
+            try:
+                valid.append((index, self.validate_item(item)))
+            except ValidationError as e:
+                results[index] = self._failure(index, item, "invalid", e.errors(include_url=False))
+            except ValueError as e:
+                results[index] = self._failure(index, item, "invalid", str(e))
+        return results, valid
+
+    @staticmethod
+    def _failure(index: int, item: BatchItem, status: str, error: Any) -> BatchItemResult:
+        return BatchItemResult(index=index, id=item.id, module=item.module, status=status, error=error)
+
+    async def _run_item(self, index: int, item: BatchItem, request: Any,
+                        slots: asyncio.Semaphore) -> BatchItemResult:
+        """Generate one item, turning any exception into an error result."""
+        try:
+            async with slots:
+                result = await self.generate_item(item.module, request)
+            return BatchItemResult(index=index, id=item.id, module=item.module, status="ok", result=result)
+        except PoolSaturatedError as e:
+            return self._failure(index, item, "busy", str(e))
+        except ValueError as e:
+            return self._failure(index, item, "error", str(e))
+        except Exception as e:
+            logger.exception(f"Batch item {index} ({item.module}) failed")
+            return self._failure(index, item, "error", f"Internal server error: {str(e)}")
+
+    async def stream_batch(self, items: List[BatchItem]) -> AsyncIterator[BatchItemResult]:
+        """Yield item results as soon as each one is ready.
+
+        Items that fail validation come first, then generated items in
+        completion order (not request order); use ``index`` to match them up.
+        At most ``concurrency`` items of the batch are generating at once, and
+        items the generation pool turns away come back with status 'busy'.
+        """
+        results, valid = self._validate_all(items)
+        for result in results:
+            if result is not None:
+                yield result
+        slots = asyncio.Semaphore(self.concurrency)
+        tasks = [
+            asyncio.ensure_future(self._run_item(index, items[index], request, slots))
+            for index, request in valid
+        ]
+        try:
+            for task in asyncio.as_completed(tasks):
+                yield await task
+        finally:
+            # A client that disconnects mid-stream shouldn't leave items generating
+            for task in tasks:
+                task.cancel()
+
+    async def generate_batch(self, items: List[BatchItem]) -> BatchResponse:
+        """Validate all items, then generate the valid ones through the generation pool.
+
+        A failing item only affects its own result; the rest of the batch still runs.
+        """
+        results: List[BatchItemResult] = [None] * len(items)
+        async for result in self.stream_batch(items):
+            results[result.index] = result
+
+        succeeded = sum(1 for r in results if r.status == "ok")
+        return BatchResponse(results=results, succeeded=succeeded, failed=len(results) - succeeded)
@@ -0,0 +1,121 @@
+"""Precompiled index over the prior-dose constraint tables.
+
+The QUANTEC, Timmerman and SRS tables on ``PriorDoseService`` are plain lists
+of dicts keyed by site. Walking them on every ``/suggested-constraints`` call
+means re-filtering unverified entries, rebuilding dedup keys and re-resolving
+anatomical regions each time. The catalog does that work once and keeps the
+result as tuples of frozen records keyed by (constraint table, site).
+"""
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Tuple
+
+# Constraint tables compiled into the catalog
+QUANTEC = "QUANTEC"
+SRS = "SRS"
+SBRT_3FX = "SBRT_3fx"
+SBRT_5FX = "SBRT_5fx"
+
+# Fractionation regime -> constraint table. Regimes not listed here
+# (CONVENTIONAL, MODERATE_HYPOFX) are evaluated against QUANTEC.
+REGIME_TABLES = {
+    "SRS": SRS,
+    "SBRT_3fx": SBRT_3FX,
+    "SBRT_5fx": SBRT_5FX,
+}
+
+
+@dataclass(frozen=True)
+class ConstraintRecord:
+    """A verified constraint with its unit, region and limit already resolved."""
+    structure: str
+    constraint: str
+    limit: str
+    endpoint: str
+    unit: str
+    region: str
+
+    @property
+    def key(self) -> Tuple[str, str]:
+        """Dedup key: the same structure/metric pair is only listed once."""
+        return (self.structure, self.constraint)
+
+    def to_dict(self, source: str) -> dict:
+        """Render the record in the shape returned by the API."""
+        return {
+            "structure": self.structure,
+            "constraint": self.constraint,
+            "limit": self.limit,
+            "endpoint": self.endpoint,
+            "source": source,
+            "unit": self.unit,
+            "region": self.region,
+        }
+
+
+def _constraint_unit(constraint: dict) -> str:
+    """Gy for dose metrics, % for volume metrics."""
+    if "Gy" in constraint["limit"] or "cc" in constraint["constraint"].lower():
+        return "Gy"
+    return "%"
+
+
+class ConstraintCatalog:
+    """Verified constraints indexed by (table, site)."""
+
+    def __init__(self, tables: Dict[str, Dict[str, List[dict]]], region_for: Callable[[str], str]):
+        """Compile the raw constraint tables.
+
+        Args:
+            tables: Table name -> {site: [constraint dict, ...]}
+            region_for: Resolves a structure name to its anatomical region
+        """
+        self._index: Dict[Tuple[str, str], Tuple[ConstraintRecord, ...]] = {}
+        for table, sites in tables.items():
+            for site, constraints in sites.items():
+                self._index[(table, site.lower())] = self._compile_site(constraints, region_for)
+
+    @staticmethod
+    def _compile_site(constraints: Iterable[dict], region_for: Callable[[str], str]) -> Tuple[ConstraintRecord, ...]:
+        seen = set()
+        records = []
+        for constraint in constraints:
+            # Only verified constraints are shown to users
+            if not constraint.get("verified", False):
+                continue
+            record = ConstraintRecord(
+                structure=constraint["structure"],
+                constraint=constraint["constraint"],
+                limit=constraint["limit"],
+                endpoint=constraint.get("endpoint", ""),
+                unit=_constraint_unit(constraint),
+                region=region_for(constraint["structure"]),
+            )
+            if record.key not in seen:
+                seen.add(record.key)
+                records.append(record)
+        return tuple(records)
+
+    def lookup(self, table: str, sites: Iterable[str]) -> Tuple[ConstraintRecord, ...]:
+        """Merge the precompiled records for ``sites``, keeping first occurrences.
+
+        Args:
+            table: Constraint table name (QUANTEC, SRS, SBRT_3fx, SBRT_5fx)
+            sites: Treatment site names, in priority order
+
+        Returns:
+            Deduplicated tuple of constraint records
+        """
+        compiled = [self._index[(table, site.lower())] for site in sites if (table, site.lower()) in self._index]
+        if not compiled:
+            return ()
+        if len(compiled) == 1:
+            return compiled[0]
+
+        seen = set()
+        merged = []
+        for records in compiled:
+            for record in records:
+                if record.key not in seen:
+                    seen.add(record.key)
+                    merged.append(record)
+        return tuple(merged)
@@ -0,0 +1,122 @@
+"""Numeric model for constraint limit strings.
+
+Limits such as ``"<54 Gy"``, ``"≤50%"`` or ``"<30-32 Gy"`` are parsed once into
+a :class:`ParsedLimit` and cached, and free-text values entered by the
+physicist (``"48.2 Gy"``, ``"12%"``) go through an LRU-backed parser, so the
+smart assessment only compares numbers.
+"""
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+import re
+
+_NUMBER = re.compile(r"[\d.]+")
+_RANGE = re.compile(r"([\d.]+)\s*-\s*([\d.]+)")
+
+EXCEEDED = "exceeded"
+WITHIN = "within"
+UNKNOWN = "unknown"
+
+
+@dataclass(frozen=True)
+class ParsedLimit:
+    """A constraint limit reduced to its operator, bounds and unit.
+
+    ``lower`` is the first number in the limit and is the value compared
+    against; for ranges such as ``"<30-32 Gy"`` the second number is kept in
+    ``upper`` for display and planning purposes.
+    """
+    operator: str  # "<", "≤", ">", "≥", or "" when the limit has no operator
+    lower: float
+    upper: Optional[float] = None
+    unit: str = ""
+
+    @property
+    def is_range(self) -> bool:
+        return self.upper is not None
+
+    @property
+    def is_minimum(self) -> bool:
+        """True for ">"/"≥" limits, where the value must stay above the bound."""
+        return self.operator in (">", "≥")
+
+    def evaluate(self, value: float) -> str:
+        """Return 'exceeded' or 'within' for a numeric value."""
+        if self.is_minimum:
+            return EXCEEDED if value < self.lower else WITHIN
+        # "<", "≤" and bare limits are all treated as maximums
+        return EXCEEDED if value > self.lower else WITHIN
+
+
+def _limit_operator(limit: str) -> str:
+    # Upper-bound operators win when both appear, e.g. "≥700cc <21 Gy"
+    for operator in ("≤", "<", "≥", ">"):
+        if operator in limit:
+            return operator
+    return ""
+
+
+def _limit_unit(limit: str) -> str:
+    for unit in ("Gy", "%", "cc"):
+        if unit in limit:
+            return unit
+    return ""
+
+
+@lru_cache(maxsize=512)
+def parse_limit(limit: str) -> Optional[ParsedLimit]:
+    """Parse a limit string, or return None if it has no usable number."""
+    if not limit:
+        return None
+    numbers = _NUMBER.findall(limit)
+    if not numbers:
+        return None
+    try:
+        lower = float(numbers[0])
+    except ValueError:
+        return None
+
+    upper = None
+    match = _RANGE.search(limit)
+    if match and match.group(1) == numbers[0]:
+        try:
+            upper = float(match.group(2))
+        except ValueError:
+            upper = None
+
+    return ParsedLimit(
+        operator=_limit_operator(limit),
+        lower=lower,
+        upper=upper,
+        unit=_limit_unit(limit),
+    )
+
+
+@lru_cache(maxsize=4096)
+def parse_value(value: str) -> Optional[float]:
+    """Extract the first number from a free-text value, or None."""
+    if not value:
+        return None
+    numbers = _NUMBER.findall(value)
+    if not numbers:
+        return None
+    try:
+        return float(numbers[0])
+    except ValueError:
+        return None
+
+
+def compare_value_to_limit(value: str, limit: str) -> str:
+    """Compare an entered value to its limit.
+
+    Returns: 'exceeded', 'within', or 'unknown'
+    """
+    if not value or not limit:
+        return UNKNOWN
+    entered = parse_value(value)
+    if entered is None:
+        return UNKNOWN
+    parsed = parse_limit(limit)
+    if parsed is None:
+        return UNKNOWN
+    return parsed.evaluate(entered)
@@ -0,0 +1,183 @@
+"""Local store for 3D dose grids.
+
+Each grid is written as a ``.npy`` (or headerless ``.raw``) file next to a
+small JSON header holding its shape, dtype, origin and spacing. Reads go
+through ``np.memmap`` so callers only page in the slabs, chunks or
+regions of interest they actually touch instead of loading whole grids per
+request.
+"""
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Iterator, List, Optional, Sequence, Tuple
+import json
+import os
+import re
+import numpy as np
+
+DEFAULT_STORE_DIR = os.getenv("DOSE_GRID_DIR", "./dose_grids")
+
+NPY = "npy"
+RAW = "raw"
+
+_GRID_ID = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]{0,127}$")
+
+
+@dataclass(frozen=True)
+class GridHeader:
+    """Geometry and storage details for a stored grid."""
+    shape: Tuple[int, ...]
+    dtype: str
+    origin: Tuple[float, ...] = (0.0, 0.0, 0.0)
+    spacing: Tuple[float, ...] = (1.0, 1.0, 1.0)  # mm per voxel along each axis
+    format: str = NPY
+
+    @property
+    def voxel_volume_cc(self) -> float:
+        """Volume of one voxel in cc (spacing is in mm)."""
+        return float(np.prod(self.spacing)) / 1000.0
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self))
+
+    @classmethod
+    def from_json(cls, text: str) -> "GridHeader":
+        data = json.loads(text)
+        return cls(
+            shape=tuple(data["shape"]),
+            dtype=data["dtype"],
+            origin=tuple(data.get("origin", (0.0, 0.0, 0.0))),
+            spacing=tuple(data.get("spacing", (1.0, 1.0, 1.0))),
+            format=data.get("format", NPY),
+        )
+
+
+def bounding_box(mask: np.ndarray) -> Optional[Tuple[slice, ...]]:
+    """Smallest box of slices containing every True voxel, or None if empty."""
+    slices = []
+    for axis in range(mask.ndim):
+        other_axes = tuple(i for i in range(mask.ndim) if i != axis)
+        occupied = np.flatnonzero(mask.any(axis=other_axes))
+        if occupied.size == 0:
+            return None
+        slices.append(slice(int(occupied[0]), int(occupied[-1]) + 1))
+    return tuple(slices)
+
+
+class DoseGridStore:
+    """Saves dose grids to disk and serves memory-mapped reads."""
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = Path(root or DEFAULT_STORE_DIR)
+
+    def _paths(self, grid_id: str, fmt: str = None) -> Tuple[Path, Path]:
+        if not _GRID_ID.match(grid_id) or ".." in grid_id:
+            raise ValueError(f"Invalid grid id: {grid_id!r}")
+        if fmt is None:
+            fmt = self.header(grid_id).format
+        return self.root / f"{grid_id}.{fmt}", self.root / f"{grid_id}.json"
+
+    def exists(self, grid_id: str) -> bool:
+        return _GRID_ID.match(grid_id) is not None and (self.root / f"{grid_id}.json").exists()
+
+    def grid_ids(self) -> List[str]:
+        """Ids of all stored grids."""
+        if not self.root.exists():
+            return []
+        return sorted(path.stem for path in self.root.glob("*.json"))
+
+    def header(self, grid_id: str) -> GridHeader:
+        if not _GRID_ID.match(grid_id) or ".." in grid_id:
+            raise ValueError(f"Invalid grid id: {grid_id!r}")
+        header_path = self.root / f"{grid_id}.json"
+        if not header_path.exists():
+            raise KeyError(f"Dose grid not found: {grid_id}")
+        return GridHeader.from_json(header_path.read_text())
+
+    def path(self, grid_id: str) -> Path:
+        """Path of the grid's data file."""
+        return self._paths(grid_id)[0]
+
+    def create(self, grid_id: str, shape: Sequence[int], dtype: str = "float32",
+               origin: Sequence[float] = (0.0, 0.0, 0.0), spacing: Sequence[float] = (1.0, 1.0, 1.0),
+               fmt: str = NPY, overwrite: bool = False) -> np.memmap:
+        """Allocate a new grid on disk and return it as a writable memmap.
+
+        Raises:
+            ValueError: If the id is already stored and ``overwrite`` is False
+        """
+        if fmt not in (NPY, RAW):
+            raise ValueError(f"Unsupported grid format: {fmt}")
+        if self.exists(grid_id):
+            if not overwrite:
+                raise ValueError(f"Dose grid already exists: {grid_id}")
+            # The old data file may use the other format, so remove it explicitly
+            self.delete(grid_id)
+        header = GridHeader(
+            shape=tuple(int(n) for n in shape),
+            dtype=np.dtype(dtype).str,
+            origin=tuple(float(v) for v in origin),
+            spacing=tuple(float(v) for v in spacing),
+            format=fmt,
+        )
+        data_path, header_path = self._paths(grid_id, fmt)
+        self.root.mkdir(parents=True, exist_ok=True)
+        if fmt == NPY:
+            grid = np.lib.format.open_memmap(data_path, mode="w+", dtype=header.dtype, shape=header.shape)
+        else:
+            grid = np.memmap(data_path, mode="w+", dtype=header.dtype, shape=header.shape)
+        header_path.write_text(header.to_json())
+        return grid
+
+    def save(self, grid_id: str, grid: np.ndarray, origin: Sequence[float] = (0.0, 0.0, 0.0),
+             spacing: Sequence[float] = (1.0, 1.0, 1.0), fmt: str = NPY, slab: int = 16,
+             overwrite: bool = False) -> GridHeader:
+        """Write an array to the store slab by slab along the first axis."""
+        target = self.create(grid_id, grid.shape, grid.dtype, origin, spacing, fmt, overwrite)
+        for start in range(0, grid.shape[0], slab):
+            target[start:start + slab] = grid[start:start + slab]
+        target.flush()
+        del target
+        return self.header(grid_id)
+
+    def open(self, grid_id: str, mode: str = "r") -> np.memmap:
+        """Memory-map a stored grid without reading it."""
+        header = self.header(grid_id)
+        data_path, _ = self._paths(grid_id, header.format)
+        if header.format == NPY:
+            return np.load(data_path, mmap_mode=mode)
+        return np.memmap(data_path, mode=mode, dtype=header.dtype, shape=header.shape)
+
+    def delete(self, grid_id: str) -> None:
+        data_path, header_path = self._paths(grid_id)
+        data_path.unlink(missing_ok=True)
+        header_path.unlink(missing_ok=True)
+
+    def iter_slabs(self, grid_id: str, slab: int = 16, axis: int = 0) -> Iterator[Tuple[int, int, np.ndarray]]:
+        """Yield (start, stop, slab) views along ``axis``."""
+        grid = self.open(grid_id)
+        length = grid.shape[axis]
+        for start in range(0, length, slab):
+            stop = min(start + slab, length)
+            index = [slice(None)] * grid.ndim
+            index[axis] = slice(start, stop)
+            yield start, stop, grid[tuple(index)]
+
+    def iter_chunks(self, grid_id: str, chunk_voxels: int = 1 << 21) -> Iterator[Tuple[int, np.ndarray]]:
+        """Yield (offset, values) chunks over the flattened grid."""
+        flat = self.open(grid_id).reshape(-1)
+        for start in range(0, flat.size, chunk_voxels):
+            yield start, flat[start:start + chunk_voxels]
+
+    def read_roi(self, grid_id: str, roi: Sequence[slice]) -> np.ndarray:
+        """Read a box of voxels into memory."""
+        return np.array(self.open(grid_id)[tuple(roi)])
+
+    def read_masked(self, grid_id: str, mask: np.ndarray) -> np.ndarray:
+        """Values of the voxels inside ``mask``, reading only its bounding box."""
+        header = self.header(grid_id)
+        if tuple(mask.shape) != header.shape:
+            raise ValueError(f"Mask shape {mask.shape} does not match grid shape {header.shape}")
+        box = bounding_box(mask)
+        if box is None:
+            return np.empty(0, dtype=header.dtype)
+        return self.read_roi(grid_id, box)[mask[box]]
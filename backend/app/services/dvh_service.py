@@ -0,0 +1,317 @@
+"""Dose-volume histogram service.
+
+Computes cumulative DVHs and Dx/Vx/Dcc metrics from a dose grid and
+structure masks. Masks may be boolean arrays or run-length encoded as
+``[(start, length), ...]`` runs over the flattened (C-order) grid.
+
+Structures are registered per dose grid: each (grid, structure) voxel index
+set is cached, and so is the sorted dose array built from it, so after the
+first query every further metric is a binary search or a single index.
+Structure ids are only meaningful within their grid, so two plans can both
+register "cord" without clobbering each other.
+"""
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+import math
+import re
+import threading
+import numpy as np
+
+from app.services.constraint_limits import UNKNOWN, parse_limit
+from app.services.dose_engine import BED, RAW_DOSE, ArrayLike, convert_dose, load_array
+
+Runs = Sequence[Tuple[int, int]]
+MaskLike = Union[np.ndarray, Runs, str]
+
+_DCC_METRIC = re.compile(r"^d\s*(\d*\.?\d+)\s*cc$")
+_DMAX_VOLUME_METRIC = re.compile(r"^dmax\s*\(\s*(\d*\.?\d+)\s*cc\s*\)$")
+_DPCT_METRIC = re.compile(r"^d\s*(\d*\.?\d+)\s*%$")
+_VX_METRIC = re.compile(r"^v\s*(\d*\.?\d+)\s*(?:gy)?$")
+
+
+def parse_dvh_metric(constraint_type: str) -> Optional[Tuple[str, Optional[float]]]:
+    """Identify the DVH metric a constraint refers to.
+
+    Returns one of ("dmax", None), ("dmean", None), ("dcc", cc), ("dpct", %),
+    ("vx", Gy), or None for metrics that can't be read off a DVH
+    (e.g. "Critical volume", "D1-10cc").
+    """
+    metric = constraint_type.strip().lower()
+    if metric == "dmax":
+        return ("dmax", None)
+    if metric in ("dmean", "mean", "mld"):
+        return ("dmean", None)
+    for pattern, kind in ((_DMAX_VOLUME_METRIC, "dcc"), (_DCC_METRIC, "dcc"), (_DPCT_METRIC, "dpct"), (_VX_METRIC, "vx")):
+        match = pattern.match(metric)
+        if match:
+            return (kind, float(match.group(1)))
+    return None
+
+
+def check_limit_method(method: str) -> None:
+    """Reject dose quantities that constraint limits can't be compared against.
+
+    The constraint tables hold physical (regime tables) or EQD2 (QUANTEC)
+    limits, so a BED value would be compared against the wrong quantity.
+
+    Raises:
+        ValueError: If ``method`` is BED
+    """
+    if method == BED:
+        raise ValueError("BED values can't be compared to dose constraint limits; use EQD2 or Raw Dose")
+
+
+def decode_runs(runs: Runs, size: int) -> np.ndarray:
+    """Flat voxel indices for a run-length encoded mask."""
+    if not len(runs):
+        return np.empty(0, dtype=np.int64)
+    runs = np.asarray(runs, dtype=np.int64).reshape(-1, 2)
+    starts, lengths = runs[:, 0], runs[:, 1]
+    if (starts < 0).any() or (lengths < 0).any() or (starts + lengths > size).any():
+        raise ValueError("Run-length mask extends outside the dose grid")
+    # Expand each run into consecutive indices without a Python loop
+    offsets = np.repeat(starts - np.concatenate(([0], np.cumsum(lengths)[:-1])), lengths)
+    return np.arange(int(lengths.sum()), dtype=np.int64) + offsets
+
+
+def mask_indices(mask: Union[np.ndarray, Runs], size: int) -> np.ndarray:
+    """Flat voxel indices for a boolean mask or run-length encoded runs."""
+    if isinstance(mask, np.ndarray) and mask.dtype == bool:
+        if mask.size != size:
+            raise ValueError(f"Mask has {mask.size} voxels, dose grid has {size}")
+        return np.flatnonzero(mask.reshape(-1))
+    return decode_runs(mask, size)
+
+
+class StructureDVH:
+    """Sorted voxel doses for one structure on one grid."""
+
+    def __init__(self, doses: np.ndarray, voxel_volume_cc: Optional[float] = None):
+        # Descending order: index i holds the minimum dose to the hottest i+1 voxels
+        self.doses = np.sort(np.asarray(doses, dtype=np.float64))[::-1]
+        self.voxel_volume_cc = voxel_volume_cc
+        self._ascending = self.doses[::-1]
+
+    @property
+    def voxels(self) -> int:
+        return int(self.doses.size)
+
+    @property
+    def volume_cc(self) -> Optional[float]:
+        return self.voxels * self.voxel_volume_cc if self.voxel_volume_cc else None
+
+    @property
+    def dmax(self) -> float:
+        return float(self.doses[0]) if self.voxels else 0.0
+
+    @property
+    def dmin(self) -> float:
+        return float(self.doses[-1]) if self.voxels else 0.0
+
+    @property
+    def dmean(self) -> float:
+        return float(self.doses.mean()) if self.voxels else 0.0
+
+    def dose_to_volume_cc(self, cc: float) -> float:
+        """Minimum dose received by the hottest ``cc`` of the structure."""
+        if not self.voxel_volume_cc:
+            raise ValueError("Voxel volume is required for absolute-volume metrics")
+        if not self.voxels:
+            return 0.0
+        index = max(math.ceil(cc / self.voxel_volume_cc - 1e-9), 1) - 1
+        return float(self.doses[min(index, self.voxels - 1)])
+
+    def dose_to_volume_percent(self, percent: float) -> float:
+        """Minimum dose received by the hottest ``percent`` of the structure."""
+        if not self.voxels:
+            return 0.0
+        index = max(math.ceil(self.voxels * percent / 100.0 - 1e-9), 1) - 1
+        return float(self.doses[min(index, self.voxels - 1)])
+
+    def volume_at_dose(self, dose: float, relative: bool = True) -> float:
+        """Volume receiving at least ``dose`` Gy, in % (relative) or cc."""
+        if not self.voxels:
+            return 0.0
+        if not relative and not self.voxel_volume_cc:
+            raise ValueError("Voxel volume is required for absolute-volume metrics")
+        count = self.voxels - int(np.searchsorted(self._ascending, dose, side="left"))
+        return 100.0 * count / self.voxels if relative else count * self.voxel_volume_cc
+
+    def cumulative(self, bin_width: float = 0.1) -> Tuple[np.ndarray, np.ndarray]:
+        """Cumulative DVH as (dose bin edges in Gy, % volume ≥ each edge)."""
+        upper = max(self.dmax, bin_width)
+        # One bin past Dmax so the hottest voxel has its own lower edge
+        edges = np.arange(0.0, upper + 2 * bin_width, bin_width)
+        counts, _ = np.histogram(self.doses, bins=edges)
+        # Volume at or above each lower edge: reverse cumulative sum of the histogram
+        at_or_above = np.cumsum(counts[::-1])[::-1]
+        volume = 100.0 * at_or_above / max(self.voxels, 1)
+        return edges[:-1], volume
+
+    def metric(self, kind: str, argument: Optional[float], unit: str = "") -> Optional[Tuple[float, str]]:
+        """Evaluate a parsed metric, returning (value, unit).
+
+        ``unit`` selects cc instead of % for Vx when the limit is a volume.
+        Returns None for absolute-volume metrics when the voxel volume is unknown.
+        """
+        if not self.voxel_volume_cc and (kind == "dcc" or (kind == "vx" and unit == "cc")):
+            return None
+        if kind == "dmax":
+            return self.dmax, "Gy"
+        if kind == "dmean":
+            return self.dmean, "Gy"
+        if kind == "dcc":
+            return self.dose_to_volume_cc(argument), "Gy"
+        if kind == "dpct":
+            return self.dose_to_volume_percent(argument), "Gy"
+        if kind == "vx":
+            if unit == "cc":
+                return self.volume_at_dose(argument, relative=False), "cc"
+            return self.volume_at_dose(argument), "%"
+        raise ValueError(f"Unknown DVH metric: {kind}")
+
+
+class DVHService:
+    """Builds structure DVHs with cached voxel index sets."""
+
+    def __init__(self, max_structures: int = 256, max_dvhs: int = 512):
+        self.max_structures = max_structures
+        self.max_dvhs = max_dvhs
+        # (grid_key, structure_id) -> flat voxel indices
+        self._indices: "OrderedDict[Tuple[str, str], np.ndarray]" = OrderedDict()
+        # (grid_key, structure_id, method, fractions, alpha_beta) -> DVH
+        self._dvhs: "OrderedDict[tuple, StructureDVH]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _remember(cache: OrderedDict, key, value, limit: int) -> None:
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > limit:
+            cache.popitem(last=False)
+
+    def register_structure(self, grid_key: str, structure_id: str, mask: Union[np.ndarray, Runs], size: int) -> int:
+        """Cache the voxel index set for a structure on one grid and return its voxel count."""
+        indices = mask_indices(mask, size)
+        with self._lock:
+            self._remember(self._indices, (grid_key, structure_id), indices, self.max_structures)
+            # Any DVH built from a previous mask with this id is stale
+            for key in [key for key in self._dvhs if key[:2] == (grid_key, structure_id)]:
+                del self._dvhs[key]
+        return int(indices.size)
+
+    def structure_indices(self, structure: MaskLike, size: int, grid_key: Optional[str] = None) -> np.ndarray:
+        """Voxel indices for a structure id registered on ``grid_key``, a boolean mask, or runs."""
+        if isinstance(structure, str):
+            key = (grid_key, structure)
+            with self._lock:
+                indices = self._indices.get(key)
+                if indices is None:
+                    raise KeyError(f"Structure not registered for grid {grid_key}: {structure}")
+                self._indices.move_to_end(key)
+                return indices
+        return mask_indices(structure, size)
+
+    def structure_dvh(self, dose: ArrayLike, structure: MaskLike, voxel_volume_cc: Optional[float],
+                      grid_key: Optional[str] = None, method: str = RAW_DOSE,
+                      fractions: Optional[int] = None, alpha_beta: Optional[float] = None) -> StructureDVH:
+        """DVH for one structure. Cached when both grid and structure have ids.
+
+        With ``method`` EQD2 or BED the grid is taken as total physical dose
+        delivered in ``fractions`` and each voxel is converted with ``alpha_beta``.
+        """
+        if method == RAW_DOSE:
+            fractions = alpha_beta = None
+        elif not fractions or alpha_beta is None:
+            raise ValueError(f"fractions and alpha_beta are required to convert dose to {method}")
+        cache_key = None
+        if grid_key and isinstance(structure, str):
+            cache_key = (grid_key, structure, method, fractions, alpha_beta)
+            with self._lock:
+                dvh = self._dvhs.get(cache_key)
+                if dvh is not None:
+                    self._dvhs.move_to_end(cache_key)
+                    return dvh
+
+        flat = load_array(dose).reshape(-1)
+        indices = self.structure_indices(structure, flat.size, grid_key)
+        # Fancy indexing on a memmap only pages in the structure's voxels
+        doses = flat[indices]
+        if method != RAW_DOSE:
+            doses = convert_dose(doses, fractions, alpha_beta, method)
+        dvh = StructureDVH(doses, voxel_volume_cc)
+
+        if cache_key:
+            with self._lock:
+                self._remember(self._dvhs, cache_key, dvh, self.max_dvhs)
+        return dvh
+
+    @staticmethod
+    def measure(constraints: Iterable[dict], dvhs: Dict[str, StructureDVH],
+                method: str = RAW_DOSE) -> List[Optional[Tuple[float, str, str]]]:
+        """Read each constraint's metric off its structure's DVH.
+
+        Args:
+            constraints: Constraint dictionaries (structure, constraint, limit, ...)
+            dvhs: Lower-cased structure name -> DVH
+            method: Quantity the DVHs are in (EQD2, BED, or Raw Dose)
+
+        Returns:
+            Per constraint, (value, unit, status) or None when the structure
+            or metric isn't available.
+        """
+        check_limit_method(method)
+        measured = []
+        for constraint in constraints:
+            dvh = dvhs.get(constraint["structure"].lower())
+            metric = parse_dvh_metric(constraint["constraint"])
+            result = None
+            if dvh is not None and dvh.voxels and metric is not None:
+                parsed = parse_limit(constraint.get("limit", ""))
+                value = dvh.metric(*metric, unit=parsed.unit if parsed else "")
+                if value is not None:
+                    result = (value[0], value[1], parsed.evaluate(value[0]) if parsed else UNKNOWN)
+            measured.append(result)
+        return measured
+
+    def evaluate_constraints(self, dose: ArrayLike, constraints: Iterable[dict], structures: Dict[str, MaskLike],
+                             voxel_volume_cc: float, grid_key: Optional[str] = None, method: str = RAW_DOSE,
+                             fractions: Optional[int] = None,
+                             alpha_beta_for: Optional[Callable[[str], float]] = None) -> List[dict]:
+        """Evaluate every constraint against the dose grid in one pass.
+
+        Each structure's DVH is built once however many constraints refer to it.
+
+        Args:
+            dose: Total physical dose grid (array or .npy path)
+            constraints: Constraint dictionaries (structure, constraint, limit, ...)
+            structures: Structure name -> id registered on ``grid_key``, boolean mask, or runs
+            voxel_volume_cc: Volume of one voxel in cc
+            grid_key: Stable id of the dose grid, enables DVH caching
+            method: EQD2 or Raw Dose; limits are compared in these units (BED is rejected)
+            fractions: Fractions the grid was delivered in (required for EQD2/BED)
+            alpha_beta_for: Structure name -> α/β (required for EQD2/BED)
+
+        Returns:
+            Copies of the constraints with "value" and "status" added. Value is
+            blank and status 'unknown' when the structure or metric isn't available.
+        """
+        check_limit_method(method)
+        constraints = list(constraints)
+        by_name = {name.lower(): (name, structure) for name, structure in structures.items()}
+        dvhs: Dict[str, StructureDVH] = {}
+        for constraint in constraints:
+            name = constraint["structure"].lower()
+            if name in by_name and name not in dvhs:
+                label, structure = by_name[name]
+                alpha_beta = alpha_beta_for(label) if method != RAW_DOSE and alpha_beta_for else None
+                dvhs[name] = self.structure_dvh(dose, structure, voxel_volume_cc, grid_key,
+                                                method, fractions, alpha_beta)
+
+        evaluated = []
+        for constraint, measured in zip(constraints, self.measure(constraints, dvhs, method)):
+            result = dict(constraint)
+            result["value"] = f"{measured[0]:.2f} {measured[1]}" if measured else ""
+            result["status"] = measured[2] if measured else UNKNOWN
+            evaluated.append(result)
+        return evaluated
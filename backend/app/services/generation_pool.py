@@ -0,0 +1,156 @@
+"""Execution layer for write-up generation.
+
+Generation is synchronous, CPU-bound code. Calling it directly from an
+``async def`` handler blocks the event loop for every other client, so heavy
+modules are dispatched to a bounded worker pool instead. Trivial modules stay
+inline, where a pool hop would cost more than the work itself.
+
+Admission is bounded: at most ``workers + queue_size`` generations may be
+running or waiting. Past that, :meth:`GenerationPool.run` raises
+:class:`PoolSaturatedError` and the endpoint answers 503 with Retry-After,
+rather than letting latency grow without bound.
+
+Configuration (environment):
+    GENERATION_POOL: "thread" (default) or "process"
+    GENERATION_WORKERS: Worker count (default 4)
+    GENERATION_QUEUE_SIZE: Generations allowed to wait for a worker (default 32)
+    GENERATION_POOLED_MODULES: Comma-separated modules run in the pool
+        (default "prior_dose,sbrt,srs"); the rest run inline
+    GENERATION_RETRY_AFTER: Seconds suggested to rejected clients (default 1)
+"""
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, FrozenSet
+import asyncio
+import contextvars
+import os
+import threading
+
+from app.metrics import Gauge, metrics
+from app.registry import registry
+
+THREAD = "thread"
+PROCESS = "process"
+
+GENERATION_POOL = os.getenv("GENERATION_POOL", THREAD)
+GENERATION_WORKERS = int(os.getenv("GENERATION_WORKERS", "4"))
+GENERATION_QUEUE_SIZE = int(os.getenv("GENERATION_QUEUE_SIZE", "32"))
+GENERATION_POOLED_MODULES = frozenset(
+    module.strip() for module in os.getenv("GENERATION_POOLED_MODULES", "prior_dose,sbrt,srs").split(",") if module.strip()
+)
+GENERATION_RETRY_AFTER = int(os.getenv("GENERATION_RETRY_AFTER", "1"))
+
+
+class PoolSaturatedError(RuntimeError):
+    """Raised when the pool and its queue are full."""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Write-up generation is at capacity, retry shortly")
+        self.retry_after = retry_after
+
+
+def _generate_in_worker(module: str, request: Any) -> Any:
+    """Process-pool entry point: resolve the service in the worker process."""
+    from app.services.batch_service import BATCH_MODULES
+
+    service_name, _, method_name = BATCH_MODULES[module]
+    # Fresh context per call, so context variables (e.g. the trace sampling
+    # decision) don't carry over to the next job on this worker
+    return contextvars.Context().run(getattr(registry.get(service_name), method_name), request)
+
+
+class GenerationPool:
+    """Runs generation inline or in a bounded thread/process pool."""
+
+    def __init__(self, kind: str = GENERATION_POOL, workers: int = GENERATION_WORKERS,
+                 queue_size: int = GENERATION_QUEUE_SIZE,
+                 pooled_modules: FrozenSet[str] = GENERATION_POOLED_MODULES,
+                 retry_after: int = GENERATION_RETRY_AFTER, expose_metrics: bool = True):
+        if kind not in (THREAD, PROCESS):
+            raise ValueError(f"Unsupported generation pool: {kind}")
+        self.kind = kind
+        self.workers = workers
+        self.capacity = workers + queue_size
+        self.pooled_modules = frozenset(pooled_modules)
+        self.retry_after = retry_after
+        self.executor: Executor = (
+            ProcessPoolExecutor(max_workers=workers) if kind == PROCESS
+            else ThreadPoolExecutor(max_workers=workers, thread_name_prefix="generate")
+        )
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.inline = 0
+        if expose_metrics:
+            _register_metrics(self)
+
+    def _admit(self) -> None:
+        with self._lock:
+            if self.pending >= self.capacity:
+                self.rejected += 1
+                raise PoolSaturatedError(self.retry_after)
+            self.pending += 1
+
+    def _release(self) -> None:
+        with self._lock:
+            self.pending -= 1
+            self.completed += 1
+
+    async def run(self, module: str, request: Any, generate: Callable[[Any], Any]) -> Any:
+        """Generate a write-up for ``module``.
+
+        Args:
+            module: Module name; decides inline vs pooled execution
+            request: Validated request model
+            generate: Service method to call (inline and thread pools)
+
+        Raises:
+            PoolSaturatedError: If every worker is busy and the queue is full
+        """
+        if module not in self.pooled_modules:
+            with self._lock:
+                self.inline += 1
+            return generate(request)
+
+        self._admit()
+        try:
+            loop = asyncio.get_running_loop()
+            if self.kind == PROCESS:
+                return await loop.run_in_executor(self.executor, _generate_in_worker, module, request)
+            # run_in_executor doesn't propagate context variables: run in a copy of
+            # the caller's context so values set during generation (e.g. the trace
+            # sampling decision) stay with this request, not the worker thread
+            context = contextvars.copy_context()
+            return await loop.run_in_executor(self.executor, context.run, generate, request)
+        finally:
+            self._release()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "kind": self.kind,
+                "workers": self.workers,
+                "capacity": self.capacity,
+                "in_flight": min(self.pending, self.workers),
+                "queued": max(self.pending - self.workers, 0),
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "inline": self.inline,
+                "pooled_modules": sorted(self.pooled_modules),
+            }
+
+    def close(self) -> None:
+        """Stop the workers without waiting on queued generations."""
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _register_metrics(pool: GenerationPool) -> None:
+    """Expose the pool's saturation on /metrics (replacing a previous pool's gauges)."""
+    def collect(field: str):
+        return lambda: [({"pool": pool.kind}, pool.stats()[field])]
+
+    metrics.register(Gauge("generation_pool_in_flight", "Generations running on a worker", collect("in_flight")))
+    metrics.register(Gauge("generation_pool_queued", "Generations waiting for a worker", collect("queued")))
+    metrics.register(Gauge("generation_pool_capacity", "Workers plus queue slots", collect("capacity")))
+    metrics.register(Gauge("generation_pool_rejected_total", "Generations rejected with 503", collect("rejected"),
+                           kind="counter"))
@@ -1,6 +1,118 @@
-from app.schemas.prior_dose import PriorDoseRequest, PriorDoseResponse, PriorTreatment
-from typing import List, Dict, Any, Tuple
+from app.schemas.prior_dose import PriorDoseRequest, PriorDoseResponse, PriorTreatment, DoseStatistic
+from app.schemas.prior_dose import INTRODUCTION, PATIENT_INFORMATION, ANALYSIS, ASSESSMENT
+from app.services.constraint_catalog import ConstraintCatalog, QUANTEC, SRS, SBRT_3FX, SBRT_5FX, REGIME_TABLES
+from app.services.constraint_limits import compare_value_to_limit, parse_limit, EXCEEDED, WITHIN
+from app.services.dvh_service import DVHService, StructureDVH, check_limit_method
+from app.services.dose_engine import CompositeDoseEngine, DoseCourse, StructureDoseStats, bed, eqd2, isoeffective_dose, method_abbreviation
+from app.services.reirradiation import MONTH_NUMBERS, RecoveryModel, StructureRecovery, TimeDecayedSummation, months_between
+from app.tracing import get_tracer
+from typing import List, Dict, Any, Callable, Iterable, Iterator, Optional, Sequence, Tuple
 from datetime import datetime
+from functools import lru_cache
+import numpy as np
+
+tracer = get_tracer("prior_dose")
+
+# Fractionation regimes, in the order of their codes in the regime table
+REGIMES = ("SRS", "SBRT_3fx", "SBRT_5fx", "MODERATE_HYPOFX", "CONVENTIONAL")
+
+# Display name, description and constraint source of each regime
+REGIME_INFO = {
+    "SRS": {
+        "name": "SRS (Single Fraction)",
+        "description": "Single-fraction stereotactic radiosurgery",
+        "constraint_source": "TG-101/HyTEC SRS limits"
+    },
+    "SBRT_3fx": {
+        "name": "SBRT (3 fractions)",
+        "description": "Stereotactic body radiation therapy, 3-fraction regimen",
+        "constraint_source": "Timmerman/TG-101 3fx limits"
+    },
+    "SBRT_5fx": {
+        "name": "SBRT (5 fractions)",
+        "description": "Stereotactic body radiation therapy, 5-fraction regimen",
+        "constraint_source": "Timmerman/TG-101 5fx limits"
+    },
+    "MODERATE_HYPOFX": {
+        "name": "Moderate Hypofractionation",
+        "description": "Moderately hypofractionated treatment (2.5-5 Gy/fraction)",
+        "constraint_source": "QUANTEC limits"
+    },
+    "CONVENTIONAL": {
+        "name": "Conventional Fractionation",
+        "description": "Standard fractionation (<2.5 Gy/fraction)",
+        "constraint_source": "QUANTEC limits"
+    }
+}
+
+# Dense regime lookup grid: 1-40 fractions × 0-100 Gy total dose in 0.1 Gy steps
+REGIME_TABLE_MAX_FRACTIONS = 40
+REGIME_TABLE_MAX_DOSE = 100.0
+REGIME_TABLE_DOSE_STEP = 0.1
+
+# Sentence templates shared by the write-up branches, filled with str.format.
+# Dicts are keyed by the branch where the wording varies.
+COURSE_TEMPLATE = "{dose} Gy in {fractions} {fraction_word}"
+# Keyed by whether any prior treatment overlaps the current one
+INTRODUCTION_TEMPLATES = {
+    True: (
+        "Dr. {physician} requested a medical physics consultation for --- for a prior dose assessment. "
+        "This consultation provides dosimetric analysis and planning guidance for composite dose evaluation.\n\n"
+    ),
+    False: "Dr. {physician} requested a medical physics consultation for --- for a prior dose assessment.\n\n",
+}
+CURRENT_COURSE_TEMPLATE = "The patient has a {site} lesion, currently planned for {course} to the {site}. "
+PRIOR_COURSE_TEMPLATE = "In {month} {year}, the patient received external beam radiotherapy of {course} to the {site}.{end}"
+DICOM_UNAVAILABLE_SENTENCE = "DICOM files for this treatment were unavailable for reconstruction. "
+# Keyed by whether there are several prior treatments
+OVERLAP_TEMPLATES = {
+    False: "The current course of treatment has overlap with the previous treatment",
+    True: "The current course of treatment has overlap with {overlapping} of the previous treatments",
+}
+NO_OVERLAP_ASSESSMENT_TEMPLATE = (
+    "Review of the prior treatment fields and current treatment plan indicates minimal to no overlap between treatment volumes. "
+    "The distance between field edges is sufficient to ensure that critical structures will not receive excessive cumulative dose. "
+    "The proposed treatment can proceed as planned with standard toxicity monitoring. "
+    "This evaluation was reviewed and approved by Dr. {physician} and Dr. {physicist}."
+)
+NO_PRIOR_PATIENT_TEMPLATE = (
+    "The patient is currently being planned for {course} to the {site}. "
+    "The patient has no history of prior radiation treatments.\n\n"
+)
+NO_PRIOR_ASSESSMENT_TEMPLATE = (
+    "The proposed treatment of {course} to the {site} can proceed as planned with standard toxicity monitoring. "
+    "This evaluation was reviewed and approved by the radiation oncologist, Dr. {physician}, and the medical physicist, Dr. {physicist}."
+)
+
+
+def _site_display(site: str, spine_location: str) -> str:
+    """Site name, with the spine level for spine sites."""
+    if site == "spine" and spine_location:
+        return f"{spine_location} spine"
+    return site
+
+
+@lru_cache(maxsize=1024)
+def _course_text(dose: float, fractions: int) -> str:
+    """ "{dose} Gy in {n} fraction(s)" with clean numbers (45.0 -> 45) and grammar."""
+    fractions = int(fractions)
+    return COURSE_TEMPLATE.format(
+        dose=int(dose) if dose == int(dose) else dose,
+        fractions=fractions,
+        fraction_word="fraction" if fractions == 1 else "fractions",
+    )
+
+
+@lru_cache(maxsize=1024)
+def _prior_course_sentence(month: str, year: int, dose: float, fractions: int, site: str, spine_location: str, end: str) -> str:
+    """The "In {month} {year}, ..." sentence of one prior course.
+
+    Cached, like _course_text: the same courses come back on every
+    regeneration of a consult's write-up.
+    """
+    return PRIOR_COURSE_TEMPLATE.format(month=month, year=year, course=_course_text(dose, fractions),
+                                        site=_site_display(site, spine_location), end=end)
+
 
 class PriorDoseService:
     """Service for generating prior dose write-ups."""
@@ -14,6 +126,9 @@ class PriorDoseService:
             "endometrium", "cervix", "rectum", "spine", "extremity"
         ]
         
+        # Dose calculation methods offered by the form
+        self.dose_calc_methods = ["Raw Dose", "EQD2 (Equivalent Dose in 2 Gy fractions)"]
+        
         # α/β ratios for EQD2 calculations (reference values from QUANTEC/literature)
         self.alpha_beta_ratios = {
             "spinal cord": 2,
@@ -348,6 +463,27 @@ class PriorDoseService:
                 {"structure": "Sacral Plexus", "constraint": "Dmax (0.035cc)", "limit": "<16 Gy", "endpoint": "Neuropathy", "verified": False},
             ],
         }
+        
+        # Compile the tables above once into an index keyed by (table, site)
+        # so constraint lookups only merge precomputed records
+        self.constraint_catalog = ConstraintCatalog(
+            {
+                QUANTEC: self.quantec_constraints,
+                SRS: self.srs_constraints,
+                SBRT_3FX: self.timmerman_constraints.get("3fx", {}),
+                SBRT_5FX: self.timmerman_constraints.get("5fx", {}),
+            },
+            self._get_region_for_structure,
+        )
+        
+        # Voxelwise EQD2/BED summation using the α/β table above
+        self.composite_engine = CompositeDoseEngine(self.get_alpha_beta)
+        
+        # Recovery-aware summation of prior courses (re-irradiation)
+        self.prior_summation = TimeDecayedSummation(self.get_alpha_beta)
+        
+        # DVH metrics for constraint evaluation; caches structure voxel indices
+        self.dvh_service = DVHService()
 
     def detect_fractionation_regime(self, dose: float, fractions: int) -> str:
         """Detect the fractionation regime based on dose and fractions.
@@ -383,6 +519,56 @@ class PriorDoseService:
         # Conventional fractionation (<2.5 Gy/fx)
         return "CONVENTIONAL"
     
+    def detect_fractionation_regimes(self, doses: Sequence[float], fractions: Sequence[int]) -> np.ndarray:
+        """Vectorized detect_fractionation_regime over arrays of (dose, fractions).
+        
+        Applies the same rules in the same order as the scalar version, so
+        every element matches detect_fractionation_regime(dose, fractions).
+        
+        Args:
+            doses: Total doses in Gy
+            fractions: Numbers of fractions (broadcast against doses)
+            
+        Returns:
+            Array of regime names
+        """
+        return np.asarray(REGIMES)[self._regime_codes(doses, fractions)]
+    
+    def _regime_codes(self, doses: Sequence[float], fractions: Sequence[int]) -> np.ndarray:
+        """Indices into REGIMES for arrays of (dose, fractions)."""
+        dose = np.asarray(doses, dtype=np.float64)
+        n = np.asarray(fractions, dtype=np.float64)
+        dose_per_fraction = dose / np.where(n > 0, n, 1.0)
+        sbrt = (dose_per_fraction >= 5) & (n <= 8)
+        return np.select(
+            [n <= 0, n == 1, sbrt & (n <= 3), sbrt, (dose_per_fraction >= 2.5) & (dose_per_fraction < 5)],
+            [4, 0, 1, 2, 3],
+            default=4,
+        )
+    
+    def fractionation_regime_table(self) -> Dict[str, Any]:
+        """Precomputed regime of every (fractions, total dose) pair on the lookup grid.
+        
+        ``table[fractions - 1][round(dose / dose_step)]`` is an index into
+        ``regimes``; doses off the grid or above ``max_dose`` need
+        detect_fractionation_regime.
+        
+        Returns:
+            {"regimes", "max_fractions", "max_dose", "dose_step", "table"}
+        """
+        steps = int(round(REGIME_TABLE_MAX_DOSE / REGIME_TABLE_DOSE_STEP))
+        # Integer tenths keep grid doses exact (0.3, not 0.30000000000000004)
+        doses = np.arange(steps + 1) / round(1 / REGIME_TABLE_DOSE_STEP)
+        fractions = np.arange(1, REGIME_TABLE_MAX_FRACTIONS + 1)
+        codes = self._regime_codes(doses[None, :], fractions[:, None])
+        return {
+            "regimes": [{"regime": regime, **REGIME_INFO[regime]} for regime in REGIMES],
+            "max_fractions": REGIME_TABLE_MAX_FRACTIONS,
+            "max_dose": REGIME_TABLE_MAX_DOSE,
+            "dose_step": REGIME_TABLE_DOSE_STEP,
+            "table": codes.tolist(),
+        }
+    
     def get_regime_label(self, regime: str) -> str:
         """Get a human-readable label for a fractionation regime.
         
@@ -489,7 +675,12 @@ class PriorDoseService:
         sites: List[str], 
         dose_calc_method: str = "Raw Dose",
         current_dose: float = None,
-        current_fractions: int = None
+        current_fractions: int = None,
+        dose_grid: Any = None,
+        structure_masks: Dict[str, Any] = None,
+        voxel_volume_cc: float = None,
+        grid_key: str = None,
+        dose_grid_fractions: int = None
     ) -> List[dict]:
         """Get all relevant dose constraints for treatment sites.
         
@@ -506,9 +697,21 @@ class PriorDoseService:
             dose_calc_method: "Raw Dose" or "EQD2"
             current_dose: Current treatment dose in Gy
             current_fractions: Current treatment number of fractions
+            dose_grid: Optional total physical dose grid (array or .npy path) to evaluate
+                the constraints on. For EQD2 it is converted voxelwise with each
+                structure's α/β before comparing against the limits. BED is rejected,
+                since no constraint table holds BED limits.
+            structure_masks: Structure name -> structure id registered on grid_key, boolean
+                mask, or run-length runs; required with dose_grid
+            voxel_volume_cc: Volume of one dose grid voxel in cc; required with dose_grid
+            grid_key: Stable id of the dose grid (e.g. dose grid store id) for DVH caching
+            dose_grid_fractions: Fractions the dose grid was delivered in; required with
+                dose_grid for EQD2
             
         Returns:
-            Deduplicated list of constraint dictionaries with source attribution and region
+            Deduplicated list of constraint dictionaries with source attribution and region.
+            When a dose grid is given, each constraint also carries its DVH "value" and
+            "status" ('exceeded', 'within', or 'unknown').
         """
         # Determine which constraint set to use
         if dose_calc_method and "EQD2" in dose_calc_method:
@@ -524,47 +727,22 @@ class PriorDoseService:
             regime = "QUANTEC"
             source_note = "QUANTEC"
         
-        print(f"DEBUG: Constraint selection - Method: {dose_calc_method}, Regime: {regime}")
-        
-        # Select constraint table based on regime
-        if regime == "SRS":
-            constraint_table = self.srs_constraints
-        elif regime == "SBRT_3fx":
-            constraint_table = self.timmerman_constraints.get("3fx", {})
-        elif regime == "SBRT_5fx":
-            constraint_table = self.timmerman_constraints.get("5fx", {})
-        else:  # QUANTEC, CONVENTIONAL, or MODERATE_HYPOFX
-            # Moderate hypofractionation and conventional use QUANTEC constraints
-            constraint_table = self.quantec_constraints
-        
-        seen = set()  # Track structure+constraint combos we've added
-        constraints = []
-        
-        for site in sites:
-            site_lower = site.lower()
-            if site_lower in constraint_table:
-                for constraint in constraint_table[site_lower]:
-                    # Skip unverified constraints - only show verified ones to users
-                    if not constraint.get("verified", False):
-                        continue
-                    
-                    # Create unique key from structure + constraint type
-                    key = f"{constraint['structure']}_{constraint['constraint']}"
-                    if key not in seen:
-                        seen.add(key)
-                        # Determine region for grouping
-                        region = self._get_region_for_structure(constraint["structure"])
-                        # Add source, regime, and region info to constraint
-                        constraint_with_source = {
-                            "structure": constraint["structure"],
-                            "constraint": constraint["constraint"],
-                            "limit": constraint["limit"],
-                            "endpoint": constraint.get("endpoint", ""),
-                            "source": source_note,
-                            "unit": "Gy" if "Gy" in constraint["limit"] or "cc" in constraint["constraint"].lower() else "%",
-                            "region": region,
-                        }
-                        constraints.append(constraint_with_source)
+        tracer.event("constraint_selection", method=dose_calc_method, regime=regime)
+        
+        # QUANTEC, CONVENTIONAL, and MODERATE_HYPOFX all use the QUANTEC table
+        table = REGIME_TABLES.get(regime, QUANTEC)
+        records = self.constraint_catalog.lookup(table, sites)
+        constraints = [record.to_dict(source_note) for record in records]
+        
+        if dose_grid is not None:
+            if not structure_masks or not voxel_volume_cc:
+                raise ValueError("structure_masks and voxel_volume_cc are required to evaluate a dose grid")
+            constraints = self.dvh_service.evaluate_constraints(
+                dose_grid, constraints, structure_masks, voxel_volume_cc, grid_key,
+                method=method_abbreviation(dose_calc_method),
+                fractions=dose_grid_fractions,
+                alpha_beta_for=self.get_alpha_beta,
+            )
         
         return constraints
     
@@ -591,6 +769,286 @@ class PriorDoseService:
         # Default for late-responding tissues
         return self.alpha_beta_ratios["default_late"]
     
+    def convert_doses(
+        self,
+        doses: Sequence[float],
+        fractions: Sequence[int],
+        structures: Sequence[Optional[str]] = None,
+        alpha_betas: Sequence[Optional[float]] = None,
+        target_fractions: int = None
+    ) -> Dict[str, np.ndarray]:
+        """Convert many (dose, fractions, α/β) rows to EQD2 and BED at once.
+        
+        Columns of length 1 broadcast against the others. A row's α/β is
+        taken from ``alpha_betas`` when given, otherwise looked up from its
+        structure with get_alpha_beta (once per distinct structure name).
+        
+        Args:
+            doses: Total physical doses in Gy
+            fractions: Fraction counts
+            structures: Structure names (None or "" where an α/β is given)
+            alpha_betas: α/β ratios in Gy (None where a structure is given)
+            target_fractions: If set, also return the physical dose in this
+                many fractions that is isoeffective with each row
+            
+        Returns:
+            {"alpha_beta", "eqd2", "bed"} arrays, plus "equivalent_dose"
+            when target_fractions is set
+            
+        Raises:
+            ValueError: If columns can't be broadcast or a row has no α/β
+        """
+        dose = np.asarray(doses, dtype=np.float64)
+        n_fractions = np.asarray(fractions, dtype=np.float64)
+        alpha_beta = np.full(1, np.nan)
+        if alpha_betas is not None:
+            alpha_beta = np.array([np.nan if value is None else value for value in alpha_betas], dtype=np.float64)
+        try:
+            rows = np.broadcast_shapes(dose.shape, n_fractions.shape, alpha_beta.shape,
+                                       (len(structures),) if structures is not None else (1,))
+        except ValueError:
+            raise ValueError("doses, fractions, structures and alpha_betas must have the same length (or length 1)")
+        alpha_beta = np.broadcast_to(alpha_beta, rows).copy()
+        
+        missing = np.isnan(alpha_beta)
+        if structures is not None and missing.any():
+            # Look up each distinct structure once, then fill the rows missing an α/β
+            table = {name: self.get_alpha_beta(name) if name else np.nan for name in dict.fromkeys(structures)}
+            looked_up = np.array([table[name] for name in structures], dtype=np.float64)
+            alpha_beta[missing] = np.broadcast_to(looked_up, rows)[missing]
+        missing = np.isnan(alpha_beta)
+        if missing.any():
+            raise ValueError(f"{int(missing.sum())} rows have neither a structure nor an α/β ratio (first: row {int(np.argmax(missing))})")
+        if np.any(alpha_beta <= 0):
+            raise ValueError("α/β ratios must be positive")
+        if np.any(n_fractions < 1):
+            raise ValueError("Fractions must be at least 1")
+        if np.any(dose < 0):
+            raise ValueError("Doses must not be negative")
+        
+        dose, n_fractions = np.broadcast_to(dose, rows), np.broadcast_to(n_fractions, rows)
+        bed_values = bed(dose, n_fractions, alpha_beta)
+        result = {
+            "alpha_beta": alpha_beta,
+            "eqd2": eqd2(dose, n_fractions, alpha_beta),
+            "bed": bed_values,
+        }
+        if target_fractions is not None:
+            if target_fractions < 1:
+                raise ValueError("target_fractions must be at least 1")
+            result["equivalent_dose"] = isoeffective_dose(bed_values, target_fractions, alpha_beta)
+        return result
+    
+    def remaining_dose_budget(
+        self,
+        sites: List[str],
+        prior_treatments: List[PriorTreatment],
+        current_month: str,
+        current_year: int,
+        fraction_options: Sequence[int],
+        apply_recovery: bool = False,
+        overlapping_only: bool = False
+    ) -> Dict[str, Any]:
+        """Maximum current-course physical dose each OAR can still take.
+        
+        Every QUANTEC (EQD2) dose limit for the sites is reduced by the
+        structure's prior EQD2, and the remaining EQD2 budget is converted back
+        to a physical total dose for each candidate fraction count through
+        the closed-form LQ inverse, evaluated as one (constraints × options)
+        broadcast. Volume limits (%, cc) and minimum-dose limits can't be
+        inverted this way and are returned as skipped.
+        
+        Args:
+            sites: Current treatment sites
+            prior_treatments: Prior courses
+            current_month: Month of the current course
+            current_year: Year of the current course
+            fraction_options: Candidate fraction counts for the current course
+            apply_recovery: Discount prior courses by tissue recovery (see effective_prior_eqd2)
+            overlapping_only: Only count priors that overlap the current treatment
+            
+        Returns:
+            {"fraction_options", "budgets": [{structure, constraint, limit, alpha_beta,
+            limit_eqd2, prior_eqd2, remaining_eqd2, max_total_dose, max_dose_per_fraction}],
+            "skipped": [constraint dicts], "unquantified_priors": [indices]}
+            
+        Raises:
+            ValueError: If a fraction option is below 1
+        """
+        options = np.asarray(fraction_options, dtype=np.float64)
+        if options.size == 0 or np.any(options < 1):
+            raise ValueError("Fraction options must be at least 1")
+        
+        invertible, skipped = [], []
+        for constraint in self.get_constraints_for_sites(sites, dose_calc_method="EQD2"):
+            parsed = parse_limit(constraint["limit"])
+            if parsed is None or parsed.unit != "Gy" or parsed.is_minimum:
+                skipped.append(constraint)
+            else:
+                invertible.append((constraint, parsed.lower))
+        
+        structures = [constraint["structure"] for constraint, _ in invertible]
+        priors, unquantified = self.effective_prior_eqd2(
+            prior_treatments, structures, current_month, current_year,
+            recovery_models=None if apply_recovery else {},
+            overlapping_only=overlapping_only,
+        )
+        alpha_beta = np.array([prior.alpha_beta for prior in priors], dtype=np.float64)
+        limit_eqd2 = np.array([limit for _, limit in invertible], dtype=np.float64)
+        prior_eqd2 = np.array([prior.effective_eqd2 for prior in priors], dtype=np.float64)
+        remaining = np.maximum(limit_eqd2 - prior_eqd2, 0.0)
+        
+        # EQD2 -> BED, then BED -> total dose in n fractions: (constraints × options)
+        remaining_bed = remaining * (1.0 + 2.0 / alpha_beta)
+        max_total = isoeffective_dose(remaining_bed[:, None], options[None, :], alpha_beta[:, None])
+        max_per_fraction = max_total / options[None, :]
+        
+        budgets = [
+            {
+                "structure": constraint["structure"],
+                "constraint": constraint["constraint"],
+                "limit": constraint["limit"],
+                "alpha_beta": float(alpha_beta[i]),
+                "limit_eqd2": float(limit_eqd2[i]),
+                "prior_eqd2": float(prior_eqd2[i]),
+                "remaining_eqd2": float(remaining[i]),
+                "max_total_dose": max_total[i].tolist(),
+                "max_dose_per_fraction": max_per_fraction[i].tolist(),
+            }
+            for i, (constraint, _) in enumerate(invertible)
+        ]
+        return {
+            "fraction_options": [int(n) for n in options],
+            "budgets": budgets,
+            "skipped": skipped,
+            "unquantified_priors": unquantified,
+        }
+    
+    def calculate_composite_statistics(
+        self,
+        courses: List[DoseCourse],
+        structures: Dict[str, Any],
+        dose_calc_method: str = "EQD2",
+        vx_thresholds: List[float] = (),
+        voxel_volume_cc: float = None
+    ) -> Dict[str, StructureDoseStats]:
+        """Sum prior and current dose grids voxelwise and compute per-structure statistics.
+        
+        Each structure is converted with its own α/β from get_alpha_beta.
+        
+        Args:
+            courses: Prior and current DoseCourse grids (arrays or .npy paths) on one grid
+            structures: Structure name -> boolean mask (array or .npy path)
+            dose_calc_method: "Raw Dose", "EQD2", or "BED" (full labels are accepted)
+            vx_thresholds: Dose levels in Gy for Vx statistics
+            voxel_volume_cc: Volume of one voxel in cc
+            
+        Returns:
+            Structure name -> StructureDoseStats
+        """
+        return self.composite_engine.structure_statistics(
+            courses,
+            structures,
+            method=method_abbreviation(dose_calc_method),
+            vx_thresholds=vx_thresholds,
+            voxel_volume_cc=voxel_volume_cc,
+        )
+    
+    def effective_prior_eqd2(
+        self,
+        prior_treatments: List[PriorTreatment],
+        structures: List[str],
+        current_month: str,
+        current_year: int,
+        recovery_models: Dict[str, RecoveryModel] = None,
+        overlapping_only: bool = False
+    ) -> Tuple[List[StructureRecovery], List[int]]:
+        """Sum prior courses per structure, discounting each by the tissue recovered since.
+        
+        Priors without a dose or fraction count can't be quantified; they are
+        left out of the sums and their indices returned so the caller can
+        flag them.
+        
+        Args:
+            prior_treatments: Prior courses (in any order)
+            structures: Structures to evaluate
+            current_month: Month of the current course
+            current_year: Year of the current course
+            recovery_models: Structure name -> RecoveryModel, replacing the defaults
+            overlapping_only: Only sum priors that overlap the current treatment
+            
+        Returns:
+            (StructureRecovery per structure, indices of the unquantified priors);
+            prior indices refer to ``prior_treatments``
+        """
+        included = [
+            index for index, prior in enumerate(prior_treatments)
+            if prior.has_overlap or not overlapping_only
+        ]
+        quantified = [
+            index for index in included
+            if prior_treatments[index].dose and prior_treatments[index].fractions
+        ]
+        results = self.prior_summation.evaluate(
+            doses=[prior_treatments[index].dose for index in quantified],
+            fractions=[prior_treatments[index].fractions for index in quantified],
+            intervals=[
+                months_between(prior_treatments[index].month, prior_treatments[index].year, current_month, current_year)
+                for index in quantified
+            ],
+            structures=structures,
+            models=recovery_models,
+        )
+        for result in results:
+            for contribution in result.priors:
+                contribution.index = quantified[contribution.index]
+        unquantified = [index for index in included if index not in quantified]
+        return results, unquantified
+    
+    def fill_dose_statistics(
+        self,
+        courses: List[DoseCourse],
+        structures: Dict[str, Any],
+        constraints: List[dict],
+        dose_calc_method: str = "EQD2",
+        voxel_volume_cc: float = None
+    ) -> List[DoseStatistic]:
+        """Build DoseStatistic entries for constraints from composite dose grids.
+        
+        The composite voxel doses of each structure are read through the DVH
+        service, so Dmax, Dmean/MLD, Dx%, Vx and (given voxel_volume_cc) Dcc
+        constraints are filled the same way as in get_constraints_for_sites.
+        Other metrics, and structures without a mask, are left blank for the physicist.
+        
+        Args:
+            courses: Prior and current DoseCourse grids
+            structures: Structure name -> boolean mask
+            constraints: Constraint dictionaries from get_constraints_for_sites
+            dose_calc_method: "Raw Dose" or "EQD2"; BED is rejected because the
+                constraint limits are physical or EQD2 doses
+            voxel_volume_cc: Volume of one voxel in cc
+            
+        Returns:
+            One DoseStatistic per constraint, in the same order
+        """
+        method = method_abbreviation(dose_calc_method)
+        check_limit_method(method)
+        doses = self.composite_engine.structure_doses(courses, structures, method)
+        dvhs = {name.lower(): StructureDVH(values, voxel_volume_cc) for name, values in doses.items()}
+        
+        dose_statistics = []
+        for constraint, measured in zip(constraints, self.dvh_service.measure(constraints, dvhs, method)):
+            dose_statistics.append(DoseStatistic(
+                structure=constraint["structure"],
+                constraint_type=constraint["constraint"],
+                value=f"{measured[0]:.1f}" if measured else "",
+                source=constraint.get("source", ""),
+                unit=measured[1] if measured else constraint.get("unit", ""),
+                limit=constraint.get("limit", ""),
+                region=constraint.get("region", ""),
+            ))
+        return dose_statistics
+    
     def _format_constraint_section(self, constraints: List[dict]) -> str:
         """Format constraint section for writeup with blank spaces for physicist to fill in.
         
@@ -609,77 +1067,15 @@ class PriorDoseService:
         
         return section
     
-    def _parse_limit_value(self, limit: str) -> float:
-        """Parse a limit string to extract the numeric value for comparison.
-        
-        Handles formats like: "<54 Gy", "≤50%", "50 Gy", "<30-32 Gy" (takes first number)
-        
-        Args:
-            limit: Limit string from constraint
-            
-        Returns:
-            Numeric value or None if cannot parse
-        """
-        import re
-        if not limit:
-            return None
-        
-        # Remove comparison operators and find numbers
-        # Handle ranges like "30-32" by taking first number
-        numbers = re.findall(r'[\d.]+', limit)
-        if numbers:
-            try:
-                return float(numbers[0])
-            except ValueError:
-                return None
-        return None
-    
     def _compare_value_to_limit(self, value_str: str, limit_str: str) -> str:
         """Compare an entered value to its limit.
         
+        Limits and values are parsed through the cached parsers in
+        constraint_limits, so repeated statistics only compare numbers.
+        
         Returns: 'exceeded', 'within', or 'unknown'
         """
-        import re
-        if not value_str or not limit_str:
-            return 'unknown'
-        
-        # Extract numeric value from the entered value
-        value_numbers = re.findall(r'[\d.]+', value_str)
-        if not value_numbers:
-            return 'unknown'
-        
-        try:
-            entered_value = float(value_numbers[0])
-        except ValueError:
-            return 'unknown'
-        
-        # Parse limit
-        limit_value = self._parse_limit_value(limit_str)
-        if limit_value is None:
-            return 'unknown'
-        
-        # Determine if limit is "less than" type
-        is_less_than = '<' in limit_str or '≤' in limit_str
-        
-        if is_less_than:
-            # For "<54 Gy" type limits, value should be less than limit
-            if entered_value > limit_value:
-                return 'exceeded'
-            else:
-                return 'within'
-        else:
-            # For "50 Gy" or ">50%" type limits
-            if '>' in limit_str:
-                if entered_value < limit_value:
-                    return 'exceeded'
-                else:
-                    return 'within'
-            else:
-                # Assume it's a max limit if no operator specified
-                if entered_value > limit_value:
-                    return 'exceeded'
-                else:
-                    return 'within'
+        return compare_value_to_limit(value_str, limit_str)
     
     def _generate_smart_assessment(self, dose_statistics: List, physician: str, physicist: str) -> str:
         """Generate assessment text based on whether constraints are met or exceeded.
@@ -715,9 +1111,9 @@ class PriorDoseService:
                 'limit': stat.limit
             }
             
-            if result == 'exceeded':
+            if result == EXCEEDED:
                 exceeded_constraints.append(constraint_info)
-            elif result == 'within':
+            elif result == WITHIN:
                 within_constraints.append(constraint_info)
             else:
                 unknown_constraints.append(constraint_info)
@@ -805,15 +1201,8 @@ class PriorDoseService:
         Returns:
             Sorted list of treatments from earliest to most recent
         """
-        # Month name to number mapping
-        month_map = {
-            "January": 1, "February": 2, "March": 3, "April": 4,
-            "May": 5, "June": 6, "July": 7, "August": 8,
-            "September": 9, "October": 10, "November": 11, "December": 12
-        }
-        
         def get_sort_key(treatment):
-            month_num = month_map.get(treatment.month, 1)
+            month_num = MONTH_NUMBERS.get(treatment.month, 1)
             return (treatment.year, month_num)
         
         return sorted(treatments, key=get_sort_key)
@@ -905,26 +1294,29 @@ class PriorDoseService:
     
     def generate_prior_dose_writeup(self, request: PriorDoseRequest) -> PriorDoseResponse:
         """Generate a prior dose write-up based on the request data."""
-        # DEBUG: Log the incoming request data
-        print(f"\nDEBUG: generate_prior_dose_writeup called!")
-        print(f"DEBUG: Physician: {request.common_info.physician.name}")
-        print(f"DEBUG: Current site: {request.prior_dose_data.current_site}")
-        print(f"DEBUG: Current dose: {request.prior_dose_data.current_dose} Gy in {request.prior_dose_data.current_fractions} fractions")
-        print(f"DEBUG: Prior treatments ({len(request.prior_dose_data.prior_treatments)}):")
-        for i, treatment in enumerate(request.prior_dose_data.prior_treatments):
-            overlap_status = "OVERLAP" if treatment.has_overlap else "no overlap"
-            print(f"  [{i+1}] {treatment.site}: {treatment.dose} Gy in {treatment.fractions} fx ({treatment.month} {treatment.year}) - {overlap_status}")
-        print(f"DEBUG: Dose calc method: {request.prior_dose_data.dose_calc_method}")
+        if tracer.begin(
+            "generate_prior_dose_writeup",
+            physician=request.common_info.physician.name,
+            current_site=request.prior_dose_data.current_site,
+            current_dose=request.prior_dose_data.current_dose,
+            current_fractions=request.prior_dose_data.current_fractions,
+            prior_treatments=len(request.prior_dose_data.prior_treatments),
+            method=request.prior_dose_data.dose_calc_method,
+        ):
+            for treatment in request.prior_dose_data.prior_treatments:
+                tracer.event("prior_treatment", site=treatment.site, dose=treatment.dose,
+                             fractions=treatment.fractions, date=f"{treatment.month} {treatment.year}",
+                             overlap=treatment.has_overlap)
         
         common_info = request.common_info
         prior_dose_data = request.prior_dose_data
         
         # Generate write-up using the same pattern detection logic as fusion
-        writeup = self._generate_prior_dose_text(common_info, prior_dose_data)
+        writeup = self._generate_prior_dose_text(common_info, prior_dose_data, request.sections)
         
         return PriorDoseResponse(writeup=writeup)
     
-    def _generate_prior_dose_text(self, common_info, prior_dose_data) -> str:
+    def _generate_prior_dose_text(self, common_info, prior_dose_data, sections: Sequence[str] = None) -> str:
         """Generate the prior dose text following fusion's pattern-based approach."""
         
         physician = common_info.physician.name
@@ -941,256 +1333,151 @@ class PriorDoseService:
         
         # DETECTION LOGIC (following fusion pattern)
         num_prior_treatments = len(prior_treatments)
-        has_spine_location = current_site == "spine" and spine_location
         
         # Check if ANY prior treatment has overlap
         any_overlap = any(t.has_overlap for t in prior_treatments)
         
-        print(f"DEBUG: Detection - Prior treatments: {num_prior_treatments}, Any overlap: {any_overlap}")
+        tracer.event("detection", prior_treatments=num_prior_treatments, any_overlap=any_overlap)
         
         if num_prior_treatments == 0:
-            print("DEBUG: NO PRIOR TREATMENTS DETECTED!")
-            return self._generate_no_prior_text(physician, physicist, current_site, current_dose, current_fractions, spine_location)
+            return self._generate_no_prior_text(physician, physicist, current_site, current_dose, current_fractions, spine_location, sections)
         elif num_prior_treatments == 1:
-            print("DEBUG: SINGLE PRIOR TREATMENT DETECTED!")
-            return self._generate_single_prior_text(physician, physicist, current_site, current_dose, current_fractions, spine_location, prior_treatments[0], dose_calc_method, critical_structures, prior_dose_data)
+            return self._generate_single_prior_text(physician, physicist, current_site, current_dose, current_fractions, spine_location, prior_treatments[0], dose_calc_method, critical_structures, prior_dose_data, sections)
         else:
-            print("DEBUG: MULTIPLE PRIOR TREATMENTS DETECTED!")
-            return self._generate_multiple_prior_text(physician, physicist, current_site, current_dose, current_fractions, spine_location, prior_treatments, dose_calc_method, critical_structures, prior_dose_data)
+            return self._generate_multiple_prior_text(physician, physicist, current_site, current_dose, current_fractions, spine_location, prior_treatments, dose_calc_method, critical_structures, prior_dose_data, sections)
     
-    def _generate_no_prior_text(self, physician: str, physicist: str, current_site: str, current_dose: float, current_fractions: int, spine_location: str) -> str:
-        """Generate text for no prior treatments (basic case)."""
+    def _render_sections(self, builders: Dict[str, Callable[[], Iterable[str]]], sections: Sequence[str] = None) -> str:
+        """Join the fragments of the requested sections (all by default) in document order.
         
-        # Format site with spine location if applicable
-        current_site_display = current_site
-        if current_site == "spine" and spine_location:
-            current_site_display = f"{spine_location} spine"
+        Builders of sections that weren't requested are never called, so their
+        text (e.g. the smart assessment) isn't computed. A partial write-up is
+        stripped of the blank lines that separated it from the omitted sections.
         
-        # Clean up integers
-        current_dose_display = int(current_dose) if current_dose == int(current_dose) else current_dose
-        current_fractions_display = int(current_fractions)
-        
-        # Format treatment with proper grammar
-        fraction_word = self._format_fractions(current_fractions_display)
-        current_treatment = f"{current_dose_display} Gy in {current_fractions_display} {fraction_word}"
+        Args:
+            builders: Section name -> zero-argument fragment generator, in document order
+            sections: Names from WRITEUP_SECTIONS to render; None renders everything
+        """
+        if sections is None:
+            return "".join([fragment for builder in builders.values() for fragment in builder()])
+        return "".join([
+            fragment for name, builder in builders.items() if name in sections for fragment in builder()
+        ]).strip()
+    
+    def _prior_course_fragments(self, treatments: List[PriorTreatment], mention_dicoms: bool, end: str = " ") -> Iterator[str]:
+        """One sentence per prior course (in the given order), plus the DICOM note where requested."""
+        for treatment in treatments:
+            # Use custom site if provided, otherwise use standard site
+            yield _prior_course_sentence(
+                treatment.month, treatment.year, treatment.dose, treatment.fractions,
+                treatment.custom_site if treatment.custom_site else treatment.site, treatment.spine_location, end,
+            )
+            if mention_dicoms and treatment.dicoms_unavailable:
+                yield DICOM_UNAVAILABLE_SENTENCE
+    
+    def _generate_no_prior_text(self, physician: str, physicist: str, current_site: str, current_dose: float, current_fractions: int, spine_location: str, sections: Sequence[str] = None) -> str:
+        """Generate text for no prior treatments (basic case)."""
+        current_site_display = _site_display(current_site, spine_location)
+        current_treatment = _course_text(current_dose, current_fractions)
         
-        writeup = f"Dr. {physician} requested a medical physics consultation for --- for a prior dose assessment.\n\n"
+        def introduction():
+            yield INTRODUCTION_TEMPLATES[False].format(physician=physician)
         
-        writeup += f"Patient Information:\n"
-        writeup += f"The patient is currently being planned for {current_treatment} to the {current_site_display}. "
-        writeup += "The patient has no history of prior radiation treatments.\n\n"
+        def patient_information():
+            yield "Patient Information:\n"
+            yield NO_PRIOR_PATIENT_TEMPLATE.format(course=current_treatment, site=current_site_display)
         
-        writeup += f"Assessment:\n"
-        writeup += f"The proposed treatment of {current_treatment} to the {current_site_display} can proceed as planned with standard toxicity monitoring. "
-        writeup += f"This evaluation was reviewed and approved by the radiation oncologist, Dr. {physician}, and the medical physicist, Dr. {physicist}."
+        def assessment():
+            yield "Assessment:\n"
+            yield NO_PRIOR_ASSESSMENT_TEMPLATE.format(
+                course=current_treatment, site=current_site_display, physician=physician, physicist=physicist
+            )
         
-        return writeup
+        return self._render_sections({
+            INTRODUCTION: introduction,
+            PATIENT_INFORMATION: patient_information,
+            ASSESSMENT: assessment,
+        }, sections)
     
-    def _generate_single_prior_text(self, physician: str, physicist: str, current_site: str, current_dose: float, current_fractions: int, spine_location: str, prior_treatment: PriorTreatment, dose_calc_method: str, critical_structures: List[str], prior_dose_data) -> str:
+    def _generate_single_prior_text(self, physician: str, physicist: str, current_site: str, current_dose: float, current_fractions: int, spine_location: str, prior_treatment: PriorTreatment, dose_calc_method: str, critical_structures: List[str], prior_dose_data, sections: Sequence[str] = None) -> str:
         """Generate text for single prior treatment."""
-        
-        # Format current site
-        current_site_display = current_site
-        if current_site == "spine" and spine_location:
-            current_site_display = f"{spine_location} spine"
-        
-        # Clean up current treatment integers
-        current_dose_display = int(current_dose) if current_dose == int(current_dose) else current_dose
-        current_fractions_display = int(current_fractions)
-        current_fraction_word = self._format_fractions(current_fractions_display)
-        current_treatment = f"{current_dose_display} Gy in {current_fractions_display} {current_fraction_word}"
-        
-        # Detect fractionation regime for current treatment
-        current_regime = self.detect_fractionation_regime(current_dose, current_fractions)
-        prior_regime = self.detect_fractionation_regime(prior_treatment.dose, prior_treatment.fractions)
-        
-        # Format prior treatment
-        prior_dose_display = int(prior_treatment.dose) if prior_treatment.dose == int(prior_treatment.dose) else prior_treatment.dose
-        prior_fractions_display = int(prior_treatment.fractions)
-        prior_fraction_word = self._format_fractions(prior_fractions_display)
-        
-        # Use custom site if provided, otherwise use standard site
-        prior_site_display = prior_treatment.custom_site if prior_treatment.custom_site else prior_treatment.site
-        if prior_site_display == "spine" and prior_treatment.spine_location:
-            prior_site_display = f"{prior_treatment.spine_location} spine"
-        
-        # Get method abbreviation
-        if dose_calc_method.startswith("BED"):
-            method_abbreviation = "BED"
-        elif dose_calc_method.startswith("EQD2"):
-            method_abbreviation = "EQD2"
-        else:
-            method_abbreviation = "Raw Dose"
-        
-        # Determine constraint source based on current treatment regime and dose calc method
-        # EQD2 always uses QUANTEC; Raw Dose uses regime-appropriate constraints
-        if "EQD2" in dose_calc_method:
-            constraint_source = "QUANTEC dose-volume constraints"
-        else:
-            constraint_source = self.get_constraint_source_text(current_regime)
-        
-        if prior_treatment.has_overlap:
-            # STRUCTURED FORMAT FOR OVERLAP CASES
-            writeup = f"Dr. {physician} requested a medical physics consultation for --- for a prior dose assessment. This consultation provides dosimetric analysis and planning guidance for composite dose evaluation.\n\n"
-            
-            # PATIENT INFORMATION (includes current treatment and prior radiation history)
-            writeup += f"Patient Information:\n"
-            writeup += f"The patient has a {current_site_display} lesion, currently planned for {current_dose_display} Gy in {current_fractions_display} {current_fraction_word} to the {current_site_display}. "
-            writeup += f"In {prior_treatment.month} {prior_treatment.year}, the patient received external beam radiotherapy of {prior_dose_display} Gy in {prior_fractions_display} {prior_fraction_word} to the {prior_site_display}. "
-            if prior_treatment.dicoms_unavailable:
-                writeup += f"DICOM files for this treatment were unavailable for reconstruction. "
-            writeup += f"The current course of treatment has overlap with the previous treatment"
-            if critical_structures:
-                writeup += f" on the {', '.join(critical_structures)}"
-            writeup += f".\n\n"
-            
-            # ANALYSIS - DICOM-aware methodology, constraint source, and dose statistics
-            writeup += f"Analysis:\n"
-            writeup += self._generate_methodology_text(method_abbreviation, prior_treatment.dicoms_unavailable, constraint_source)
-            
-            # Dose statistics integrated under Analysis
-            dose_statistics = prior_dose_data.dose_statistics if hasattr(prior_dose_data, 'dose_statistics') else []
-            filled_statistics = [stat for stat in dose_statistics if stat.value and stat.value.strip()]
-            
-            if filled_statistics:
-                writeup += f"Below are the dose statistics:\n"
-                for stat in filled_statistics:
-                    writeup += self._format_dose_statistic(stat)
-            
-            # ASSESSMENT - Smart analysis of whether constraints are exceeded
-            writeup += f"\nAssessment:\n"
-            writeup += self._generate_smart_assessment(dose_statistics, physician, physicist)
-        else:
-            # NO OVERLAP CASE - simpler format (no need to mention DICOM availability since we're not reconstructing)
-            writeup = f"Dr. {physician} requested a medical physics consultation for --- for a prior dose assessment.\n\n"
-            
-            # PATIENT INFORMATION (includes current treatment and prior radiation history)
-            writeup += f"Patient Information:\n"
-            writeup += f"The patient has a {current_site_display} lesion, currently planned for {current_dose_display} Gy in {current_fractions_display} {current_fraction_word} to the {current_site_display}. "
-            writeup += f"In {prior_treatment.month} {prior_treatment.year}, the patient received external beam radiotherapy of {prior_dose_display} Gy in {prior_fractions_display} {prior_fraction_word} to the {prior_site_display}.\n\n"
-            
-            writeup += f"Assessment:\n"
-            writeup += f"Review of the prior treatment fields and current treatment plan indicates minimal to no overlap between treatment volumes. "
-            writeup += f"The distance between field edges is sufficient to ensure that critical structures will not receive excessive cumulative dose. "
-            writeup += f"The proposed treatment can proceed as planned with standard toxicity monitoring. "
-            writeup += f"This evaluation was reviewed and approved by Dr. {physician} and Dr. {physicist}."
-        
-        return writeup
+        return self._generate_prior_text(physician, physicist, current_site, current_dose, current_fractions, spine_location, [prior_treatment], dose_calc_method, critical_structures, prior_dose_data, sections, multiple=False)
     
-    def _generate_multiple_prior_text(self, physician: str, physicist: str, current_site: str, current_dose: float, current_fractions: int, spine_location: str, prior_treatments: List[PriorTreatment], dose_calc_method: str, critical_structures: List[str], prior_dose_data) -> str:
+    def _generate_multiple_prior_text(self, physician: str, physicist: str, current_site: str, current_dose: float, current_fractions: int, spine_location: str, prior_treatments: List[PriorTreatment], dose_calc_method: str, critical_structures: List[str], prior_dose_data, sections: Sequence[str] = None) -> str:
         """Generate text for multiple prior treatments."""
-        
-        # Format current site
-        current_site_display = current_site
-        if current_site == "spine" and spine_location:
-            current_site_display = f"{spine_location} spine"
-        
-        # Clean up current treatment integers
-        current_dose_display = int(current_dose) if current_dose == int(current_dose) else current_dose
-        current_fractions_display = int(current_fractions)
-        current_fraction_word = self._format_fractions(current_fractions_display)
-        current_treatment = f"{current_dose_display} Gy in {current_fractions_display} {current_fraction_word}"
-        
-        # Detect fractionation regime for current treatment
-        current_regime = self.detect_fractionation_regime(current_dose, current_fractions)
-        
-        # Check if ANY treatment has overlap
+        return self._generate_prior_text(physician, physicist, current_site, current_dose, current_fractions, spine_location, prior_treatments, dose_calc_method, critical_structures, prior_dose_data, sections, multiple=True)
+    
+    def _generate_prior_text(self, physician: str, physicist: str, current_site: str, current_dose: float, current_fractions: int, spine_location: str, prior_treatments: List[PriorTreatment], dose_calc_method: str, critical_structures: List[str], prior_dose_data, sections: Sequence[str] = None, multiple: bool = True) -> str:
+        """Assemble the write-up for one or more prior treatments from section fragments.
+        
+        Overlap cases get the structured format (methodology, dose statistics
+        and smart assessment); without overlap the simpler format applies and
+        there is no Analysis section. ``multiple`` selects the wording for
+        several priors ("one of the previous treatments", multi-course
+        methodology) over the single-prior wording.
+        """
+        current_site_display = _site_display(current_site, spine_location)
+        current_course = CURRENT_COURSE_TEMPLATE.format(
+            site=current_site_display, course=_course_text(current_dose, current_fractions)
+        )
         overlapping_treatments = [t for t in prior_treatments if t.has_overlap]
-        
-        # Get method abbreviation
-        if dose_calc_method.startswith("BED"):
-            method_abbreviation = "BED"
-        elif dose_calc_method.startswith("EQD2"):
-            method_abbreviation = "EQD2"
-        else:
-            method_abbreviation = "Raw Dose"
-        
-        # Determine constraint source based on current treatment regime and dose calc method
-        # EQD2 always uses QUANTEC; Raw Dose uses regime-appropriate constraints
-        if "EQD2" in dose_calc_method:
-            constraint_source = "QUANTEC dose-volume constraints"
-        else:
-            constraint_source = self.get_constraint_source_text(current_regime)
-        
-        if overlapping_treatments:
-            # STRUCTURED FORMAT FOR OVERLAP CASES
-            writeup = f"Dr. {physician} requested a medical physics consultation for --- for a prior dose assessment. This consultation provides dosimetric analysis and planning guidance for composite dose evaluation.\n\n"
-            
-            # PATIENT INFORMATION (includes current treatment and prior radiation history)
-            writeup += f"Patient Information:\n"
-            writeup += f"The patient has a {current_site_display} lesion, currently planned for {current_dose_display} Gy in {current_fractions_display} {current_fraction_word} to the {current_site_display}. "
-            
-            # Prior treatments - sorted chronologically
-            sorted_treatments = self._sort_treatments_chronologically(prior_treatments)
-            for i, treatment in enumerate(sorted_treatments):
-                prior_dose_display = int(treatment.dose) if treatment.dose == int(treatment.dose) else treatment.dose
-                prior_fractions_display = int(treatment.fractions)
-                prior_fraction_word = self._format_fractions(prior_fractions_display)
-                
-                # Use custom site if provided, otherwise use standard site
-                prior_site_display = treatment.custom_site if treatment.custom_site else treatment.site
-                if prior_site_display == "spine" and treatment.spine_location:
-                    prior_site_display = f"{treatment.spine_location} spine"
-                
-                writeup += f"In {treatment.month} {treatment.year}, the patient received external beam radiotherapy of {prior_dose_display} Gy in {prior_fractions_display} {prior_fraction_word} to the {prior_site_display}. "
-                if treatment.dicoms_unavailable:
-                    writeup += f"DICOM files for this treatment were unavailable for reconstruction. "
-            
-            # Add overlap statement
-            writeup += f"The current course of treatment has overlap with "
-            if len(overlapping_treatments) == 1:
-                writeup += f"one of the previous treatments"
-            else:
-                writeup += f"{len(overlapping_treatments)} of the previous treatments"
-            
+        overlap = bool(overlapping_treatments)
+        # Prior treatments - sorted chronologically
+        treatments = self._sort_treatments_chronologically(prior_treatments) if multiple else prior_treatments
+        
+        def introduction():
+            yield INTRODUCTION_TEMPLATES[overlap].format(physician=physician)
+        
+        def patient_information():
+            yield "Patient Information:\n"
+            yield current_course
+            if not overlap:
+                # No need to mention DICOM availability since we're not reconstructing
+                # A single prior closes the paragraph; several run on into the Assessment heading
+                yield from self._prior_course_fragments(treatments, mention_dicoms=False, end=" " if multiple else "\n\n")
+                return
+            yield from self._prior_course_fragments(treatments, mention_dicoms=True)
+            overlapping = len(overlapping_treatments)
+            yield OVERLAP_TEMPLATES[multiple].format(overlapping="one" if overlapping == 1 else overlapping)
             if critical_structures:
-                writeup += f" on the {', '.join(critical_structures)}"
-            writeup += f".\n\n"
-            
-            # ANALYSIS - DICOM-aware methodology, constraint source, and dose statistics
-            # Check if any overlapping treatment has DICOM unavailable
+                yield f" on the {', '.join(critical_structures)}"
+            yield ".\n\n"
+        
+        def analysis():
+            if not overlap:
+                return
+            method = method_abbreviation(dose_calc_method)
+            # Determine constraint source based on current treatment regime and dose calc method
+            # EQD2 always uses QUANTEC; Raw Dose uses regime-appropriate constraints
+            if dose_calc_method and "EQD2" in dose_calc_method:
+                constraint_source = "QUANTEC dose-volume constraints"
+            else:
+                constraint_source = self.get_constraint_source_text(self.detect_fractionation_regime(current_dose, current_fractions))
+            # DICOM-aware methodology: any overlapping treatment without DICOMs
             any_dicom_unavailable = any(t.dicoms_unavailable for t in overlapping_treatments)
-            writeup += f"Analysis:\n"
-            writeup += self._generate_multi_methodology_text(method_abbreviation, any_dicom_unavailable, constraint_source)
-            
+            yield "Analysis:\n"
+            if multiple:
+                yield self._generate_multi_methodology_text(method, any_dicom_unavailable, constraint_source)
+            else:
+                yield self._generate_methodology_text(method, any_dicom_unavailable, constraint_source)
             # Dose statistics integrated under Analysis
-            dose_statistics = prior_dose_data.dose_statistics if hasattr(prior_dose_data, 'dose_statistics') else []
-            filled_statistics = [stat for stat in dose_statistics if stat.value and stat.value.strip()]
-            
+            filled_statistics = [stat for stat in prior_dose_data.dose_statistics if stat.value and stat.value.strip()]
             if filled_statistics:
-                writeup += f"Below are the dose statistics:\n"
+                yield "Below are the dose statistics:\n"
                 for stat in filled_statistics:
-                    writeup += self._format_dose_statistic(stat)
-            
-            # ASSESSMENT - Smart analysis of whether constraints are exceeded
-            writeup += f"\nAssessment:\n"
-            writeup += self._generate_smart_assessment(dose_statistics, physician, physicist)
-        else:
-            # NO OVERLAP CASE - simpler format (no need to mention DICOM availability since we're not reconstructing)
-            writeup = f"Dr. {physician} requested a medical physics consultation for --- for a prior dose assessment.\n\n"
-            
-            # PATIENT INFORMATION (includes current treatment and prior radiation history)
-            writeup += f"Patient Information:\n"
-            writeup += f"The patient has a {current_site_display} lesion, currently planned for {current_dose_display} Gy in {current_fractions_display} {current_fraction_word} to the {current_site_display}. "
-            
-            # Prior treatments - sorted chronologically
-            sorted_treatments = self._sort_treatments_chronologically(prior_treatments)
-            for i, treatment in enumerate(sorted_treatments):
-                prior_dose_display = int(treatment.dose) if treatment.dose == int(treatment.dose) else treatment.dose
-                prior_fractions_display = int(treatment.fractions)
-                prior_fraction_word = self._format_fractions(prior_fractions_display)
-                
-                # Use custom site if provided, otherwise use standard site
-                prior_site_display = treatment.custom_site if treatment.custom_site else treatment.site
-                if prior_site_display == "spine" and treatment.spine_location:
-                    prior_site_display = f"{treatment.spine_location} spine"
-                
-                writeup += f"In {treatment.month} {treatment.year}, the patient received external beam radiotherapy of {prior_dose_display} Gy in {prior_fractions_display} {prior_fraction_word} to the {prior_site_display}. "
-            
-            writeup += f"\n\nAssessment:\n"
-            writeup += f"Review of the prior treatment fields and current treatment plan indicates minimal to no overlap between treatment volumes. "
-            writeup += f"The distance between field edges is sufficient to ensure that critical structures will not receive excessive cumulative dose. "
-            writeup += f"The proposed treatment can proceed as planned with standard toxicity monitoring. "
-            writeup += f"This evaluation was reviewed and approved by Dr. {physician} and Dr. {physicist}."
+                    yield self._format_dose_statistic(stat)
         
-        return writeup
\ No newline at end of file
+        def assessment():
+            if overlap:
+                # Smart analysis of whether constraints are exceeded
+                yield "\nAssessment:\n"
+                yield self._generate_smart_assessment(prior_dose_data.dose_statistics, physician, physicist)
+            else:
+                yield "\n\nAssessment:\n" if multiple else "Assessment:\n"
+                yield NO_OVERLAP_ASSESSMENT_TEMPLATE.format(physician=physician, physicist=physicist)
+        
+        return self._render_sections({
+            INTRODUCTION: introduction,
+            PATIENT_INFORMATION: patient_information,
+            ANALYSIS: analysis,
+            ASSESSMENT: assessment,
+        }, sections)
@@ -0,0 +1,124 @@
+"""Precomputed reference-data payloads.
+
+The GET option/reference endpoints (treatment sites, α/β tables, device
+info, fractionation schemes, ...) serve static data. This service serializes
+every payload to JSON bytes once, when it is built at startup, together with
+a strong ETag, so a request is a dictionary lookup and a 304 costs nothing.
+It also assembles the payloads into one bundle served by ``/api/reference/all``.
+Large tables are precomputed the same way but served on their own, outside
+the bundle.
+"""
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+import hashlib
+
+from app.registry import registry
+from app.responses import dumps
+
+# Payload name -> (registry service, attribute or zero-argument method).
+# Names mirror the endpoint paths below /api.
+REFERENCE_SOURCES: Dict[str, Tuple[str, str]] = {
+    "fusion/modalities": ("fusion", "modalities"),
+    "fusion/registration-methods": ("fusion", "registration_methods"),
+    "dibh/treatment-sites": ("dibh", "treatment_sites"),
+    "dibh/immobilization-devices": ("dibh", "immobilization_devices"),
+    "dibh/fractionation-schemes": ("dibh", "fractionation_schemes"),
+    "sbrt/treatment-sites": ("sbrt", "get_treatment_sites"),
+    "srs/brain-regions": ("srs", "get_brain_regions"),
+    "pacemaker/treatment-sites": ("pacemaker", "get_treatment_sites"),
+    "pacemaker/device-info": ("pacemaker", "get_device_info"),
+    "pacemaker/treatment-site-info": ("pacemaker", "get_treatment_site_info"),
+    "prior-dose/treatment-sites": ("prior_dose", "treatment_sites"),
+    "prior-dose/dose-calc-methods": ("prior_dose", "dose_calc_methods"),
+    "prior-dose/alpha-beta": ("prior_dose", "alpha_beta_ratios"),
+    "tbi/fractionation-schemes": ("tbi", "get_fractionation_schemes"),
+    "tbi/setup-options": ("tbi", "get_setup_options"),
+    "hdr/applicators": ("hdr", "get_applicators"),
+    "neurostimulator/treatment-sites": ("neurostimulator", "get_treatment_sites"),
+    "neurostimulator/device-types": ("neurostimulator", "get_device_types"),
+    "neurostimulator/device-info": ("neurostimulator", "get_device_info"),
+    "neurostimulator/treatment-site-info": ("neurostimulator", "get_treatment_site_info"),
+}
+
+# Payloads too large for the bundle, served only on their own endpoints:
+# name -> (registry service, attribute or zero-argument method)
+REFERENCE_STANDALONE_SOURCES: Dict[str, Tuple[str, str]] = {
+    # ~80 KB, ten times the rest of the reference data together
+    "prior-dose/fractionation-regime-table": ("prior_dose", "fractionation_regime_table"),
+}
+
+# Per-item payloads: name prefix -> (service, keys attribute, lookup method)
+REFERENCE_ITEM_SOURCES: Dict[str, Tuple[str, str, str]] = {
+    "sbrt/dose-constraints": ("sbrt", "dose_constraints", "get_dose_constraints"),
+    "sbrt/fractionation-schemes": ("sbrt", "fractionation_schemes", "get_fractionation_schemes"),
+    "hdr/applicator-info": ("hdr", "applicators", "get_applicator_info"),
+}
+
+
+def _etag(body: bytes) -> str:
+    return f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+
+@dataclass(frozen=True)
+class ReferencePayload:
+    """A serialized reference payload and its strong ETag."""
+    body: bytes
+    etag: str
+
+    @classmethod
+    def from_content(cls, content: Any) -> "ReferencePayload":
+        body = dumps(content)
+        return cls(body=body, etag=_etag(body))
+
+
+def _read(service: Any, attribute: str) -> Any:
+    value = getattr(service, attribute)
+    return value() if callable(value) else value
+
+
+class ReferenceData:
+    """Serialized reference payloads, built once per process."""
+
+    def __init__(self, resolve: Optional[Callable[[str], Any]] = None,
+                 sources: Dict[str, Tuple[str, str]] = REFERENCE_SOURCES,
+                 item_sources: Dict[str, Tuple[str, str, str]] = REFERENCE_ITEM_SOURCES,
+                 standalone_sources: Dict[str, Tuple[str, str]] = REFERENCE_STANDALONE_SOURCES):
+        """
+        Args:
+            resolve: Service name -> instance (defaults to the process-wide registry)
+            sources: Payload name -> (service, attribute)
+            item_sources: Payload name prefix -> (service, keys attribute, lookup method)
+            standalone_sources: Payload name -> (service, attribute), kept out of the bundle
+        """
+        resolve = resolve or registry.get
+        self.payloads: Dict[str, ReferencePayload] = {}
+        for name, (service_name, attribute) in sources.items():
+            self.payloads[name] = ReferencePayload.from_content(_read(resolve(service_name), attribute))
+        for prefix, (service_name, keys_attribute, method) in item_sources.items():
+            service = resolve(service_name)
+            for key in getattr(service, keys_attribute):
+                self.payloads[f"{prefix}/{key}"] = ReferencePayload.from_content(getattr(service, method)(key))
+        self.bundle = self._bundle(self.payloads.items())
+        self.standalone: Dict[str, ReferencePayload] = {
+            name: ReferencePayload.from_content(_read(resolve(service_name), attribute))
+            for name, (service_name, attribute) in standalone_sources.items()
+        }
+
+    @staticmethod
+    def _bundle(payloads: Iterable[Tuple[str, ReferencePayload]]) -> ReferencePayload:
+        """One JSON object of every payload, spliced from the already-serialized bodies."""
+        parts = [dumps(name) + b":" + payload.body for name, payload in payloads]
+        body = b"{" + b",".join(parts) + b"}"
+        return ReferencePayload(body=body, etag=_etag(body))
+
+    def get(self, name: str) -> Optional[ReferencePayload]:
+        """Payload for ``name`` (e.g. "prior-dose/alpha-beta"), or None if not precomputed."""
+        return self.payloads.get(name) or self.standalone.get(name)
+
+    def names(self) -> List[str]:
+        """Names of the payloads in the bundle."""
+        return sorted(self.payloads)
+
+    def standalone_names(self) -> List[str]:
+        """Names of the payloads served only on their own."""
+        return sorted(self.standalone)
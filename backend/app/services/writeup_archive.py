@@ -0,0 +1,136 @@
+"""Archive of generated write-ups.
+
+Lists are keyset-paginated newest-first: the cursor carries the
+(created_at, id) of the last row returned, so every page is an index range
+scan on (module|physician, created_at, id) regardless of how deep the client
+pages. Text search uses FTS5 on SQLite and ``to_tsvector`` on PostgreSQL.
+"""
+from datetime import datetime
+from sqlalchemy import Integer, and_, column, func, or_, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Any, Dict, List, Optional, Tuple
+import base64
+
+from app.models import Writeup
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(row: Writeup) -> str:
+    raw = f"{row.created_at.isoformat()}|{row.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """(created_at, id) of the last row on the previous page."""
+    try:
+        created_at, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid pagination cursor")
+
+
+def writeup_text(result: Any) -> str:
+    """The write-up text of a module response (model or dict)."""
+    if isinstance(result, dict):
+        return result.get("writeup", "")
+    return getattr(result, "writeup", "")
+
+
+def _fts5_query(query: str) -> str:
+    # Quote each term so user input can't use (or break) FTS5 query syntax
+    return " ".join('"{}"'.format(term.replace('"', '""')) for term in query.split())
+
+
+class WriteupArchive:
+    """Stores generated write-ups and pages through them."""
+
+    @staticmethod
+    def to_row(module: str, request: Any, result: Any) -> Dict[str, Any]:
+        """Column values for one generated write-up.
+
+        Args:
+            module: Module name (e.g. "prior_dose")
+            request: Validated request model
+            result: Module response
+
+        Returns:
+            Values for an insert into ``writeups``
+        """
+        common_info = getattr(request, "common_info", None)
+        return {
+            "module": module,
+            "request_json": request.model_dump(mode="json"),
+            "output": writeup_text(result),
+            "physician": common_info.physician.name if common_info else "",
+            "physicist": common_info.physicist.name if common_info else "",
+        }
+
+    async def record(self, session: AsyncSession, module: str, request: Any, result: Any) -> Writeup:
+        """Store one write-up and return the new row."""
+        row = Writeup(**self.to_row(module, request, result))
+        session.add(row)
+        await session.flush()
+        return row
+
+    async def get(self, session: AsyncSession, writeup_id: int) -> Optional[Writeup]:
+        return await session.get(Writeup, writeup_id)
+
+    async def _page(self, session: AsyncSession, statement, limit: int, cursor: Optional[str]) -> Dict[str, Any]:
+        if not 1 <= limit <= MAX_PAGE_SIZE:
+            raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+        if cursor:
+            created_at, row_id = decode_cursor(cursor)
+            statement = statement.where(or_(
+                Writeup.created_at < created_at,
+                and_(Writeup.created_at == created_at, Writeup.id < row_id),
+            ))
+        # One extra row tells us whether another page exists
+        statement = statement.order_by(Writeup.created_at.desc(), Writeup.id.desc()).limit(limit + 1)
+        rows: List[Writeup] = list((await session.execute(statement)).scalars())
+        items = rows[:limit]
+        return {
+            "items": items,
+            "next_cursor": encode_cursor(items[-1]) if len(rows) > limit else None,
+        }
+
+    async def list(self, session: AsyncSession, module: Optional[str] = None, physician: Optional[str] = None,
+                   limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """Newest-first page of write-ups, optionally for one module and/or physician.
+
+        Returns:
+            {"items": [Writeup, ...], "next_cursor": str or None}
+
+        Raises:
+            ValueError: If the cursor or limit is invalid
+        """
+        statement = select(Writeup)
+        if module:
+            statement = statement.where(Writeup.module == module)
+        if physician:
+            statement = statement.where(Writeup.physician == physician)
+        return await self._page(session, statement, limit, cursor)
+
+    async def search(self, session: AsyncSession, query: str, module: Optional[str] = None,
+                     limit: int = DEFAULT_PAGE_SIZE, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """Newest-first page of write-ups whose text matches every term of ``query``.
+
+        Raises:
+            ValueError: If the query is empty or the cursor or limit is invalid
+        """
+        if not query.strip():
+            raise ValueError("Search query must not be empty")
+        statement = select(Writeup)
+        if session.get_bind().dialect.name == "postgresql":
+            statement = statement.where(
+                func.to_tsvector("english", Writeup.output).op("@@")(func.plainto_tsquery("english", query))
+            )
+        else:
+            matches = text("SELECT rowid FROM writeups_fts WHERE writeups_fts MATCH :query").bindparams(
+                query=_fts5_query(query)
+            ).columns(column("rowid", Integer))
+            statement = statement.where(Writeup.id.in_(matches))
+        if module:
+            statement = statement.where(Writeup.module == module)
+        return await self._page(session, statement, limit, cursor)
@@ -0,0 +1,126 @@
+"""Content-addressed cache of generated write-ups.
+
+Write-up generation is a pure function of the validated request for every
+module except the pacemaker risk path, which always recalculates. Entries are
+keyed by a SHA-256 of the module name and the request's canonical JSON
+(fields in declaration order, dict keys sorted, no whitespace), so re-submitting
+the same form is a dictionary lookup. The same key doubles as the HTTP ETag.
+"""
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+from pydantic import BaseModel
+import hashlib
+import json
+import os
+import threading
+import time
+
+WRITEUP_CACHE_SIZE = int(os.getenv("WRITEUP_CACHE_SIZE", "1024"))
+WRITEUP_CACHE_TTL = float(os.getenv("WRITEUP_CACHE_TTL", "3600"))  # seconds; 0 disables expiry
+# Bump to invalidate client ETags when write-up templates change between deploys
+WRITEUP_CACHE_NAMESPACE = os.getenv("WRITEUP_CACHE_NAMESPACE", "1")
+
+# Modules whose generation must never be served from cache
+UNCACHED_MODULES = frozenset({"pacemaker"})
+
+
+def request_key(module: str, request: BaseModel, namespace: str = WRITEUP_CACHE_NAMESPACE) -> str:
+    """Deterministic hash of a validated request.
+
+    Args:
+        module: Module name (e.g. "fusion")
+        request: Validated Pydantic request
+        namespace: Cache namespace, part of the key
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    canonical = json.dumps(
+        request.model_dump(mode="json"), sort_keys=True, separators=(",", ":"), ensure_ascii=False
+    )
+    digest = hashlib.sha256(f"{namespace}:{module}:".encode())
+    digest.update(canonical.encode())
+    return digest.hexdigest()
+
+
+class WriteupCache:
+    """Thread-safe LRU cache with optional time-to-live."""
+
+    def __init__(self, max_entries: int = WRITEUP_CACHE_SIZE, ttl_seconds: float = WRITEUP_CACHE_TTL,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            max_entries: Entries kept before the least recently used is evicted; 0 disables caching
+            ttl_seconds: Age after which an entry is dropped; 0 keeps entries until evicted
+            clock: Time source (overridable in tests)
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key(self, module: str, request: BaseModel) -> str:
+        return request_key(module, request)
+
+    def get(self, key: str) -> Optional[Any]:
+        """Cached value for ``key``, or None on a miss or expired entry."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl_seconds and self._clock() - entry[0] > self.ttl_seconds:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: str, value: Any) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (self._clock(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_generate(self, module: str, request: BaseModel, generate: Callable[[Any], Any],
+                        key: Optional[str] = None) -> Tuple[Any, str, bool]:
+        """Return (result, key, hit), generating and storing the result on a miss.
+
+        Results of modules in UNCACHED_MODULES are generated every time.
+        Exceptions from ``generate`` propagate and nothing is stored.
+        """
+        key = key or self.key(module, request)
+        if module in UNCACHED_MODULES:
+            return generate(request), key, False
+        result = self.get(key)
+        if result is not None:
+            return result, key, True
+        result = generate(request)
+        self.put(key, result)
+        return result, key, False
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            }
@@ -0,0 +1,129 @@
+"""Router loading and cold-start accounting.
+
+In the default ``eager`` mode every router (and the services and schemas it
+imports) is loaded when ``app.main`` is imported and every service is built
+at startup. In ``lazy`` mode a router is imported and included on the first
+request to its prefix, and services are built on first use, so a cold start
+only pays for what the first request touches.
+
+Configuration (environment):
+    STARTUP_MODE: "eager" (default) or "lazy"
+    COLD_START_BUDGET_MS: Import-to-ready budget; exceeding it logs a warning (default 2000)
+"""
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import importlib
+import logging
+import os
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+EAGER = "eager"
+LAZY = "lazy"
+
+STARTUP_MODE = os.getenv("STARTUP_MODE", EAGER)
+COLD_START_BUDGET_MS = float(os.getenv("COLD_START_BUDGET_MS", "2000"))
+
+# (router module, prefix, OpenAPI tags)
+ROUTERS: Tuple[Tuple[str, str, List[str]], ...] = (
+    ("app.routers.fusion", "/api/fusion", ["Fusion"]),
+    ("app.routers.dibh", "/api/dibh", ["DIBH"]),
+    ("app.routers.sbrt", "/api/sbrt", ["SBRT"]),
+    ("app.routers.srs", "/api/srs", ["SRS"]),
+    ("app.routers.pacemaker", "/api/pacemaker", ["Pacemaker"]),
+    ("app.routers.prior_dose", "/api/prior-dose", ["Prior Dose"]),
+    ("app.routers.tbi", "/api/tbi", ["TBI"]),
+    ("app.routers.hdr", "/api/hdr", ["HDR"]),
+    ("app.routers.neurostimulator", "/api/neurostimulator", ["Neurostimulator"]),
+    ("app.routers.batch", "/api/batch", ["Batch"]),
+    ("app.routers.reference", "/api/reference", ["Reference"]),
+    ("app.routers.archive", "/api/archive", ["Archive"]),
+)
+
+
+class StartupReport:
+    """Import and startup timings served by ``/health/startup``."""
+
+    def __init__(self, mode: str = STARTUP_MODE, budget_ms: float = COLD_START_BUDGET_MS):
+        self.mode = mode
+        self.budget_ms = budget_ms
+        self.started = time.perf_counter()
+        self.imports: Dict[str, Dict[str, Any]] = {}
+        self.ddl: Optional[str] = None
+        self.startup_ms: Optional[float] = None
+        self.ready_ms: Optional[float] = None
+
+    def record_import(self, module_path: str, elapsed_ms: float, modules_loaded: int, on_request: bool) -> None:
+        self.imports[module_path] = {
+            "import_ms": round(elapsed_ms, 3),
+            "modules_loaded": modules_loaded,
+            "on_request": on_request,
+        }
+
+    def ready(self, startup_ms: float) -> None:
+        """Mark the app ready to serve; warns when the cold start is over budget."""
+        self.startup_ms = startup_ms
+        if self.ready_ms is not None:
+            # Restarted in the same process (e.g. test clients); not a cold start
+            return
+        self.ready_ms = (time.perf_counter() - self.started) * 1000
+        if self.ready_ms > self.budget_ms:
+            logger.warning("Cold start took %.1f ms (budget %.0f ms)", self.ready_ms, self.budget_ms)
+
+    def as_dict(self) -> Dict[str, Any]:
+        imports = sorted(self.imports.items(), key=lambda item: item[1]["import_ms"], reverse=True)
+        return {
+            "mode": self.mode,
+            "ddl": self.ddl,
+            "startup_ms": self.startup_ms,
+            "ready_ms": self.ready_ms,
+            "budget_ms": self.budget_ms,
+            "within_budget": self.ready_ms is not None and self.ready_ms <= self.budget_ms,
+            "router_imports": dict(imports),
+        }
+
+
+def include_router(app, module_path: str, prefix: str, tags: List[str], report: StartupReport,
+                   on_request: bool = False) -> None:
+    """Import a router module (timing it) and include its router in ``app``."""
+    loaded_before = len(sys.modules)
+    start = time.perf_counter()
+    module = importlib.import_module(module_path)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    report.record_import(module_path, elapsed_ms, len(sys.modules) - loaded_before, on_request)
+    app.include_router(module.router, prefix=prefix, tags=tags)
+    # Regenerate the OpenAPI schema with the new routes
+    app.openapi_schema = None
+
+
+class LazyRouterMiddleware:
+    """Pure ASGI middleware including each router on the first request to its prefix.
+
+    Requests for the OpenAPI schema or docs load every pending router so the
+    documentation stays complete.
+    """
+
+    def __init__(self, app, fastapi_app, report: StartupReport,
+                 routers: Sequence[Tuple[str, str, List[str]]] = ROUTERS):
+        self.app = app
+        self.fastapi_app = fastapi_app
+        self.report = report
+        self._pending = list(routers)
+        self._lock = threading.Lock()
+        self._docs_paths = {fastapi_app.openapi_url, fastapi_app.docs_url, fastapi_app.redoc_url}
+
+    def _load(self, path: str) -> None:
+        with self._lock:
+            load_all = path in self._docs_paths
+            for entry in list(self._pending):
+                module_path, prefix, tags = entry
+                if load_all or path == prefix or path.startswith(prefix + "/"):
+                    include_router(self.fastapi_app, module_path, prefix, tags, self.report, on_request=True)
+                    self._pending.remove(entry)
+
+    async def __call__(self, scope, receive, send):
+        if self._pending and scope["type"] in ("http", "websocket"):
+            self._load(scope["path"])
+        await self.app(scope, receive, send)
@@ -0,0 +1,85 @@
+"""Structured, sampled debug tracing.
+
+Services record diagnostic events through a per-module :class:`Tracer`
+instead of printing to stdout. Events are DEBUG records on the ``trace.<module>``
+loggers, written in logfmt (``event key=value ...``) and only formatted when
+they are actually emitted, so a disabled tracer costs a level check.
+
+Configuration (environment):
+    TRACE_LEVEL: Level of the ``trace`` loggers. Events are emitted at DEBUG,
+        so set ``TRACE_LEVEL=DEBUG`` to see them (default INFO, i.e. off).
+    TRACE_SAMPLE_RATE: Fraction of traces (0.0-1.0) to keep when enabled.
+        The decision is made once in :meth:`Tracer.begin` and applies to
+        every event of that request.
+"""
+from contextvars import ContextVar
+from typing import Any, Dict, Optional
+import logging
+import os
+import random
+
+TRACE_LEVEL = os.getenv("TRACE_LEVEL", "INFO").upper()
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "1.0"))
+
+_root = logging.getLogger("trace")
+_root.setLevel(TRACE_LEVEL)
+
+# Sampling decision for the trace running in the current context
+_sampled: ContextVar[Optional[bool]] = ContextVar("trace_sampled", default=None)
+
+
+class _Fields:
+    """Defers logfmt formatting until the record is emitted."""
+
+    __slots__ = ("fields",)
+
+    def __init__(self, fields: Dict[str, Any]):
+        self.fields = fields
+
+    def __str__(self) -> str:
+        return " ".join(f"{key}={_format_value(value)}" for key, value in self.fields.items())
+
+
+def _format_value(value: Any) -> str:
+    text = str(value)
+    if not text or any(c in text for c in ' ="'):
+        return '"' + text.replace('"', '\\"') + '"'
+    return text
+
+
+class Tracer:
+    """Debug event recorder for one module."""
+
+    def __init__(self, name: str, sample_rate: Optional[float] = None):
+        self.logger = logging.getLogger(f"trace.{name}")
+        self.sample_rate = TRACE_SAMPLE_RATE if sample_rate is None else sample_rate
+
+    def begin(self, event: str, **fields: Any) -> bool:
+        """Start a trace (typically once per request) and record its first event.
+
+        Returns:
+            Whether this trace is being recorded
+        """
+        sampled = self.logger.isEnabledFor(logging.DEBUG) and random.random() < self.sample_rate
+        _sampled.set(sampled)
+        if sampled:
+            self.logger.debug("%s %s", event, _Fields(fields))
+        return sampled
+
+    @property
+    def active(self) -> bool:
+        """True when events would be emitted; guard costly field values with it."""
+        if not self.logger.isEnabledFor(logging.DEBUG):
+            return False
+        sampled = _sampled.get()
+        return sampled if sampled is not None else random.random() < self.sample_rate
+
+    def event(self, event: str, **fields: Any) -> None:
+        """Record an event in the current trace."""
+        if self.active:
+            self.logger.debug("%s %s", event, _Fields(fields))
+
+
+def get_tracer(name: str) -> Tracer:
+    """Tracer for a module, e.g. ``get_tracer("fusion")``."""
+    return Tracer(name)
@@ -0,0 +1,283 @@
+"""Latency, throughput and allocation benchmarks for every API module.
+
+Each scenario is sent to the app in-process through httpx's ASGI transport,
+with no server or network involved. Generate payloads come from the
+repository's QA scripts (see :mod:`qa.scripts`); neurostimulator has no QA
+script, so its payload is inline. The batch scenario sends one item per
+module, and the archive scenarios read whatever the configured database
+already holds (nothing is written to it). For each endpoint the
+report gives requests/sec, p50/p95/p99 latency, and the peak memory
+allocated per request (tracemalloc, measured in a separate pass so tracing
+doesn't skew the timings).
+
+The write-up cache and archive are disabled while benchmarking, so generate
+endpoints measure real generation rather than cache hits. App and httpx
+logging are raised to WARNING for the run, so per-request INFO lines don't
+skew the timings.
+
+Usage (from backend/):
+    python -m qa.benchmark                      # compare against the baseline
+    python -m qa.benchmark --update-baseline    # record a new baseline
+    python -m qa.benchmark --only prior_dose --requests 200 --concurrency 8
+
+Exits non-zero when any metric is worse than the baseline by more than the
+threshold (default 25%).
+"""
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import argparse
+import asyncio
+import json
+import logging
+import math
+import statistics
+import sys
+import time
+import tracemalloc
+
+import httpx
+
+from qa.scripts import load_script
+
+BASELINE_PATH = Path(__file__).with_name("benchmark_baseline.json")
+DEFAULT_THRESHOLD = 0.25
+DEFAULT_REQUESTS = 100
+DEFAULT_ALLOC_REQUESTS = 10
+# Latency changes smaller than this are scheduler noise, whatever the percentage
+NOISE_FLOOR_MS = 1.0
+# Loggers raised to WARNING while benchmarking
+QUIET_LOGGERS = ("app", "httpx")
+
+# Metric -> True when higher is better
+METRICS = {"rps": True, "p50_ms": False, "p95_ms": False, "p99_ms": False, "alloc_peak_kib": False}
+
+NEUROSTIMULATOR_PAYLOAD = {
+    "common_info": {
+        "physician": {"name": "Galvan", "role": "physician"},
+        "physicist": {"name": "Kirby", "role": "physicist"},
+    },
+    "neurostimulator_data": {
+        "treatment_site": "spine", "dose": 30.0, "fractions": 10,
+        "field_distance": "More than 10 cm from treatment field edge", "neutron_producing": "No",
+        "device_vendor": "Medtronic Neuromodulation", "device_model": "Intellis", "device_serial": "",
+        "device_type": "Spinal Cord Stimulator", "tps_max_dose": 0.5, "osld_mean_dose": 0.0,
+    },
+}
+
+
+@dataclass
+class Scenario:
+    """One endpoint call to benchmark."""
+    name: str
+    method: str
+    path: str
+    payload: Optional[Dict[str, Any]] = field(default=None)
+
+
+def build_scenarios() -> List[Scenario]:
+    """One generate scenario per module, a batch of all of them, archive reads and reference reads."""
+    fusion = load_script("test_fusion_comprehensive")
+    dibh = load_script("test_dibh_comprehensive")
+    sbrt = load_script("test_sbrt_comprehensive")
+    srs = load_script("test_srs_comprehensive")
+    pacemaker = load_script("test_pacemaker_comprehensive")
+    prior_dose = load_script("test_prior_dose_comprehensive")
+    tbi = load_script("test_tbi_comprehensive")
+    hdr = load_script("test_hdr_comprehensive")
+
+    prior_treatment = {
+        "site": "lung", "custom_site": "", "dose": 60.0, "fractions": 30, "month": "June", "year": 2023,
+        "spine_location": "", "has_overlap": True, "dicoms_unavailable": False,
+    }
+    generate = [
+        Scenario("fusion", "POST", "/api/fusion/generate", fusion.create_payload(registrations=[
+            {"primary": "CT", "secondary": "MRI", "method": "Rigid"},
+            {"primary": "CT", "secondary": "PET/CT", "method": "Deformable"},
+        ])),
+        Scenario("dibh", "POST", "/api/dibh/generate", dibh.create_payload("left breast", 40, 15)),
+        Scenario("sbrt", "POST", "/api/sbrt/generate",
+                 sbrt.create_payload("lung", 50, 5, "4DCT", "PTV_50", 25.1)),
+        Scenario("srs", "POST", "/api/srs/generate", srs.create_srs_payload("Galvan", "Kirby", [
+            srs.create_lesion("left frontal lobe", 2.5, "SRS", 18, 1),
+            srs.create_lesion("right parietal lobe", 4.0, "SRT", 25, 5),
+        ])),
+        Scenario("pacemaker", "POST", "/api/pacemaker/generate", pacemaker.create_payload()),
+        Scenario("prior_dose", "POST", "/api/prior-dose/generate", prior_dose.create_payload(
+            "Galvan", "Kirby", "thorax", 50.0, 25, [prior_treatment],
+            critical_structures=["spinal cord", "lungs"],
+        )),
+        Scenario("tbi", "POST", "/api/tbi/generate", tbi.create_payload(2.0, 1, "AP/PA", "none")),
+        Scenario("hdr", "POST", "/api/hdr/generate", hdr.create_payload("T&O", "gynecological", 3)),
+        Scenario("neurostimulator", "POST", "/api/neurostimulator/generate", NEUROSTIMULATOR_PAYLOAD),
+    ]
+    batch = {"items": [{"module": s.name, "request": s.payload} for s in generate]}
+    return generate + [
+        Scenario("batch", "POST", "/api/batch/generate", batch),
+        Scenario("archive_list", "GET", "/api/archive/?limit=50"),
+        Scenario("archive_search", "GET", "/api/archive/search?q=physics&limit=50"),
+        Scenario("reference_bundle", "GET", "/api/reference/all"),
+        Scenario("prior_dose_alpha_beta", "GET", "/api/prior-dose/alpha-beta"),
+    ]
+
+
+def percentile(samples: List[float], q: float) -> float:
+    """Nearest-rank percentile (q in 0..100) of ``samples``."""
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, math.ceil(q / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def _send(client: httpx.AsyncClient, scenario: Scenario) -> None:
+    response = await client.request(scenario.method, scenario.path, json=scenario.payload)
+    if response.status_code != 200:
+        raise RuntimeError(f"{scenario.name}: {scenario.method} {scenario.path} returned {response.status_code}")
+
+
+async def measure(client: httpx.AsyncClient, scenario: Scenario, requests: int = DEFAULT_REQUESTS,
+                  concurrency: int = 1, alloc_requests: int = DEFAULT_ALLOC_REQUESTS) -> Dict[str, float]:
+    """Benchmark one scenario.
+
+    Args:
+        client: Client bound to the app through the ASGI transport
+        scenario: Endpoint and payload
+        requests: Timed requests
+        concurrency: Requests in flight at once
+        alloc_requests: Requests sent with tracemalloc enabled
+
+    Returns:
+        {"rps", "p50_ms", "p95_ms", "p99_ms", "alloc_peak_kib"}
+    """
+    await _send(client, scenario)  # warm-up (lazy imports, first-use caches)
+
+    latencies: List[float] = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def timed():
+        async with semaphore:
+            start = time.perf_counter()
+            await _send(client, scenario)
+            latencies.append(time.perf_counter() - start)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(timed() for _ in range(requests)))
+    elapsed = time.perf_counter() - started
+
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(alloc_requests):
+            tracemalloc.reset_peak()
+            baseline, _ = tracemalloc.get_traced_memory()
+            await _send(client, scenario)
+            peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "rps": round(requests / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "alloc_peak_kib": round(statistics.median(peaks) / 1024, 1) if peaks else 0.0,
+    }
+
+
+async def run(scenarios: List[Scenario], requests: int = DEFAULT_REQUESTS, concurrency: int = 1,
+              alloc_requests: int = DEFAULT_ALLOC_REQUESTS) -> Dict[str, Dict[str, float]]:
+    """Start the app in-process and benchmark every scenario in turn."""
+    from app.main import app
+    from app.registry import registry
+    from app.services.archive_writer import ArchiveWriter
+    from app.services.writeup_cache import WriteupCache
+
+    # Per-request INFO logging (app middleware, httpx) would otherwise be part of every timing
+    loggers = [logging.getLogger(name) for name in QUIET_LOGGERS]
+    log_levels = [logger.level for logger in loggers]
+    for logger in loggers:
+        logger.setLevel(logging.WARNING)
+    with registry.override("writeup_cache", WriteupCache(max_entries=0)), \
+            registry.override("archive_writer", ArchiveWriter(enabled=False)):
+        await app.router.startup()
+        try:
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+                return {
+                    scenario.name: await measure(client, scenario, requests, concurrency, alloc_requests)
+                    for scenario in scenarios
+                }
+        finally:
+            await app.router.shutdown()
+            for logger, level in zip(loggers, log_levels):
+                logger.setLevel(level)
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+            threshold: float = DEFAULT_THRESHOLD, noise_floor_ms: float = NOISE_FLOOR_MS) -> List[str]:
+    """Regressions beyond ``threshold`` (a fraction) relative to the baseline, as messages.
+
+    Timing regressions must also exceed ``noise_floor_ms`` in absolute terms
+    (for req/s, in time per request), so sub-millisecond endpoints don't flap.
+    """
+    regressions = []
+    for name, metrics in results.items():
+        reference = baseline.get(name)
+        if not reference:
+            continue
+        for metric, higher_is_better in METRICS.items():
+            old, new = reference.get(metric), metrics.get(metric)
+            if not old or new is None:
+                continue
+            change = (old - new) / old if higher_is_better else (new - old) / old
+            if metric == "rps":
+                delta_ms = 1000 / new - 1000 / old if new else float("inf")
+            elif metric.endswith("_ms"):
+                delta_ms = new - old
+            else:
+                delta_ms = float("inf")
+            if change > threshold and delta_ms > noise_floor_ms:
+                regressions.append(f"{name} {metric}: {old} -> {new} ({change:+.0%} worse)")
+    return regressions
+
+
+def format_table(results: Dict[str, Dict[str, float]]) -> str:
+    header = f"{'endpoint':<24}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'alloc KiB':>12}"
+    rows = [
+        f"{name:<24}{m['rps']:>10}{m['p50_ms']:>10}{m['p95_ms']:>10}{m['p99_ms']:>10}{m['alloc_peak_kib']:>12}"
+        for name, m in results.items()
+    ]
+    return "\n".join([header, *rows])
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--requests", type=int, default=DEFAULT_REQUESTS, help="Timed requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=1, help="Requests in flight at once")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Allowed regression as a fraction (0.25 = 25%%)")
+    parser.add_argument("--noise-floor-ms", type=float, default=NOISE_FLOOR_MS,
+                        help="Ignore latency regressions smaller than this many milliseconds")
+    parser.add_argument("--only", nargs="*", help="Scenario names to run")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true", help="Write the results as the new baseline")
+    args = parser.parse_args(argv)
+
+    scenarios = [s for s in build_scenarios() if not args.only or s.name in args.only]
+    results = asyncio.run(run(scenarios, args.requests, args.concurrency))
+    print(format_table(results))
+
+    if args.update_baseline:
+        args.baseline.write_text(json.dumps(results, indent=2, sort_keys=True) + "\n")
+        print(f"Baseline written to {args.baseline}")
+        return 0
+    if not args.baseline.exists():
+        print("No baseline to compare against; run with --update-baseline")
+        return 0
+    regressions = compare(results, json.loads(args.baseline.read_text()), args.threshold, args.noise_floor_ms)
+    for message in regressions:
+        print(f"REGRESSION {message}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
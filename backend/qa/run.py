@@ -0,0 +1,159 @@
+"""Run the repository's QA scripts in parallel against the app in-process.
+
+Every root QA script (``test_*_comprehensive.py``, ``test_*_module.py``, ...)
+is loaded with its ``requests`` calls routed to one in-process test client
+(see :mod:`qa.scripts`), so no backend needs to be running. The scripts then
+run concurrently, each in its own worker thread. Their requests are served
+by the app's event loop, and each script writes its usual markdown report.
+
+Each script runs exactly what ``python <script>.py`` would: the body of its
+``if __name__ == "__main__":`` block.
+
+Usage (from backend/):
+    python -m qa.run                       # every script, reports in the repository root
+    python -m qa.run --module sbrt srs     # only these modules' scripts
+    python -m qa.run --jobs 4 --verbose    # limit parallelism, show script output
+
+Exits non-zero if any script raised or exited with an error.
+"""
+from dataclasses import dataclass
+from pathlib import Path
+from types import ModuleType
+from typing import Callable, List, Optional
+import argparse
+import ast
+import asyncio
+import contextlib
+import inspect
+import os
+import sys
+import time
+
+from qa.scripts import QA_SCRIPTS, REPO_ROOT, discover_scripts, load_script
+
+
+@dataclass
+class ScriptResult:
+    """Outcome of one QA script."""
+    name: str
+    ok: bool
+    calls: int
+    seconds: float
+    error: Optional[str] = None
+
+
+def entry_point(module: ModuleType) -> Callable[[], None]:
+    """The script's ``if __name__ == "__main__":`` block, runnable in the module's namespace."""
+    tree = ast.parse(inspect.getsource(module))
+    for node in tree.body:
+        if (isinstance(node, ast.If) and isinstance(node.test, ast.Compare)
+                and isinstance(node.test.left, ast.Name) and node.test.left.id == "__name__"):
+            code = compile(ast.Module(body=node.body, type_ignores=[]), module.__file__, "exec")
+            return lambda: exec(code, vars(module))
+    raise ValueError(f"{module.__name__} has no __main__ block")
+
+
+def run_script(name: str, module: ModuleType) -> ScriptResult:
+    """Run one loaded script to completion (called in a worker thread)."""
+    started = time.perf_counter()
+    error = None
+    try:
+        entry_point(module)()
+    except SystemExit as e:
+        if e.code not in (None, 0):
+            error = f"exited with status {e.code}"
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    return ScriptResult(name, error is None, module.requests.calls, time.perf_counter() - started, error)
+
+
+def select_scripts(modules: Optional[List[str]] = None) -> List[str]:
+    """Script names for ``modules`` (every discovered script when None)."""
+    if not modules:
+        return discover_scripts()
+    unknown = [module for module in modules if module not in QA_SCRIPTS]
+    if unknown:
+        raise ValueError(f"Unknown modules: {', '.join(unknown)}")
+    return [name for module in modules for name in QA_SCRIPTS[module]]
+
+
+async def run(names: List[str], client, jobs: int = 8, verbose: bool = False) -> List[ScriptResult]:
+    """Load every script (serially, as loading swaps ``requests``), then run them concurrently.
+
+    Args:
+        names: Script names
+        client: Test client bound to a started app
+        jobs: Scripts running at once
+        verbose: Keep the scripts' console output
+
+    Returns:
+        One result per script, in ``names`` order
+    """
+    modules = {}
+    for name in names:
+        module = load_script(name, client)
+        entry_point(module)  # fail fast on a script that can't be run
+        if not verbose:
+            # Module globals shadow the builtin, silencing only this script
+            module.print = lambda *args, **kwargs: None
+        modules[name] = module
+
+    semaphore = asyncio.Semaphore(jobs)
+
+    async def bounded(name: str) -> ScriptResult:
+        async with semaphore:
+            return await asyncio.to_thread(run_script, name, modules[name])
+
+    return list(await asyncio.gather(*(bounded(name) for name in names)))
+
+
+def format_summary(results: List[ScriptResult], seconds: float) -> str:
+    lines = [f"{'script':<34}{'result':>8}{'calls':>8}{'seconds':>10}"]
+    for result in results:
+        status = "ok" if result.ok else "FAILED"
+        lines.append(f"{result.name:<34}{status:>8}{result.calls:>8}{result.seconds:>10.2f}")
+        if result.error:
+            lines.append(f"    {result.error}")
+    calls = sum(result.calls for result in results)
+    lines.append(f"{len(results)} scripts, {calls} requests in {seconds:.2f}s")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--module", nargs="*", help=f"Modules to test ({', '.join(QA_SCRIPTS)})")
+    parser.add_argument("--jobs", type=int, default=8, help="Scripts running at once")
+    parser.add_argument("--output-dir", type=Path, default=REPO_ROOT, help="Where the markdown reports are written")
+    parser.add_argument("--verbose", action="store_true", help="Show the scripts' console output")
+    args = parser.parse_args(argv)
+
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.registry import registry
+    from app.services.archive_writer import ArchiveWriter
+
+    names = select_scripts(args.module)
+    started = time.perf_counter()
+    # QA write-ups are not consults; keep them out of the archive
+    with registry.override("archive_writer", ArchiveWriter(enabled=False)), TestClient(app) as client:
+        args.output_dir.mkdir(parents=True, exist_ok=True)
+        # The scripts write their reports relative to the working directory
+        with _chdir(args.output_dir):
+            results = asyncio.run(run(names, client, args.jobs, args.verbose))
+    print(format_summary(results, time.perf_counter() - started))
+    return 0 if all(result.ok for result in results) else 1
+
+
+@contextlib.contextmanager
+def _chdir(path: Path):
+    # contextlib.chdir needs Python 3.11; the Docker image runs 3.10
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
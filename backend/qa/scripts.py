@@ -0,0 +1,154 @@
+"""Load the repository's QA scripts against the app in-process.
+
+The QA scripts at the repository root (``test_*_comprehensive.py`` and
+friends) talk to a live server through ``requests``. :func:`load_script`
+imports one with ``requests`` bound to :class:`InProcessRequests`, a minimal
+requests-compatible client that sends every call to the ASGI app through an
+in-process client instead of the network. The scripts' payload builders,
+suites and report writers are then usable unchanged by the benchmark and
+QA runners.
+"""
+from pathlib import Path
+from types import ModuleType, SimpleNamespace
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit
+import importlib.util
+import sys
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+# Module -> QA scripts at the repository root
+QA_SCRIPTS: Dict[str, tuple] = {
+    "fusion": ("test_fusion_comprehensive", "test_fusion_combinations", "test_fusion_lesions"),
+    "dibh": ("test_dibh_comprehensive", "test_dibh_backend"),
+    "sbrt": ("test_sbrt_comprehensive", "test_sbrt_module"),
+    "srs": ("test_srs_comprehensive",),
+    "pacemaker": ("test_pacemaker_comprehensive", "test_pacemaker_module"),
+    "prior_dose": ("test_prior_dose_comprehensive", "test_prior_dose_clinical_qa", "test_prior_dose_core"),
+    "tbi": ("test_tbi_comprehensive",),
+    "hdr": ("test_hdr_comprehensive",),
+}
+
+
+class RequestException(Exception):
+    pass
+
+
+class HTTPError(RequestException):
+    def __init__(self, message: str, response: Any = None):
+        super().__init__(message)
+        self.response = response
+
+
+class ConnectionError(RequestException):
+    pass
+
+
+class Timeout(RequestException):
+    pass
+
+
+class InProcessResponse:
+    """The parts of ``requests.Response`` the QA scripts use."""
+
+    def __init__(self, response):
+        self._response = response
+        self.status_code = response.status_code
+        self.headers = response.headers
+        self.content = response.content
+        self.text = response.text
+        self.url = str(response.url)
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    def json(self) -> Any:
+        return self._response.json()
+
+    def raise_for_status(self) -> None:
+        if not self.ok:
+            raise HTTPError(f"{self.status_code} Error for url: {self.url}", response=self)
+
+
+class InProcessRequests(ModuleType):
+    """Stand-in for the ``requests`` module that routes calls to an in-process client.
+
+    Only the path and query of each URL are kept, so the scripts' hard-coded
+    ``http://localhost:8000`` base URLs reach the app directly.
+    """
+
+    def __init__(self, client=None):
+        super().__init__("requests")
+        self.client = client
+        self.calls = 0
+        self.exceptions = SimpleNamespace(
+            RequestException=RequestException, HTTPError=HTTPError,
+            ConnectionError=ConnectionError, Timeout=Timeout,
+        )
+        self.RequestException = RequestException
+        self.HTTPError = HTTPError
+        self.ConnectionError = ConnectionError
+        self.Timeout = Timeout
+
+    def request(self, method: str, url: str, **kwargs) -> InProcessResponse:
+        if self.client is None:
+            raise ConnectionError("No in-process client bound to the QA script")
+        parts = urlsplit(url)
+        path = parts.path + (f"?{parts.query}" if parts.query else "")
+        kwargs.pop("timeout", None)
+        self.calls += 1
+        return InProcessResponse(self.client.request(method, path, **kwargs))
+
+    def get(self, url: str, **kwargs) -> InProcessResponse:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> InProcessResponse:
+        return self.request("POST", url, **kwargs)
+
+    def put(self, url: str, **kwargs) -> InProcessResponse:
+        return self.request("PUT", url, **kwargs)
+
+    def delete(self, url: str, **kwargs) -> InProcessResponse:
+        return self.request("DELETE", url, **kwargs)
+
+    def Session(self) -> "InProcessRequests":
+        # Sessions only pool connections, which an in-process client doesn't need
+        return self
+
+
+def discover_scripts() -> List[str]:
+    """Names of every QA script at the repository root."""
+    return sorted(path.stem for path in REPO_ROOT.glob("test_*.py"))
+
+
+def load_script(name: str, client=None) -> ModuleType:
+    """Import a root QA script with ``requests`` routed to ``client``.
+
+    Args:
+        name: Script module name, e.g. "test_dibh_comprehensive"
+        client: Synchronous in-process HTTP client (e.g. a TestClient); with
+            None the script can build payloads but any HTTP call fails
+
+    Returns:
+        The freshly executed script module; its ``requests`` attribute is the
+        :class:`InProcessRequests` instance, which counts the calls made
+    """
+    path = REPO_ROOT / f"{name}.py"
+    if not path.exists():
+        raise ValueError(f"QA script not found: {path}")
+    module_name = f"qa_scripts.{name}"
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    previous: Optional[ModuleType] = sys.modules.get("requests")
+    sys.modules["requests"] = InProcessRequests(client)
+    # Registered so dataclasses and pickling can resolve the module
+    sys.modules[module_name] = module
+    try:
+        spec.loader.exec_module(module)
+    finally:
+        if previous is None:
+            sys.modules.pop("requests", None)
+        else:
+            sys.modules["requests"] = previous
+    return module
@@ -1,17 +1,19 @@
+import os
+
+# The app's own engine uses in-memory SQLite under test
+os.environ.setdefault("DB_PROFILE", "test")
+
 import pytest
 import asyncio
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import sessionmaker
 from fastapi.testclient import TestClient
-from app.database import Base
+from app.database import TEST, Base, create_engine_for_profile
 from app.main import app
 from typing import AsyncGenerator, Generator
 
-# Test database URL
-TEST_DATABASE_URL = "sqlite+aiosqlite:///./test.db"
-
-# Create test async engine
-test_engine = create_async_engine(TEST_DATABASE_URL, echo=True)
+# In-memory SQLite shared across sessions through a StaticPool
+test_engine = create_engine_for_profile(TEST)
 
 # Create test async session
 test_async_session = sessionmaker(
@@ -0,0 +1,95 @@
+from sqlalchemy import func, select
+from datetime import datetime, timezone
+import asyncio
+
+from app.models import Writeup
+from app.schemas.fusion import FusionRequest
+from app.services.archive_writer import DROP, SPILL, ArchiveWriter
+from app.services.writeup_archive import WriteupArchive
+from tests.conftest import test_async_session
+from tests.test_writeup_cache import FUSION_REQUEST
+
+REQUEST = FusionRequest.model_validate(FUSION_REQUEST)
+
+async def _count(session):
+    return (await session.execute(select(func.count()).select_from(Writeup))).scalar()
+
+def _failing_session():
+    raise ConnectionError("database unavailable")
+
+async def test_flush_writes_buffered_rows_in_batches(db_session):
+    writer = ArchiveWriter(batch_size=2, session_maker=test_async_session)
+    for i in range(5):
+        writer.submit("fusion", REQUEST, {"writeup": f"Fusion {i}"})
+    assert await writer.flush() == 5
+    assert await _count(db_session) == 5
+    assert writer.stats()["buffered"] == 0
+
+async def test_full_buffer_drops(db_session):
+    writer = ArchiveWriter(queue_size=2, overflow=DROP, session_maker=test_async_session)
+    for i in range(3):
+        writer.submit("fusion", REQUEST, {"writeup": f"Fusion {i}"})
+    assert writer.stats()["dropped"] == 1
+    await writer.stop()
+    assert await _count(db_session) == 2
+
+async def test_failed_flush_spills_and_replays(db_session, tmp_path):
+    spill_path = str(tmp_path / "spill.jsonl")
+    writer = ArchiveWriter(overflow=SPILL, spill_path=spill_path, session_maker=_failing_session)
+    writer.submit("fusion", REQUEST, {"writeup": "Spilled fusion"})
+    assert await writer.flush() == 0
+    assert (writer.spilled, writer.failed_flushes) == (1, 1)
+
+    writer.session_maker = test_async_session
+    assert await writer.flush() == 1
+    rows = (await db_session.execute(select(Writeup))).scalars().all()
+    assert [(row.output, row.physician) for row in rows] == [("Spilled fusion", "Galvan")]
+
+async def test_spill_replayed_in_batches(db_session, tmp_path):
+    spill_path = tmp_path / "spill.jsonl"
+    writer = ArchiveWriter(batch_size=2, overflow=SPILL, spill_path=str(spill_path), session_maker=test_async_session)
+    rows = [WriteupArchive.to_row("fusion", REQUEST, {"writeup": f"Spilled {i}"}) for i in range(5)]
+    writer._overflow([{**row, "created_at": datetime.now(timezone.utc)} for row in rows])
+    inserted = []
+    insert = writer._insert
+
+    async def recording_insert(rows):
+        inserted.append(len(rows))
+        await insert(rows)
+
+    writer._insert = recording_insert
+    assert await writer.flush() == 5
+    assert inserted == [2, 2, 1]
+    assert not spill_path.exists()
+    assert await _count(db_session) == 5
+
+async def test_stop_waits_for_a_running_flush(db_session):
+    writer = ArchiveWriter(batch_size=1, flush_interval=60, session_maker=test_async_session)
+    writer.start()
+    insert = writer._insert
+    started = asyncio.Event()
+
+    async def slow_insert(rows):
+        started.set()
+        await asyncio.sleep(0.05)
+        await insert(rows)
+
+    writer._insert = slow_insert
+    writer.submit("fusion", REQUEST, {"writeup": "In flight"})
+    await started.wait()
+    await writer.stop()
+    assert await _count(db_session) == 1
+    assert writer.stats()["written"] == 1
+
+def test_generated_writeups_reach_the_archive(test_client):
+    from app.registry import registry
+    from app.services.writeup_cache import WriteupCache
+
+    with registry.override("writeup_cache", WriteupCache()):
+        assert test_client.post("/api/fusion/generate", json=FUSION_REQUEST).status_code == 200
+        test_client.post("/api/fusion/generate", json=FUSION_REQUEST)  # cache hit: not archived again
+    assert test_client.get("/health/archive").json()["buffered"] == 1
+
+    test_client.portal.call(registry.get("archive_writer").flush)
+    items = test_client.get("/api/archive/", params={"module": "fusion"}).json()["items"]
+    assert len(items) == 1 and items[0]["physician"] == "Galvan"
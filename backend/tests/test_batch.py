@@ -0,0 +1,80 @@
+import json
+from fastapi.testclient import TestClient
+from app.registry import registry
+from app.services.generation_pool import GenerationPool
+from app.services.writeup_cache import WriteupCache
+
+COMMON_INFO = {
+    "physician": {"name": "Galvan", "role": "physician"},
+    "physicist": {"name": "Kirby", "role": "physicist"},
+}
+
+HDR_REQUEST = {
+    "common_info": COMMON_INFO,
+    "hdr_data": {"applicator_type": "T&O", "treatment_site": "gynecological", "number_of_channels": 3},
+}
+
+FUSION_REQUEST = {
+    "common_info": COMMON_INFO,
+    "fusion_data": {
+        "anatomical_region": "brain",
+        "registrations": [{"primary": "CT", "secondary": "MRI", "method": "Rigid"}],
+    },
+}
+
+def test_batch_generate_mixed_modules(test_client: TestClient):
+    """Valid items are generated; invalid ones fail on their own without aborting the batch."""
+    response = test_client.post("/api/batch/generate", json={"items": [
+        {"module": "hdr", "id": "a", "request": HDR_REQUEST},
+        {"module": "fusion", "id": "b", "request": FUSION_REQUEST},
+        {"module": "hdr", "id": "c", "request": {"common_info": COMMON_INFO}},
+        {"module": "unknown", "id": "d", "request": {}},
+    ]})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["succeeded"] == 2
+    assert body["failed"] == 2
+    statuses = {r["id"]: r["status"] for r in body["results"]}
+    assert statuses == {"a": "ok", "b": "ok", "c": "invalid", "d": "invalid"}
+    assert "writeup" in body["results"][0]["result"]
+    assert [r["index"] for r in body["results"]] == [0, 1, 2, 3]
+
+def test_batch_accepts_router_prefix_names(test_client: TestClient):
+    response = test_client.post("/api/batch/generate", json={"items": [
+        {"module": "prior-dose", "request": {
+            "common_info": COMMON_INFO,
+            "prior_dose_data": {"current_site": "brain", "current_dose": 30, "current_fractions": 10,
+                                "current_month": "January", "current_year": 2025},
+        }},
+    ]})
+    assert response.status_code == 200
+    assert response.json()["results"][0]["status"] == "ok"
+
+def test_batch_stream_emits_one_record_per_item(test_client: TestClient):
+    """The streaming endpoint writes one NDJSON line per item."""
+    response = test_client.post("/api/batch/stream", json={"items": [
+        {"module": "hdr", "id": "a", "request": HDR_REQUEST},
+        {"module": "unknown", "id": "b", "request": {}},
+        {"module": "fusion", "id": "c", "request": FUSION_REQUEST},
+    ]})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    records = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(r["index"] for r in records) == [0, 1, 2]
+    assert {r["id"]: r["status"] for r in records} == {"a": "ok", "b": "invalid", "c": "ok"}
+
+def test_empty_batch_rejected(test_client: TestClient):
+    assert test_client.post("/api/batch/generate", json={"items": []}).status_code == 422
+
+def test_batch_items_go_through_generation_pool(test_client: TestClient):
+    """A saturated pool turns pooled items away as 'busy'; inline modules still run."""
+    saturated = GenerationPool(workers=1, queue_size=0, pooled_modules={"fusion"}, expose_metrics=False)
+    saturated.pending = saturated.capacity  # every slot taken
+    with registry.override("generation_pool", saturated), registry.override("writeup_cache", WriteupCache()):
+        response = test_client.post("/api/batch/generate", json={"items": [
+            {"module": "fusion", "id": "a", "request": FUSION_REQUEST},
+            {"module": "hdr", "id": "b", "request": HDR_REQUEST},
+        ]})
+    saturated.close()
+    assert {r["id"]: r["status"] for r in response.json()["results"]} == {"a": "busy", "b": "ok"}
+    assert saturated.stats()["rejected"] == 1
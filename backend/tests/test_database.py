@@ -0,0 +1,44 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import DEV, PROD, TEST, PoolStats, create_engine_for_profile, engine_options
+
+def test_profiles():
+    assert engine_options(DEV, "sqlite+aiosqlite:///./x.db") == {"echo": True}
+    prod = engine_options(PROD, "postgresql+asyncpg://db/toolkit")
+    assert prod["echo"] is False and prod["pool_pre_ping"] and prod["pool_size"] > 0
+    assert "pool_size" not in engine_options(PROD, "sqlite+aiosqlite:///./x.db")
+    assert engine_options(TEST, "sqlite+aiosqlite:///:memory:")["poolclass"] is StaticPool
+    with pytest.raises(ValueError):
+        engine_options("staging", "sqlite+aiosqlite:///./x.db")
+
+async def test_pool_stats_count_checkouts():
+    engine = create_engine_for_profile(TEST)
+    stats = PoolStats(engine)
+    for _ in range(2):
+        async with engine.connect() as conn:
+            assert (await conn.execute(text("select 1"))).scalar() == 1
+    report = stats.stats()
+    assert (report["checkouts"], report["checked_out"], report["connects"]) == (2, 0, 1)
+    assert report["mean_wait_ms"] is not None
+    await engine.dispose()
+
+async def test_every_checkout_is_timed():
+    """Sessions (as used by the archive writer) and engine connections all record a pool wait."""
+    engine = create_engine_for_profile(TEST)
+    stats = PoolStats(engine)
+    session_maker = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with session_maker() as session:
+        await session.execute(text("select 1"))
+    await engine.dispose()  # replaces the pool
+    async with engine.connect() as conn:
+        await conn.execute(text("select 1"))
+    counts, _ = stats.wait.snapshot()[()]
+    assert sum(counts) == stats.stats()["checkouts"] == 2
+    await engine.dispose()
+
+def test_database_report(test_client):
+    assert "checkouts" in test_client.get("/health/db").json()
@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+from app.services.dose_engine import CompositeDoseEngine, DoseCourse, eqd2, bed, isoeffective_dose
+from app.services.prior_dose import PriorDoseService
+
+@pytest.fixture(scope="module")
+def grids():
+    rng = np.random.default_rng(7)
+    shape = (12, 10, 9)
+    prior = rng.uniform(0, 40, shape)
+    current = rng.uniform(0, 30, shape)
+    cord = np.zeros(shape, dtype=bool)
+    cord[4:8, 3:6, :] = True
+    return prior, current, cord
+
+def test_lq_conversions():
+    """30 Gy in 10 fractions with α/β = 3 → BED 60 Gy, EQD2 36 Gy."""
+    assert bed(30, 10, 3) == pytest.approx(60.0)
+    assert eqd2(30, 10, 3) == pytest.approx(36.0)
+    assert eqd2(40, 20, 2) == pytest.approx(40.0)
+
+def test_chunked_statistics_match_direct_calculation(grids):
+    """Small chunks give the same answer as converting the whole structure at once."""
+    prior, current, cord = grids
+    engine = CompositeDoseEngine(lambda name: 2.0, chunk_voxels=37)
+    stats = engine.structure_statistics(
+        [DoseCourse(prior, 20), DoseCourse(current, 10)], {"Spinal Cord": cord}, vx_thresholds=[30]
+    )["Spinal Cord"]
+
+    expected = eqd2(prior[cord], 20, 2.0) + eqd2(current[cord], 10, 2.0)
+    assert stats.voxels == cord.sum()
+    assert stats.dmax == pytest.approx(expected.max())
+    assert stats.dmean == pytest.approx(expected.mean())
+    assert stats.vx[30.0] == pytest.approx(100.0 * (expected >= 30).mean())
+
+def test_fill_dose_statistics(grids, tmp_path):
+    """Dmax constraints are filled from the composite; unsupported metrics stay blank."""
+    prior, current, cord = grids
+    np.save(tmp_path / "prior.npy", prior)
+    service = PriorDoseService()
+    constraints = [
+        {"structure": "Spinal Cord", "constraint": "Dmax", "limit": "<45 Gy", "unit": "Gy"},
+        {"structure": "Spinal Cord", "constraint": "D0.35cc", "limit": "<18 Gy", "unit": "Gy"},
+    ]
+    stats = service.fill_dose_statistics(
+        [DoseCourse(tmp_path / "prior.npy", 20), DoseCourse(current, 10)],
+        {"spinal cord": cord}, constraints, "EQD2 (Equivalent Dose in 2 Gy fractions)"
+    )
+    expected = eqd2(prior[cord], 20, 2) + eqd2(current[cord], 10, 2)
+    assert stats[0].value == f"{expected.max():.1f}"
+    assert stats[1].value == ""
+
+def test_fill_dose_statistics_vx_in_cc_for_volume_limits(grids):
+    """Vx is reported in cc when the limit is an absolute volume, % otherwise."""
+    prior, current, cord = grids
+    service = PriorDoseService()
+    constraints = [
+        {"structure": "Spinal Cord", "constraint": "V20", "limit": "<1 cc", "unit": "%"},
+        {"structure": "Spinal Cord", "constraint": "V20", "limit": "<35%", "unit": "%"},
+    ]
+    stats = service.fill_dose_statistics(
+        [DoseCourse(prior, 20), DoseCourse(current, 10)], {"spinal cord": cord}, constraints, "Raw Dose",
+        voxel_volume_cc=0.027,
+    )
+    above = int(np.count_nonzero((prior + current)[cord] >= 20))
+    assert (stats[0].value, stats[0].unit) == (f"{above * 0.027:.1f}", "cc")
+    assert (stats[1].value, stats[1].unit) == (f"{100.0 * above / cord.sum():.1f}", "%")
+
+def test_mismatched_grids_rejected(grids):
+    prior, current, cord = grids
+    engine = CompositeDoseEngine(lambda name: 3.0)
+    with pytest.raises(ValueError):
+        engine.structure_statistics([DoseCourse(prior, 20), DoseCourse(current[:-1], 10)], {"Cord": cord})
+
+def test_isoeffective_dose_inverts_bed():
+    """54 Gy in 27 fractions (α/β = 2) restated in 5 fractions keeps the same BED."""
+    dose_5fx = isoeffective_dose(bed(54, 27, 2), 5, 2)
+    assert bed(dose_5fx, 5, 2) == pytest.approx(bed(54, 27, 2))
+    assert isoeffective_dose(bed(30, 10, 3), 10, 3) == pytest.approx(30)
@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+from app.services.dose_grid_store import DoseGridStore, bounding_box
+
+@pytest.fixture(scope="module")
+def grids():
+    rng = np.random.default_rng(7)
+    shape = (12, 10, 9)
+    prior = rng.uniform(0, 40, shape)
+    cord = np.zeros(shape, dtype=bool)
+    cord[4:8, 3:6, :] = True
+    return prior, cord
+
+@pytest.mark.parametrize("fmt", ["npy", "raw"])
+def test_grid_store_round_trip(grids, tmp_path, fmt):
+    """Stored grids come back memory-mapped with their header intact."""
+    prior, cord = grids
+    store = DoseGridStore(tmp_path)
+    header = store.save("prior-1", prior.astype(np.float32), spacing=(2.0, 2.0, 2.5), fmt=fmt, slab=5)
+    assert header.shape == prior.shape
+    assert header.voxel_volume_cc == pytest.approx(0.01)
+    assert store.grid_ids() == ["prior-1"]
+
+    grid = store.open("prior-1")
+    assert isinstance(grid, np.memmap)
+    np.testing.assert_allclose(grid, prior.astype(np.float32))
+    np.testing.assert_allclose(store.read_masked("prior-1", cord), prior.astype(np.float32)[cord])
+    assert sum(s.shape[0] for _, _, s in store.iter_slabs("prior-1", slab=5)) == prior.shape[0]
+
+def test_grid_store_rejects_unsafe_ids(tmp_path):
+    with pytest.raises(ValueError):
+        DoseGridStore(tmp_path).header("../etc/passwd")
+
+def test_create_refuses_existing_id_unless_overwriting(tmp_path):
+    """Replacing a grid in another format must not leave the old data file behind."""
+    store = DoseGridStore(tmp_path)
+    store.save("plan", np.ones((2, 3, 4), dtype=np.float32), fmt="npy")
+    with pytest.raises(ValueError):
+        store.create("plan", (2, 3, 4))
+
+    store.save("plan", np.zeros((2, 3, 4), dtype=np.float32), fmt="raw", overwrite=True)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["plan.json", "plan.raw"]
+    assert store.open("plan").sum() == 0
+
+def test_bounding_box():
+    mask = np.zeros((5, 5, 5), dtype=bool)
+    assert bounding_box(mask) is None
+    mask[1:3, 2, 4] = True
+    assert bounding_box(mask) == (slice(1, 3), slice(2, 3), slice(4, 5))
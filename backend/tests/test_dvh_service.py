@@ -0,0 +1,105 @@
+import numpy as np
+import pytest
+from app.services.dvh_service import DVHService, StructureDVH, decode_runs, parse_dvh_metric
+from app.services.dose_engine import DoseCourse, eqd2
+from app.services.prior_dose import PriorDoseService
+
+@pytest.fixture
+def dose_and_mask():
+    rng = np.random.default_rng(3)
+    dose = rng.uniform(0, 60, (10, 8, 6))
+    mask = np.zeros(dose.shape, dtype=bool)
+    mask[2:6, 1:5, 1:4] = True
+    return dose, mask
+
+def test_dvh_metrics():
+    """Dcc, Vx and Dmean on a simple ten-voxel structure."""
+    dvh = StructureDVH(np.arange(1.0, 11.0), voxel_volume_cc=0.1)
+    assert dvh.dmax == 10.0
+    assert dvh.dmean == pytest.approx(5.5)
+    assert dvh.dose_to_volume_cc(0.35) == 7.0  # hottest 4 voxels
+    assert dvh.volume_at_dose(8) == pytest.approx(30.0)
+    assert dvh.volume_at_dose(8, relative=False) == pytest.approx(0.3)
+    edges, volume = dvh.cumulative(bin_width=1.0)
+    assert volume[0] == pytest.approx(100.0)
+    assert volume[-1] == pytest.approx(10.0)
+
+def test_run_length_masks_match_boolean(dose_and_mask):
+    dose, mask = dose_and_mask
+    flat = np.flatnonzero(mask.reshape(-1))
+    breaks = np.flatnonzero(np.diff(flat) != 1) + 1
+    runs = [(int(run[0]), len(run)) for run in np.split(flat, breaks)]
+    np.testing.assert_array_equal(decode_runs(runs, mask.size), flat)
+
+def test_registered_structure_dvh_is_cached(dose_and_mask):
+    dose, mask = dose_and_mask
+    service = DVHService()
+    assert service.register_structure("plan-1", "cord", mask, mask.size) == mask.sum()
+    first = service.structure_dvh(dose, "cord", 0.027, grid_key="plan-1")
+    assert service.structure_dvh(dose, "cord", 0.027, grid_key="plan-1") is first
+    assert first.dmax == pytest.approx(dose[mask].max())
+
+def test_structure_ids_are_scoped_per_grid(dose_and_mask):
+    """The same structure id on two grids keeps two independent masks."""
+    dose, mask = dose_and_mask
+    service = DVHService()
+    service.register_structure("plan-1", "cord", mask, mask.size)
+    service.register_structure("plan-2", "cord", ~mask, mask.size)
+    assert service.structure_dvh(dose, "cord", 0.027, grid_key="plan-1").voxels == mask.sum()
+    assert service.structure_dvh(dose, "cord", 0.027, grid_key="plan-2").voxels == (~mask).sum()
+    with pytest.raises(KeyError):
+        service.structure_dvh(dose, "cord", 0.027, grid_key="plan-3")
+
+def test_constraints_evaluated_against_dose_grid(dose_and_mask):
+    """Suggested constraints pick up DVH values and a pass/fail status."""
+    dose, mask = dose_and_mask
+    constraints = PriorDoseService().get_constraints_for_sites(
+        ["head and neck"], "Raw Dose", dose_grid=dose, structure_masks={"Spinal Cord": mask}, voxel_volume_cc=0.027
+    )
+    cord = next(c for c in constraints if c["structure"] == "Spinal Cord" and c["constraint"] == "Dmax")
+    assert cord["value"] == f"{dose[mask].max():.2f} Gy"
+    assert cord["status"] == ("exceeded" if dose[mask].max() > 45 else "within")
+    others = [c for c in constraints if c["structure"] != "Spinal Cord"]
+    assert all(c["status"] == "unknown" for c in others)
+
+def test_physical_grid_converted_for_eqd2_limits(dose_and_mask):
+    """With EQD2 the physical grid is converted with the structure's α/β before comparing."""
+    dose, mask = dose_and_mask
+    service = PriorDoseService()
+    constraints = service.get_constraints_for_sites(
+        ["head and neck"], "EQD2", dose_grid=dose, structure_masks={"Spinal Cord": mask},
+        voxel_volume_cc=0.027, dose_grid_fractions=30,
+    )
+    cord = next(c for c in constraints if c["structure"] == "Spinal Cord" and c["constraint"] == "Dmax")
+    expected = eqd2(dose[mask].max(), 30, service.get_alpha_beta("Spinal Cord"))
+    assert cord["value"] == f"{expected:.2f} Gy"
+    with pytest.raises(ValueError):
+        service.get_constraints_for_sites(
+            ["head and neck"], "EQD2", dose_grid=dose, structure_masks={"Spinal Cord": mask}, voxel_volume_cc=0.027
+        )
+
+def test_bed_grid_not_compared_to_dose_limits(dose_and_mask):
+    """A BED grid is never checked against the physical/EQD2 limits (e.g. cord <45 Gy)."""
+    dose, mask = dose_and_mask
+    service = PriorDoseService()
+    with pytest.raises(ValueError):
+        service.get_constraints_for_sites(
+            ["head and neck"], "BED", current_dose=40, current_fractions=20, dose_grid=dose,
+            structure_masks={"Spinal Cord": mask}, voxel_volume_cc=0.027, dose_grid_fractions=20,
+        )
+    with pytest.raises(ValueError):
+        service.fill_dose_statistics(
+            [DoseCourse(dose, 20)], {"Spinal Cord": mask},
+            [{"structure": "Spinal Cord", "constraint": "Dmax", "limit": "<45 Gy", "unit": "Gy"}], "BED",
+        )
+
+@pytest.mark.parametrize("constraint_type, expected", [
+    ("Dmax (0.035cc)", ("dcc", 0.035)),
+    ("D0.35cc", ("dcc", 0.35)),
+    ("D95%", ("dpct", 95.0)),
+    ("V12", ("vx", 12.0)),
+    ("Critical volume", None),
+    ("D1-10cc", None),
+])
+def test_parse_dvh_metric(constraint_type, expected):
+    assert parse_dvh_metric(constraint_type) == expected
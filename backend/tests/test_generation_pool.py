@@ -0,0 +1,51 @@
+import asyncio
+import threading
+
+from fastapi.testclient import TestClient
+import pytest
+
+from app.metrics import metrics
+from app.registry import registry
+from app.services.generation_pool import GenerationPool, PoolSaturatedError
+from app.services.writeup_cache import WriteupCache
+from tests.test_writeup_cache import FUSION_REQUEST
+
+def test_inline_and_pooled_execution():
+    pool = GenerationPool(workers=1, queue_size=0, pooled_modules={"sbrt"}, expose_metrics=False)
+    try:
+        caller = threading.get_ident()
+        inline = asyncio.run(pool.run("fusion", None, lambda r: threading.get_ident()))
+        pooled = asyncio.run(pool.run("sbrt", None, lambda r: threading.get_ident()))
+        assert inline == caller and pooled != caller
+        assert (pool.stats()["inline"], pool.stats()["completed"]) == (1, 1)
+    finally:
+        pool.close()
+
+def test_saturated_pool_rejects():
+    pool = GenerationPool(workers=1, queue_size=0, pooled_modules={"sbrt"}, retry_after=3, expose_metrics=False)
+    release = threading.Event()
+
+    async def scenario():
+        running = asyncio.ensure_future(pool.run("sbrt", None, lambda r: release.wait(5)))
+        await asyncio.sleep(0)
+        with pytest.raises(PoolSaturatedError) as excinfo:
+            await pool.run("sbrt", None, lambda r: "never")
+        release.set()
+        await running
+        return excinfo.value.retry_after
+
+    try:
+        assert asyncio.run(scenario()) == 3
+        assert pool.stats()["rejected"] == 1
+    finally:
+        pool.close()
+
+def test_generate_returns_503_when_saturated(test_client: TestClient):
+    saturated = GenerationPool(workers=1, queue_size=0, pooled_modules={"fusion"}, retry_after=2)
+    saturated.pending = saturated.capacity  # every slot taken
+    with registry.override("generation_pool", saturated), registry.override("writeup_cache", WriteupCache()):
+        response = test_client.post("/api/fusion/generate", json=FUSION_REQUEST)
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "2"
+        assert 'generation_pool_rejected_total{pool="thread"} 1' in metrics.render()
+    saturated.close()
@@ -0,0 +1,26 @@
+from fastapi.testclient import TestClient
+from app.metrics import Histogram
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("latency_seconds", "Test latency", buckets=(0.1, 1.0))
+    histogram.observe(0.05, route="/a")
+    histogram.observe(0.5, route="/a")
+    histogram.observe(5.0, route="/a")
+    lines = histogram.render()
+    assert 'latency_seconds_bucket{route="/a",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{route="/a",le="1"} 2' in lines
+    assert 'latency_seconds_bucket{route="/a",le="+Inf"} 3' in lines
+    assert 'latency_seconds_count{route="/a"} 3' in lines
+
+def test_requests_are_timed_per_route_template(test_client: TestClient):
+    response = test_client.get("/api/sbrt/dose-constraints/lung")
+    assert float(response.headers["X-Process-Time"]) >= 0
+    test_client.get("/no/such/path")
+
+    metrics = test_client.get("/metrics")
+    assert metrics.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = metrics.text
+    assert '# TYPE http_request_duration_seconds histogram' in body
+    assert ('http_request_duration_seconds_count{method="GET",route="/api/sbrt/dose-constraints/{site}",'
+            f'status="{response.status_code}"}}') in body
+    assert 'route="unmatched",status="404"' in body
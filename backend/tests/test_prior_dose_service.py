@@ -0,0 +1,205 @@
+import numpy as np
+import pytest
+from pydantic import ValidationError
+from app.schemas.prior_dose import PriorDoseRequest, PriorTreatment, WRITEUP_SECTIONS
+from app.services.dose_engine import eqd2
+from app.services.prior_dose import PriorDoseService
+from app.services.constraint_limits import ParsedLimit, parse_limit
+
+@pytest.fixture(scope="module")
+def service() -> PriorDoseService:
+    return PriorDoseService()
+
+# Constraint catalog tests
+def test_constraints_only_include_verified(service: PriorDoseService):
+    """Suggested constraints come from the verified QUANTEC entries for the site."""
+    constraints = service.get_constraints_for_sites(["thorax"], "Raw Dose", 60, 30)
+    verified = [c for c in service.quantec_constraints["thorax"] if c["verified"]]
+    assert [(c["structure"], c["constraint"]) for c in constraints] == [
+        (c["structure"], c["constraint"]) for c in verified
+    ]
+    assert all(c["source"] == "CONVENTIONAL" for c in constraints)
+    assert all(c["region"] for c in constraints)
+
+def test_constraints_deduplicated_across_sites(service: PriorDoseService):
+    """Structures shared between sites are only listed once."""
+    constraints = service.get_constraints_for_sites(["thorax", "lung", "spine"], "EQD2")
+    keys = [(c["structure"], c["constraint"]) for c in constraints]
+    assert len(keys) == len(set(keys))
+    assert all(c["source"] == "QUANTEC (EQD2)" for c in constraints)
+
+def test_unknown_site_has_no_constraints(service: PriorDoseService):
+    assert service.get_constraints_for_sites(["nowhere"]) == []
+
+# Limit parsing tests
+def test_parse_limit_range():
+    """Ranges keep both bounds; comparisons use the first number."""
+    parsed = parse_limit("<30-32 Gy")
+    assert parsed == ParsedLimit(operator="<", lower=30.0, upper=32.0, unit="Gy")
+    assert parsed.evaluate(31) == "exceeded"
+    assert parsed.evaluate(29.9) == "within"
+
+@pytest.mark.parametrize("value, limit, expected", [
+    ("48 Gy", "<54 Gy", "within"),
+    ("55.2 Gy", "<54 Gy", "exceeded"),
+    ("40", ">50%", "exceeded"),
+    ("60", "≥50%", "within"),
+    ("n/a", "<54 Gy", "unknown"),
+    ("30", "Per protocol", "unknown"),
+])
+def test_compare_value_to_limit(service: PriorDoseService, value, limit, expected):
+    assert service._compare_value_to_limit(value, limit) == expected
+
+# Bulk EQD2/BED conversion tests
+def test_convert_doses_broadcasts_and_looks_up_structures(service: PriorDoseService):
+    result = service.convert_doses([30, 20], [10], structures=["Spinal Cord", None], alpha_betas=[None, 10])
+    assert result["alpha_beta"].tolist() == [2.0, 10.0]
+    assert result["eqd2"].tolist() == pytest.approx([37.5, 20 * (2 + 10) / 12])
+    assert result["bed"].tolist() == pytest.approx([75.0, 24.0])
+    assert "equivalent_dose" not in result
+
+def test_convert_doses_rejects_rows_without_alpha_beta(service: PriorDoseService):
+    with pytest.raises(ValueError, match="neither a structure"):
+        service.convert_doses([30, 20], [10, 5], structures=["Spinal Cord", ""])
+    with pytest.raises(ValueError, match="same length"):
+        service.convert_doses([30, 20, 10], [10, 5])
+
+def test_eqd2_endpoint(test_client):
+    response = test_client.post("/api/prior-dose/eqd2", json={
+        "doses": [54.0] * 3, "fractions": [27], "structures": ["Spinal Cord", "Lung", "Tumor"],
+        "alpha_betas": [None, None, 10], "target_fractions": 27,
+    })
+    assert response.status_code == 200
+    body = response.json()
+    assert body["alpha_beta"] == [2.0, 3.0, 10.0]
+    assert body["eqd2"][0] == 54.0
+    assert body["equivalent_dose"] == [54.0, 54.0, 54.0]
+    assert test_client.post("/api/prior-dose/eqd2", json={"doses": [30], "fractions": [0], "alpha_betas": [3]}).status_code == 400
+
+# Remaining dose budget tests
+def test_dose_budget_inverts_lq(service: PriorDoseService):
+    """Spinal cord (<45 Gy EQD2, α/β 2) after 30 Gy/10 fx (37.5 Gy EQD2) leaves 7.5 Gy EQD2."""
+    priors = [PriorTreatment(site="spine", dose=30, fractions=10, month="June", year=2020)]
+    budget = service.remaining_dose_budget(["head and neck"], priors, "June", 2024, [1, 5, 15])
+    cord = next(row for row in budget["budgets"] if row["structure"] == "Spinal Cord")
+    assert cord["remaining_eqd2"] == pytest.approx(7.5)
+    for fractions, total in zip(budget["fraction_options"], cord["max_total_dose"]):
+        assert eqd2(total, fractions, 2) == pytest.approx(7.5)
+    assert cord["max_dose_per_fraction"][1] == pytest.approx(cord["max_total_dose"][1] / 5)
+
+    recovered = service.remaining_dose_budget(["head and neck"], priors, "June", 2024, [5], apply_recovery=True)
+    cord = next(row for row in recovered["budgets"] if row["structure"] == "Spinal Cord")
+    assert cord["prior_eqd2"] == pytest.approx(18.75)
+
+def test_dose_budget_exhausted_and_skipped(service: PriorDoseService):
+    priors = [PriorTreatment(site="spine", dose=50, fractions=25, month="June", year=2023)]
+    budget = service.remaining_dose_budget(["thorax"], priors, "June", 2024, [5])
+    cord = next(row for row in budget["budgets"] if row["structure"] == "Spinal Cord")
+    assert cord["remaining_eqd2"] == 0 and cord["max_total_dose"] == [0]
+    assert all(parse_limit(c["limit"]).unit != "Gy" for c in budget["skipped"])
+    with pytest.raises(ValueError):
+        service.remaining_dose_budget(["thorax"], priors, "June", 2024, [0])
+
+def test_dose_budget_endpoint(test_client):
+    response = test_client.post("/api/prior-dose/dose-budget", json={
+        "sites": ["head and neck"], "current_month": "June", "current_year": 2024,
+        "prior_treatments": [{"site": "spine", "dose": 30, "fractions": 10, "month": "June", "year": 2020}],
+        "fraction_options": [5, 15],
+    })
+    assert response.status_code == 200
+    body = response.json()
+    assert body["fraction_options"] == [5, 15]
+    assert all(len(row["max_total_dose"]) == 2 for row in body["budgets"])
+
+# Batched regime detection tests
+def test_batched_regimes_match_scalar_detection(service: PriorDoseService):
+    doses = np.arange(0, 1001) / 10
+    fractions = np.arange(-1, 42)[:, None]
+    regimes = service.detect_fractionation_regimes(doses[None, :], fractions)
+    for i, n in enumerate(fractions[:, 0]):
+        for j in range(0, len(doses), 7):
+            assert regimes[i, j] == service.detect_fractionation_regime(float(doses[j]), int(n))
+
+def test_regime_table_indexes_by_fractions_and_dose_step(service: PriorDoseService):
+    table = service.fractionation_regime_table()
+    regimes = [entry["regime"] for entry in table["regimes"]]
+    lookup = lambda dose, n: regimes[table["table"][n - 1][round(dose / table["dose_step"])]]
+    assert lookup(18.0, 1) == "SRS"
+    assert lookup(54.0, 3) == "SBRT_3fx"
+    assert lookup(40.0, 8) == "SBRT_5fx"
+    assert lookup(39.9, 8) == "MODERATE_HYPOFX"
+    assert lookup(60.0, 30) == "CONVENTIONAL"
+
+def test_regime_endpoints(test_client):
+    response = test_client.post("/api/prior-dose/fractionation-regimes", json={"doses": [18, 50, 60], "fractions": [1, 5, 30]})
+    assert response.json() == {"regimes": ["SRS", "SBRT_5fx", "CONVENTIONAL"]}
+    assert test_client.post("/api/prior-dose/fractionation-regimes", json={"doses": [18, 50], "fractions": [1, 5, 30]}).status_code == 400
+
+    table = test_client.get("/api/prior-dose/fractionation-regime-table")
+    assert table.status_code == 200
+    assert len(table.json()["table"]) == 40
+    cached = test_client.get("/api/prior-dose/fractionation-regime-table", headers={"If-None-Match": table.headers["etag"]})
+    assert cached.status_code == 304
+
+# Write-up assembly tests
+def _writeup_request(priors, sections=None) -> PriorDoseRequest:
+    return PriorDoseRequest(
+        common_info={"physician": {"name": "Galvan", "role": "physician"}, "physicist": {"name": "Kirby", "role": "physicist"}},
+        prior_dose_data={
+            "current_site": "spine", "spine_location": "T4-T6", "current_dose": 30.0, "current_fractions": 10,
+            "current_month": "June", "current_year": 2024, "prior_treatments": priors,
+            "critical_structures": ["spinal cord"],
+            "dose_statistics": [{"structure": "Spinal Cord", "constraint_type": "Dmax", "value": "40 Gy", "limit": "<45 Gy", "source": "QUANTEC"}],
+        },
+        sections=sections,
+    )
+
+WRITEUP_PRIORS = [
+    {"site": "lung", "dose": 60, "fractions": 30, "month": "March", "year": 2022},
+    {"site": "spine", "spine_location": "T5", "dose": 8, "fractions": 1, "month": "May", "year": 2020,
+     "has_overlap": True, "dicoms_unavailable": True},
+]
+
+def test_multiple_prior_writeup_text(service: PriorDoseService):
+    """Priors are listed chronologically, with the DICOM note, overlap count and structures."""
+    writeup = service.generate_prior_dose_writeup(_writeup_request(WRITEUP_PRIORS)).writeup
+    assert writeup.startswith(
+        "Dr. Galvan requested a medical physics consultation for --- for a prior dose assessment. "
+        "This consultation provides dosimetric analysis and planning guidance for composite dose evaluation.\n\n"
+        "Patient Information:\n"
+        "The patient has a T4-T6 spine lesion, currently planned for 30 Gy in 10 fractions to the T4-T6 spine. "
+        "In May 2020, the patient received external beam radiotherapy of 8 Gy in 1 fraction to the T5 spine. "
+        "DICOM files for this treatment were unavailable for reconstruction. "
+        "In March 2022, the patient received external beam radiotherapy of 60 Gy in 30 fractions to the lung. "
+        "The current course of treatment has overlap with one of the previous treatments on the spinal cord.\n\n"
+        "Analysis:\n"
+    )
+    assert "Below are the dose statistics:\n• Spinal Cord Dmax: 40 Gy (limit <45 Gy per QUANTEC)\n\nAssessment:\n" in writeup
+
+def test_single_prior_without_overlap_writeup_text(service: PriorDoseService):
+    writeup = service.generate_prior_dose_writeup(_writeup_request(WRITEUP_PRIORS[:1])).writeup
+    assert (
+        "In March 2022, the patient received external beam radiotherapy of 60 Gy in 30 fractions to the lung.\n\n"
+        "Assessment:\nReview of the prior treatment fields"
+    ) in writeup
+    assert "Analysis:" not in writeup
+
+def test_writeup_sections(service: PriorDoseService):
+    """Selected sections render in document order; all sections equal the full write-up."""
+    full = service.generate_prior_dose_writeup(_writeup_request(WRITEUP_PRIORS)).writeup
+    every = service.generate_prior_dose_writeup(_writeup_request(WRITEUP_PRIORS, list(reversed(WRITEUP_SECTIONS)))).writeup
+    assert every == full.strip()
+
+    partial = service.generate_prior_dose_writeup(_writeup_request(WRITEUP_PRIORS, ["assessment", "patient_information"])).writeup
+    assert partial.startswith("Patient Information:\n")
+    assert "Analysis:" not in partial and "requested a medical physics consultation" not in partial
+    assert partial.endswith("approved by Dr. Galvan and Dr. Kirby.")
+
+    no_prior = service.generate_prior_dose_writeup(_writeup_request([], ["analysis"])).writeup
+    assert no_prior == ""
+
+def test_empty_sections_rejected():
+    with pytest.raises(ValidationError):
+        _writeup_request(WRITEUP_PRIORS, [])
+    with pytest.raises(ValidationError):
+        _writeup_request(WRITEUP_PRIORS, ["summary"])
@@ -0,0 +1,28 @@
+from qa.benchmark import Scenario, build_scenarios, compare, percentile, run
+
+def test_percentile_nearest_rank():
+    samples = [float(i) for i in range(1, 101)]
+    assert (percentile(samples, 50), percentile(samples, 95), percentile(samples, 99)) == (50.0, 95.0, 99.0)
+
+def test_compare_flags_only_regressions_beyond_threshold():
+    baseline = {"sbrt": {"rps": 100.0, "p95_ms": 10.0, "alloc_peak_kib": 20.0}}
+    results = {"sbrt": {"rps": 90.0, "p95_ms": 14.0, "alloc_peak_kib": 10.0}}
+    assert compare(results, baseline, threshold=0.25) == ["sbrt p95_ms: 10.0 -> 14.0 (+40% worse)"]
+
+def test_compare_ignores_sub_noise_floor_latency():
+    baseline = {"alpha_beta": {"p50_ms": 0.4}}
+    assert compare({"alpha_beta": {"p50_ms": 0.7}}, baseline, noise_floor_ms=0.5) == []
+
+def test_scenarios_cover_every_generate_endpoint():
+    from app.main import app
+
+    generate_routes = {
+        route.path for route in app.routes
+        if route.path.endswith("/generate") and "POST" in getattr(route, "methods", ())
+    }
+    paths = {s.path for s in build_scenarios() if s.method == "POST"}
+    assert generate_routes and generate_routes <= paths
+
+async def test_run_reports_every_metric():
+    results = await run([Scenario("alpha_beta", "GET", "/api/prior-dose/alpha-beta")], requests=3, alloc_requests=1)
+    assert set(results["alpha_beta"]) == {"rps", "p50_ms", "p95_ms", "p99_ms", "alloc_peak_kib"}
@@ -0,0 +1,22 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from qa.run import run, select_scripts
+from qa.scripts import load_script
+
+def test_select_scripts():
+    assert select_scripts(["tbi"]) == ["test_tbi_comprehensive"]
+    assert "test_srs_comprehensive" in select_scripts()
+
+def test_script_requests_are_served_in_process(test_client: TestClient):
+    tbi = load_script("test_tbi_comprehensive", test_client)
+    result = tbi.generate_writeup("TBI 2 Gy", tbi.create_payload(2.0, 1, "AP/PA", "none"))
+    assert result["success"] and "Dr. Galvan" in result["writeup"]
+
+def test_runner_writes_the_script_reports(test_client: TestClient, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    results = asyncio.run(run(["test_prior_dose_core", "test_tbi_comprehensive"], test_client))
+    assert [(r.name, r.ok) for r in results] == [("test_prior_dose_core", True), ("test_tbi_comprehensive", True)]
+    assert all(r.calls > 0 for r in results)
+    assert (tmp_path / "tbi_qa_results.md").exists()
@@ -0,0 +1,34 @@
+import json
+from fastapi.testclient import TestClient
+from app.services.prior_dose import PriorDoseService
+
+def test_reference_endpoint_serves_precomputed_payload_with_etag(test_client: TestClient):
+    response = test_client.get("/api/prior-dose/alpha-beta")
+    assert response.status_code == 200
+    assert response.json() == PriorDoseService().alpha_beta_ratios
+    assert response.headers["Cache-Control"].startswith("public, max-age=")
+
+    etag = response.headers["ETag"]
+    revalidated = test_client.get("/api/prior-dose/alpha-beta", headers={"If-None-Match": etag})
+    assert revalidated.status_code == 304
+    assert revalidated.content == b""
+
+def test_parametrized_reference_falls_back_for_unknown_items(test_client: TestClient):
+    sites = test_client.get("/api/sbrt/treatment-sites").json()
+    assert "ETag" in test_client.get(f"/api/sbrt/dose-constraints/{sites[0]}").headers
+    assert test_client.get("/api/sbrt/dose-constraints/not-a-site").status_code == 404
+
+def test_bundle_contains_every_payload(test_client: TestClient):
+    bundle = test_client.get("/api/reference/all").json()
+    assert bundle["prior-dose/alpha-beta"] == PriorDoseService().alpha_beta_ratios
+    assert bundle["fusion/modalities"] == test_client.get("/api/fusion/modalities").json()
+    assert set(test_client.get("/api/reference/").json()["payloads"]) == set(bundle)
+    assert test_client.get("/api/reference/pacemaker/device-info").json() == bundle["pacemaker/device-info"]
+    assert test_client.get("/api/reference/unknown").status_code == 404
+
+def test_standalone_payloads_kept_out_of_bundle(test_client: TestClient):
+    listing = test_client.get("/api/reference/").json()
+    assert listing["standalone_payloads"] == ["prior-dose/fractionation-regime-table"]
+    assert "prior-dose/fractionation-regime-table" not in test_client.get("/api/reference/all").json()
+    table = test_client.get("/api/reference/prior-dose/fractionation-regime-table")
+    assert table.headers["ETag"] == test_client.get("/api/prior-dose/fractionation-regime-table").headers["ETag"]
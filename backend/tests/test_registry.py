@@ -0,0 +1,35 @@
+import pytest
+from fastapi.testclient import TestClient
+from app.registry import ServiceRegistry, registry
+from app.routers.prior_dose import get_prior_dose_service
+from app.services.prior_dose import PriorDoseService
+
+def test_services_are_shared():
+    """The same service instance is handed out on every call."""
+    assert get_prior_dose_service() is get_prior_dose_service()
+    assert isinstance(get_prior_dose_service(), PriorDoseService)
+
+def test_service_override():
+    """Tests can swap a service instance and get the original back afterwards."""
+    original = registry.get("prior_dose")
+    replacement = PriorDoseService()
+    with registry.override("prior_dose", replacement):
+        assert get_prior_dose_service() is replacement
+    assert get_prior_dose_service() is original
+
+def test_startup_report(test_client: TestClient):
+    """Startup builds every service and reports its construction cost."""
+    response = test_client.get("/health/services")
+    assert response.status_code == 200
+    services = response.json()["services"]
+    assert "prior_dose" in services
+    assert all(info["built"] for info in services.values())
+
+
+def test_close_releases_and_rebuilds():
+    registry = ServiceRegistry({"generation_pool": "app.services.generation_pool:GenerationPool"})
+    first = registry.get("generation_pool")
+    registry.close()
+    with pytest.raises(RuntimeError):
+        first.executor.submit(print)
+    assert registry.get("generation_pool") is not first
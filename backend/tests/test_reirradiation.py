@@ -0,0 +1,81 @@
+import pytest
+from app.schemas.prior_dose import PriorTreatment
+from app.services.dose_engine import eqd2
+from app.services.prior_dose import PriorDoseService
+from app.services.reirradiation import NO_RECOVERY, RecoveryModel, TimeDecayedSummation, months_between
+
+@pytest.fixture(scope="module")
+def service() -> PriorDoseService:
+    return PriorDoseService()
+
+def test_recovery_model_ramp():
+    """No recovery before onset, linear to the maximum, then flat."""
+    model = RecoveryModel(onset_months=6, full_months=24, max_recovery=0.5)
+    assert model.recovered([0, 6, 15, 24, 60]).tolist() == pytest.approx([0, 0, 0.25, 0.5, 0.5])
+    assert RecoveryModel(onset_months=12, full_months=12, max_recovery=0.3).recovered([11, 12]).tolist() == [0, 0.3]
+    with pytest.raises(ValueError):
+        RecoveryModel(onset_months=12, full_months=6)
+
+def test_months_between_resolves_missing_dates_to_shortest_interval():
+    assert months_between("June", 2022, "March", 2024) == 21
+    assert months_between(None, 2022, "March", 2024) == 15
+    assert months_between("June", None, "March", 2024) == 0
+    assert months_between("June", 2025, "March", 2024) == 0
+
+def test_model_for_matches_whole_words_and_aliases():
+    summation = TimeDecayedSummation(lambda name: 2.0)
+    assert summation.model_for("Brain") is NO_RECOVERY
+    assert summation.model_for("Normal Brain") is NO_RECOVERY
+    assert summation.model_for("Brain_Stem") is summation.models["brainstem"]
+    assert summation.model_for("Spinal Cord PRV") is summation.models["spinal cord"]
+    assert summation.model_for("Cord") is summation.models["spinal cord"]
+    assert summation.model_for("Cauda Equina") is NO_RECOVERY
+
+def test_matches_scalar_calculation():
+    """The broadcast gives the same answer as summing each prior by hand."""
+    model = RecoveryModel(onset_months=6, full_months=24, max_recovery=0.5)
+    summation = TimeDecayedSummation(lambda name: 2.0 if name == "Spinal Cord" else 3.0, {"spinal cord": model})
+    doses, fractions, intervals = [30, 20, 24], [10, 5, 3], [36, 15, 3]
+    cord, lung = summation.evaluate(doses, fractions, intervals, ["Spinal Cord", "Lung"])
+
+    expected = sum(
+        float(eqd2(d, n, 2.0)) * (1 - float(model.recovered(t)))
+        for d, n, t in zip(doses, fractions, intervals)
+    )
+    assert cord.effective_eqd2 == pytest.approx(expected)
+    assert cord.nominal_eqd2 == pytest.approx(sum(float(eqd2(d, n, 2.0)) for d, n in zip(doses, fractions)))
+    assert [p.recovered_fraction for p in cord.priors] == pytest.approx([0.5, 0.25, 0.0])
+    # No model configured for lung: fully additive
+    assert lung.effective_eqd2 == pytest.approx(lung.nominal_eqd2)
+
+def test_service_skips_unquantified_priors(service: PriorDoseService):
+    priors = [
+        PriorTreatment(site="spine", dose=30, fractions=10, month="January", year=2020, has_overlap=True),
+        PriorTreatment(site="spine", dicoms_unavailable=True, has_overlap=True),
+        PriorTreatment(site="lung", dose=60, fractions=30, month="June", year=2023),
+    ]
+    results, unquantified = service.effective_prior_eqd2(priors, ["Spinal Cord"], "June", 2024)
+    assert unquantified == [1]
+    assert [p.index for p in results[0].priors] == [0, 2]
+
+    results, _ = service.effective_prior_eqd2(priors, ["Spinal Cord"], "June", 2024, overlapping_only=True)
+    assert [p.index for p in results[0].priors] == [0]
+
+def test_effective_prior_dose_endpoint(test_client):
+    payload = {
+        "current_month": "June",
+        "current_year": 2024,
+        "prior_treatments": [
+            {"site": "spine", "dose": 30, "fractions": 10, "month": "June", "year": 2021, "has_overlap": True},
+        ],
+        "structures": ["Spinal Cord", "Esophagus"],
+    }
+    response = test_client.post("/api/prior-dose/effective-prior-dose", json=payload)
+    assert response.status_code == 200
+    cord, esophagus = response.json()["structures"]
+    assert cord["nominal_eqd2"] == 37.5
+    assert cord["effective_eqd2"] == 18.75
+    assert esophagus["effective_eqd2"] == esophagus["nominal_eqd2"]
+
+    payload["recovery_models"] = {"spinal cord": {"onset_months": 24, "full_months": 12}}
+    assert test_client.post("/api/prior-dose/effective-prior-dose", json=payload).status_code == 400
@@ -0,0 +1,9 @@
+import json
+import numpy as np
+from app.responses import dumps
+from app.schemas.batch import BatchResponse
+
+def test_dumps_models_and_plain_content():
+    model = BatchResponse(results=[], succeeded=0, failed=0)
+    assert json.loads(dumps(model)) == model.model_dump()
+    assert json.loads(dumps({"α/β": np.float64(3.0), 2: "Gy"})) == {"α/β": 3.0, "2": "Gy"}
@@ -0,0 +1,38 @@
+import os
+import subprocess
+import sys
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.startup import LAZY, ROUTERS, LazyRouterMiddleware, StartupReport
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_lazy_mode_imports_no_routers_at_import_time():
+    code = "import sys, app.main; print(sorted(m for m in sys.modules if m.startswith('app.routers.')))"
+    env = {**os.environ, "STARTUP_MODE": LAZY}
+    result = subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR, env=env,
+                            capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "[]"
+
+def test_router_included_on_first_request():
+    app = FastAPI()
+    report = StartupReport(mode=LAZY)
+    app.add_middleware(LazyRouterMiddleware, fastapi_app=app, report=report)
+    client = TestClient(app)
+
+    response = client.get("/api/hdr/applicators")
+    assert response.status_code == 200
+    assert list(report.imports) == ["app.routers.hdr"]
+    assert report.imports["app.routers.hdr"]["on_request"]
+
+    # Docs need every route
+    client.get("/openapi.json")
+    assert set(report.imports) == {module for module, _, _ in ROUTERS}
+
+def test_startup_report(test_client: TestClient):
+    report = test_client.get("/health/startup").json()
+    assert report["ddl"] == "created"
+    assert report["ready_ms"] is not None
+    assert "app.routers.prior_dose" in report["router_imports"]
@@ -0,0 +1,42 @@
+import asyncio
+import logging
+from app.services.generation_pool import GenerationPool
+from app.tracing import Tracer, _sampled
+
+def test_events_are_structured_and_gated_by_level(caplog):
+    tracer = Tracer("unit", sample_rate=1.0)
+    with caplog.at_level(logging.INFO, logger="trace"):
+        assert tracer.begin("start", a=1) is False
+        tracer.event("skipped")
+    assert caplog.records == []
+
+    with caplog.at_level(logging.DEBUG, logger="trace"):
+        assert tracer.begin("start", region="head and neck", count=2) is True
+        tracer.event("step", ok=True)
+    assert [r.getMessage() for r in caplog.records] == ['start region="head and neck" count=2', "step ok=True"]
+
+def test_sampling_decision_applies_to_whole_trace(caplog):
+    tracer = Tracer("unit", sample_rate=0.0)
+    with caplog.at_level(logging.DEBUG, logger="trace"):
+        assert tracer.begin("start") is False
+        assert tracer.active is False
+        tracer.event("step")
+    assert caplog.records == []
+
+def test_sampling_decision_does_not_leak_between_pooled_generations():
+    """A decision made on a pool worker stays with its request, not the worker thread."""
+    pool = GenerationPool(workers=1, queue_size=0, pooled_modules={"sbrt"}, expose_metrics=False)
+
+    def begin(request):
+        _sampled.set(True)
+        return _sampled.get()
+
+    async def next_request():
+        _sampled.set(False)
+        return await pool.run("sbrt", None, lambda r: _sampled.get())
+
+    try:
+        assert asyncio.run(pool.run("sbrt", None, begin)) is True
+        assert asyncio.run(next_request()) is False
+    finally:
+        pool.close()
@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.database import get_db
+from app.main import app
+from app.models import Writeup
+from app.schemas.fusion import FusionRequest
+from app.services.writeup_archive import WriteupArchive
+from tests.test_writeup_cache import FUSION_REQUEST
+
+async def _archive_rows(session, count):
+    """Rows one minute apart, alternating fusion/prior_dose; the last is the newest."""
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    for i in range(count):
+        module = "fusion" if i % 2 == 0 else "prior_dose"
+        session.add(Writeup(module=module, request_json={}, output=f"Consult {i} CT MRI rigid registration",
+                            physician="Galvan" if i < 3 else "Kirby", physicist="Lee",
+                            created_at=start + timedelta(minutes=i)))
+    await session.flush()
+
+async def test_keyset_pages_cover_every_row(db_session):
+    await _archive_rows(db_session, 5)
+    archive = WriteupArchive()
+    seen, cursor = [], None
+    while True:
+        page = await archive.list(db_session, limit=2, cursor=cursor)
+        seen.extend(row.output for row in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == [f"Consult {i} CT MRI rigid registration" for i in reversed(range(5))]
+
+    fusion = await archive.list(db_session, module="fusion", physician="Galvan")
+    assert [row.output.split()[1] for row in fusion["items"]] == ["2", "0"]
+
+async def test_full_text_search(db_session):
+    archive = WriteupArchive()
+    await archive.record(db_session, "fusion", FusionRequest.model_validate(FUSION_REQUEST),
+                         {"writeup": "Deformable registration of PET to planning CT"})
+    await _archive_rows(db_session, 2)
+    page = await archive.search(db_session, "deformable PET")
+    assert [row.physician for row in page["items"]] == ["Galvan"]
+    assert (await archive.search(db_session, 'rigid "registration'))["items"]  # quotes are escaped
+    with pytest.raises(ValueError):
+        await archive.list(db_session, cursor="not-a-cursor")
+
+def test_archive_endpoints(db_session, test_client: TestClient):
+    async def override_db():
+        yield db_session
+
+    app.dependency_overrides[get_db] = override_db
+    try:
+        assert test_client.get("/api/archive/").json() == {"items": [], "next_cursor": None}
+        assert test_client.get("/api/archive/999").status_code == 404
+        assert test_client.get("/api/archive/", params={"cursor": "bogus"}).status_code == 400
+    finally:
+        app.dependency_overrides.pop(get_db)
@@ -0,0 +1,66 @@
+from fastapi.testclient import TestClient
+from app.registry import registry
+from app.schemas.fusion import FusionRequest
+from app.services.writeup_cache import WriteupCache, request_key
+
+FUSION_REQUEST = {
+    "common_info": {
+        "physician": {"name": "Galvan", "role": "physician"},
+        "physicist": {"name": "Kirby", "role": "physicist"},
+    },
+    "fusion_data": {
+        "anatomical_region": "brain",
+        "registrations": [{"primary": "CT", "secondary": "MRI", "method": "Rigid"}],
+    },
+}
+
+def test_request_key_is_canonical():
+    """Key order in the submitted JSON doesn't change the key; the module does."""
+    reordered = {"fusion_data": FUSION_REQUEST["fusion_data"], "common_info": FUSION_REQUEST["common_info"]}
+    first = FusionRequest.model_validate(FUSION_REQUEST)
+    second = FusionRequest.model_validate(reordered)
+    assert request_key("fusion", first) == request_key("fusion", second)
+    assert request_key("fusion", first) != request_key("dibh", first)
+
+def test_lru_and_ttl_eviction():
+    now = [0.0]
+    cache = WriteupCache(max_entries=2, ttl_seconds=10, clock=lambda: now[0])
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # "b" is now least recently used
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    now[0] = 11.0
+    assert cache.get("a") is None
+    assert cache.stats()["evictions"] == 1
+    assert (cache.hits, cache.misses) == (1, 2)
+
+def test_uncached_module_always_generates():
+    cache = WriteupCache()
+    request = FusionRequest.model_validate(FUSION_REQUEST)
+    calls = []
+    for _ in range(2):
+        cache.get_or_generate("pacemaker", request, lambda r: calls.append(r) or "text")
+    assert len(calls) == 2
+
+def test_generate_serves_hits_and_304s(test_client: TestClient):
+    with registry.override("writeup_cache", WriteupCache()):
+        first = test_client.post("/api/fusion/generate", json=FUSION_REQUEST)
+        second = test_client.post("/api/fusion/generate", json=FUSION_REQUEST)
+        assert (first.headers["X-Cache"], second.headers["X-Cache"]) == ("MISS", "HIT")
+        assert first.json() == second.json()
+
+        etag = first.headers["ETag"]
+        revalidated = test_client.post("/api/fusion/generate", json=FUSION_REQUEST, headers={"If-None-Match": etag})
+        assert revalidated.status_code == 304
+        assert revalidated.headers["ETag"] == etag
+
+def test_pacemaker_generated_every_time_and_archived(test_client: TestClient):
+    from qa.scripts import load_script
+
+    payload = load_script("test_pacemaker_comprehensive").create_payload()
+    buffered = test_client.get("/health/archive").json()["buffered"]
+    responses = [test_client.post("/api/pacemaker/generate", json=payload) for _ in range(2)]
+    assert [r.headers["X-Cache"] for r in responses] == ["MISS", "MISS"]
+    assert "ETag" not in responses[0].headers
+    assert test_client.get("/health/archive").json()["buffered"] == buffered + 2
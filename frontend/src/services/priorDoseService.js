@@ -75,6 +75,28 @@ export const getFractionationRegime = async (dose, fractions) => {
   }
 };
 
+// Get the precomputed fractionation regime table (fetch once, then use
+// lookupFractionationRegime instead of calling the API on every change)
+export const getFractionationRegimeTable = async () => {
+  try {
+    const response = await apiClient.get('/prior-dose/fractionation-regime-table');
+    return response.data;
+  } catch (error) {
+    throw new Error(error.response?.data?.detail || 'Failed to get fractionation regime table');
+  }
+};
+
+// Look up the regime of a dose/fractionation in the table from
+// getFractionationRegimeTable. Returns null when the pair is off the table's
+// grid; use getFractionationRegime for those.
+export const lookupFractionationRegime = (regimeTable, dose, fractions) => {
+  const { table, regimes, max_fractions: maxFractions, max_dose: maxDose, dose_step: doseStep } = regimeTable;
+  const doseIndex = Math.round(dose / doseStep);
+  if (!Number.isInteger(fractions) || fractions < 1 || fractions > maxFractions) return null;
+  if (dose < 0 || dose > maxDose || Math.abs(doseIndex * doseStep - dose) > 1e-9) return null;
+  return regimes[table[fractions - 1][doseIndex]];
+};
+
 // Get α/β ratio reference values
 export const getAlphaBetaRatios = async () => {
   try {